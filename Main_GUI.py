@@ -8,13 +8,16 @@
 import os
 import sys
 import sqlite3
+import multiprocessing
 import numpy as np
 from PyQt5.QtWidgets import QApplication, QPushButton, QVBoxLayout, QHBoxLayout, QMessageBox, QDialog, QTextEdit
 from PyQt5.QtGui import QPixmap, QFont
 from PyQt5.QtCore import Qt
 from scripts.Sub01_WelcomePage import WelcomePage
-from scripts.Sub02_CreateNewSQLTable import Create_SQLite3_DB_Connect
+from scripts.Sub02_CreateNewSQLTable import Create_SQLite3_DB_Connect, Update_Database_Schema, \
+    Connect_to_Database
 from scripts.Sub03_MainPage import Main_Window
+from scripts.Sub08_External_Spectra_Store import Release_External_Store
 
 
 def main():
@@ -38,8 +41,9 @@ def main():
     # Step 02: Check if the database is already existed (load the database) or create a new database.
     if os.path.isfile(os.path.join(DB_Folder, DB_FileName + '.db')):
         # Load the database. 
-        conn = sqlite3.connect(os.path.join(DB_Folder, DB_FileName + '.db'))
+        conn = Connect_to_Database(os.path.join(DB_Folder, DB_FileName + '.db'))
         cursor = conn.cursor()
+        Update_Database_Schema(conn, cursor)        # Add the tables of the newer versions (if missing).
     else:
         # Create the database and connect the SQL courser. 
         conn, cursor = Create_SQLite3_DB_Connect(os.path.join(DB_Folder, DB_FileName + '.db'))
@@ -48,8 +52,12 @@ def main():
     Main = Main_Window(conn, cursor, DB_FileName, DB_Folder)
     Main.show()
     app.exec()
+    # Write the pending records (if any) before closing the database (also tried when closing the main window). 
+    if not Main.main_page.Flush_DB_Writer():
+        print(f'{len(Main.main_page.DB_Writer.Pending)} new records could NOT be written to the database!')
     # ------------------------------------------------------------------------------------------------------------------
     # Quit the application (and connection to SQL) and return Nothing. 
+    Release_External_Store(cursor)
     conn.close()
     app.quit()
     return 
@@ -146,4 +154,6 @@ aaron.leavitt@dot.gov
 
 
 if __name__ == '__main__':
+    # Needed for the pool of processes (e.g., batch export of the records) in the frozen (PyInstaller) application. 
+    multiprocessing.freeze_support()
     main()
@@ -6,8 +6,42 @@
 
 # Importing the required libraries.
 import os
+import sys
+import json
+import time
 import sqlite3
+import numpy as np
 import pandas as pd
+if __name__ == '__main__':
+    # Running this file directly (e.g., for the benchmark), so the "scripts" package should be importable. 
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from scripts.Sub04_FTIR_Analysis_Functions import Array_to_Binary, Binary_to_Array, Array_Codec_Magic
+from scripts.Sub08_External_Spectra_Store import Get_External_Store, Enable_External_Spectra_Store, Parse_Shape
+
+
+def Connect_to_Database(path):
+    """
+    This function makes a connection to the database (new or existing) and applies the performance settings: WAL 
+    journal (readers do not block the writer), "synchronous=NORMAL" (no disk sync per commit in WAL mode, committed 
+    transactions are still safe against application crash), larger page cache, memory-mapped I/O, in-memory temporary 
+    tables, and a busy timeout. The values can be modified in "Database_Settings" item of the config file (see 
+    "Get_DB_Settings"). 
+
+    :param path: full path to the database file. 
+    :return: connection to the database using the sqlite3 library. 
+    """
+    Settings = Get_DB_Settings()
+    conn = sqlite3.connect(path, timeout=Settings['Busy_Timeout'])
+    conn.execute(f"PRAGMA journal_mode = {Settings['Journal_Mode']}")
+    conn.execute(f"PRAGMA synchronous = {Settings['Synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {-int(Settings['Cache_Size_MB'] * 1024)}")     # Negative value means KiB.
+    conn.execute(f"PRAGMA mmap_size = {int(Settings['Mmap_Size_MB'] * 1024 * 1024)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    # Return the connection. 
+    return conn
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
 
 
 def Create_SQLite3_DB_Connect(path):
@@ -18,7 +52,7 @@ def Create_SQLite3_DB_Connect(path):
     :return: connection to the generated database using the sqlite3 library. 
     """
     # Creating the new database file (it is not existed, already checked), and make a connection to the file. 
-    conn = sqlite3.connect(path)
+    conn = Connect_to_Database(path)
     
     # Creating a curser object to execute the sql commands. 
     cursor = conn.cursor()
@@ -50,18 +84,6 @@ def Create_SQLite3_DB_Connect(path):
         Sulfoxide_Peak_Absorption REAL,
         Aliphatic_Peak_Absorption_1 REAL,
         Aliphatic_Peak_Absorption_2 REAL,
-        Wavenumber BOLB,
-        Wavenumber_shape TEXT,
-        Wavenumber_dtype TEXT, 
-        Absorption BOLB,
-        Absorption_shape TEXT,
-        Absorption_dtype TEXT,
-        RawWavenumber BOLB,
-        RawWavenumber_shape TEXT,
-        RawWavenumber_dtype TEXT,
-        RawAbsorbance BOLB,
-        RawAbsorbance_shape TEXT,
-        RawAbsorbance_dtype TEXT,
         Carbonyl_Min_Wavenumber REAL,
         Carbonyl_Max_Wavenumber REAL,
         Sulfoxide_Min_Wavenumber REAL,
@@ -76,23 +98,14 @@ def Create_SQLite3_DB_Connect(path):
         Normalization_Coeff REAL,
         IsOutlier INTEGER,
         Deconv_ICO REAL, 
-        Deconv_ISO REAL, 
-        Deconv_GaussianList BOLB,  
-        Deconv_GaussianList_shape TEXT,  
-        Deconv_GaussianList_dtype TEXT,
-        Deconv_CarbonylList BOLB,  
-        Deconv_CarbonylList_shape TEXT,  
-        Deconv_CarbonylList_dtype TEXT, 
-        Deconv_SulfoxideList BOLB, 
-        Deconv_SulfoxideList_shape TEXT, 
-        Deconv_SulfoxideList_dtype TEXT, 
-        Deconv_AliphaticList BOLB, 
-        Deconv_AliphaticList_shape TEXT, 
-        Deconv_AliphaticList_dtype TEXT          
+        Deconv_ISO REAL
     )
     """)
     cursor.execute("CREATE INDEX idx_filename ON FTIR (FileName);")       # Creating an index for "FileName"
 
+    # Creating the other tables (including the table of the spectra). 
+    Update_Database_Schema(conn, cursor)
+
     # Return the connection. 
     return conn, cursor
 # ======================================================================================================================
@@ -102,26 +115,15 @@ def Create_SQLite3_DB_Connect(path):
 
 def Get_DB_SummaryData(cursor):
     """
-    This function goes through the Database and tries to extract the summary information.
+    This function extracts the summary information of the database from the "DB_Summary" table, which is maintained 
+    by the triggers on the FTIR table (see "Create_Summary_Tables"). 
 
     :param cursor: cursor for executing the SQL commands. 
     :return: a dictionary of the summary information. 
     """
-    # First, get the total number of data. 
-    cursor.execute("SELECT COUNT(*) FROM FTIR")
-    NumRows = cursor.fetchone()[0]
-    # Get the total number of data, excluding outliers. 
-    cursor.execute("SELECT COUNT(*) FROM FTIR WHERE IsOutlier = ?", (0,))
-    NumValidRows = cursor.fetchone()[0]
-    # Get the number of unique B-numbers.
-    cursor.execute("SELECT COUNT(DISTINCT Bnumber) FROM FTIR WHERE IsOutlier = ?", (0,))
-    NumUniqueBnumber = cursor.fetchone()[0]
-    # Get the number of unique Lab aging conditions.
-    cursor.execute("SELECT COUNT(DISTINCT Lab_Aging) FROM FTIR WHERE IsOutlier = ?", (0,))
-    NumUniqueLabAging = cursor.fetchone()[0]
-    # Get the number of unique B-number and aging combinations. 
-    cursor.execute("SELECT COUNT(*) FROM (SELECT DISTINCT Bnumber, Lab_Aging FROM FTIR)")
-    NumUniqueBnumLabAge = cursor.fetchone()[0]
+    cursor.execute("""SELECT NumRows, NumValidRows, NumUniqueBnumber, NumUniqueLabAging, NumUniqueBnumLabAge 
+                   FROM DB_Summary WHERE id = 1""")
+    NumRows, NumValidRows, NumUniqueBnumber, NumUniqueLabAging, NumUniqueBnumLabAge = cursor.fetchone()
     # Get average number of replicates per each sample. 
     try:
         AvgNumReplicates = NumValidRows / NumUniqueBnumLabAge
@@ -142,61 +144,351 @@ def Get_DB_SummaryData(cursor):
 # ======================================================================================================================
 
 
+def Update_Database_Schema(conn, cursor):
+    """
+    This function creates the tables that were added in later versions (if they are not existed), so that the older 
+    databases can also be used. It is called for both new and loaded databases. 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    """
+    # Table of the deconvolution diagnostics (one row per FTIR record, "id" is the same as FTIR table). 
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS FTIR_Diagnostics (
+        id INTEGER PRIMARY KEY,
+        NumAttempts INTEGER,
+        NumRejected INTEGER,
+        TotalNFev INTEGER,
+        Elapsed_Time REAL,
+        Diagnostics BLOB,
+        Diagnostics_shape TEXT,
+        Diagnostics_dtype TEXT,
+        Refinement_Residual REAL,
+        Refinement_NumIter INTEGER
+    )
+    """)
+    # The results of the joint refinement were added later to the diagnostics table. 
+    cursor.execute("PRAGMA table_info(FTIR_Diagnostics)")
+    DiagnosticsCols = [Col[1] for Col in cursor.fetchall()]
+    for Col, Type in [('Refinement_Residual', 'REAL'), ('Refinement_NumIter', 'INTEGER')]:
+        if Col not in DiagnosticsCols:
+            cursor.execute(f"ALTER TABLE FTIR_Diagnostics ADD COLUMN {Col} {Type}")
+    # Table of the spectra and the deconvolution results (arrays) of each FTIR record ("id" is the same as FTIR table).
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS Spectra (
+        id INTEGER PRIMARY KEY,
+        {', '.join([f"{Col} {'TEXT' if Col.endswith(('_shape', '_dtype')) else 'BLOB'}" for Col in Spectra_Columns])}
+    )
+    """)
+    # In older databases, the arrays are stored in the FTIR table itself, which should be moved to "Spectra" table. 
+    cursor.execute("PRAGMA table_info(FTIR)")
+    if 'Wavenumber' in [Col[1] for Col in cursor.fetchall()]:
+        Migrate_Spectra_to_Separate_Table(conn, cursor)
+    # Composite indexes for the filters on the binder identifiers and outliers (covering the frequent queries). 
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_identifiers ON FTIR (Bnumber, Lab_Aging, RepNumber, IsOutlier)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outlier ON FTIR (IsOutlier, Bnumber, Lab_Aging)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_labaging ON FTIR (Lab_Aging, Bnumber)")
+    # Summary tables (and the triggers to maintain them). 
+    Create_Summary_Tables(conn, cursor)
+    # Tracking the groups which their aggregated analysis should be updated. 
+    Create_Analysis_Tracking(conn, cursor)
+    # Move the spectra to the external store, if it is requested in the config file (only once for each database). 
+    if Get_DB_Settings()['External_Spectra_Store'] and Get_External_Store(cursor) is None:
+        Enable_External_Spectra_Store(conn, cursor, Spectra_Array_Columns)
+    # Commit the changes. 
+    conn.commit()
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Create_Summary_Tables(conn, cursor):
+    """
+    This function creates the summary tables of the database and the triggers on the FTIR table which update them 
+    incrementally on every insert, update, and delete. This way, the summary information is only one lookup, no 
+    matter how large the database is. The tables are: 
+        "DB_Summary": A single row (id = 1) with the total counts and the number of unique groups.
+        "Summary_Bnumber", "Summary_LabAging": Number of valid (non-outlier) records of each B-number/aging level. 
+        "Summary_Binder": Number of all records of each B-number and aging level combination. 
+    The number of unique groups in "DB_Summary" is updated by the triggers on the group tables, where a group is 
+    added with its first record and removed with its last record. If the summary tables are new (older database), 
+    they are filled using the current records. 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'DB_Summary'")
+    IsNew = cursor.fetchone() is None
+    # Creating the tables. 
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS DB_Summary (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        NumRows INTEGER NOT NULL DEFAULT 0,
+        NumValidRows INTEGER NOT NULL DEFAULT 0,
+        NumUniqueBnumber INTEGER NOT NULL DEFAULT 0,
+        NumUniqueLabAging INTEGER NOT NULL DEFAULT 0,
+        NumUniqueBnumLabAge INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO DB_Summary (id) VALUES (1)")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS Summary_Bnumber (
+                   Bnumber INTEGER PRIMARY KEY, NumValid INTEGER NOT NULL)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS Summary_LabAging (
+                   Lab_Aging TEXT PRIMARY KEY, NumValid INTEGER NOT NULL)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS Summary_Binder (
+                   Bnumber INTEGER, Lab_Aging TEXT, NumRows INTEGER NOT NULL, PRIMARY KEY (Bnumber, Lab_Aging))""")
+    # Triggers for the number of unique groups. 
+    for Table, Column in [('Summary_Bnumber', 'NumUniqueBnumber'), ('Summary_LabAging', 'NumUniqueLabAging'), 
+                          ('Summary_Binder', 'NumUniqueBnumLabAge')]:
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{Table}_insert AFTER INSERT ON {Table} BEGIN 
+                       UPDATE DB_Summary SET {Column} = {Column} + 1 WHERE id = 1; END""")
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{Table}_delete AFTER DELETE ON {Table} BEGIN 
+                       UPDATE DB_Summary SET {Column} = {Column} - 1 WHERE id = 1; END""")
+    # Triggers on the FTIR table (an update is the same as removing the old record and adding the new one). A record 
+    # without "IsOutlier" (NULL) is not counted as valid, same as "Rebuild_Summary_Tables". 
+    Add_Record = lambda R: f"""
+        INSERT OR IGNORE INTO Summary_Binder (Bnumber, Lab_Aging, NumRows) 
+            SELECT {R}.Bnumber, {R}.Lab_Aging, 0 WHERE {R}.Bnumber IS NOT NULL AND {R}.Lab_Aging IS NOT NULL;
+        UPDATE Summary_Binder SET NumRows = NumRows + 1 WHERE Bnumber = {R}.Bnumber AND Lab_Aging = {R}.Lab_Aging;
+        INSERT OR IGNORE INTO Summary_Bnumber (Bnumber, NumValid) 
+            SELECT {R}.Bnumber, 0 WHERE {R}.IsOutlier = 0 AND {R}.Bnumber IS NOT NULL;
+        UPDATE Summary_Bnumber SET NumValid = NumValid + 1 WHERE Bnumber = {R}.Bnumber AND {R}.IsOutlier = 0;
+        INSERT OR IGNORE INTO Summary_LabAging (Lab_Aging, NumValid) 
+            SELECT {R}.Lab_Aging, 0 WHERE {R}.IsOutlier = 0 AND {R}.Lab_Aging IS NOT NULL;
+        UPDATE Summary_LabAging SET NumValid = NumValid + 1 WHERE Lab_Aging = {R}.Lab_Aging AND {R}.IsOutlier = 0;
+        UPDATE DB_Summary SET NumRows = NumRows + 1, NumValidRows = NumValidRows + IFNULL({R}.IsOutlier = 0, 0) 
+            WHERE id = 1;"""
+    Remove_Record = lambda R: f"""
+        UPDATE Summary_Binder SET NumRows = NumRows - 1 WHERE Bnumber = {R}.Bnumber AND Lab_Aging = {R}.Lab_Aging;
+        DELETE FROM Summary_Binder WHERE Bnumber = {R}.Bnumber AND Lab_Aging = {R}.Lab_Aging AND NumRows <= 0;
+        UPDATE Summary_Bnumber SET NumValid = NumValid - 1 WHERE Bnumber = {R}.Bnumber AND {R}.IsOutlier = 0;
+        DELETE FROM Summary_Bnumber WHERE Bnumber = {R}.Bnumber AND NumValid <= 0;
+        UPDATE Summary_LabAging SET NumValid = NumValid - 1 WHERE Lab_Aging = {R}.Lab_Aging AND {R}.IsOutlier = 0;
+        DELETE FROM Summary_LabAging WHERE Lab_Aging = {R}.Lab_Aging AND NumValid <= 0;
+        UPDATE DB_Summary SET NumRows = NumRows - 1, NumValidRows = NumValidRows - IFNULL({R}.IsOutlier = 0, 0) 
+            WHERE id = 1;"""
+    # The triggers are always re-created, to replace the older versions in the existing databases. 
+    for Trigger in ['trg_FTIR_insert', 'trg_FTIR_delete', 'trg_FTIR_update']:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {Trigger}")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_FTIR_insert AFTER INSERT ON FTIR 
+                   BEGIN {Add_Record('NEW')} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_FTIR_delete AFTER DELETE ON FTIR 
+                   BEGIN {Remove_Record('OLD')} END""")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_FTIR_update AFTER UPDATE OF Bnumber, Lab_Aging, IsOutlier 
+                   ON FTIR BEGIN {Remove_Record('OLD')} {Add_Record('NEW')} END""")
+    # Fill the summary tables for the older databases. 
+    if IsNew:
+        Rebuild_Summary_Tables(conn, cursor)
+    # Commit the changes. 
+    conn.commit()
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Create_Analysis_Tracking(conn, cursor):
+    """
+    This function creates the "Analysis_Dirty_Groups" table and the triggers on the FTIR table which add the (B-number, 
+    lab aging) group of any inserted, updated, or deleted record to this table. Then, only these groups are required to 
+    be re-analyzed in the "FTIR_Analysis_DB" table (combined results of the replicates). If the table is new (older 
+    database), all the groups are marked, as the status of the available analysis is unknown. 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'Analysis_Dirty_Groups'")
+    IsNew = cursor.fetchone() is None
+    cursor.execute("""CREATE TABLE IF NOT EXISTS Analysis_Dirty_Groups (
+                   Bnumber INTEGER, Lab_Aging TEXT, PRIMARY KEY (Bnumber, Lab_Aging))""")
+    # A group is added only if it is not already there; "IS" is used, as the primary key doesn't stop the duplicates 
+    #   of the groups with a missing B-number or lab aging (NULL values are all different for "=" and uniqueness). 
+    Mark = lambda R: f"""INSERT INTO Analysis_Dirty_Groups (Bnumber, Lab_Aging) SELECT {R}.Bnumber, {R}.Lab_Aging 
+                         WHERE NOT EXISTS (SELECT 1 FROM Analysis_Dirty_Groups 
+                                           WHERE Bnumber IS {R}.Bnumber AND Lab_Aging IS {R}.Lab_Aging);"""
+    # The triggers are always recreated, so the older databases get the latest version. 
+    cursor.execute("DROP TRIGGER IF EXISTS trg_FTIR_dirty_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_FTIR_dirty_delete")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_FTIR_dirty_update")
+    cursor.execute(f"CREATE TRIGGER trg_FTIR_dirty_insert AFTER INSERT ON FTIR BEGIN {Mark('NEW')} END")
+    cursor.execute(f"CREATE TRIGGER trg_FTIR_dirty_delete AFTER DELETE ON FTIR BEGIN {Mark('OLD')} END")
+    cursor.execute(f"CREATE TRIGGER trg_FTIR_dirty_update AFTER UPDATE ON FTIR BEGIN {Mark('OLD')} {Mark('NEW')} END")
+    if IsNew:
+        cursor.execute("""INSERT INTO Analysis_Dirty_Groups (Bnumber, Lab_Aging) 
+                       SELECT DISTINCT Bnumber, Lab_Aging FROM FTIR""")
+    else:
+        # Remove the duplicates added by the older triggers (GROUP BY puts the NULL values in the same group). 
+        cursor.execute("""DELETE FROM Analysis_Dirty_Groups WHERE rowid NOT IN (
+                       SELECT MIN(rowid) FROM Analysis_Dirty_Groups GROUP BY Bnumber, Lab_Aging)""")
+    # Commit the changes. 
+    conn.commit()
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Rebuild_Summary_Tables(conn, cursor):
+    """
+    This function recomputes all the summary tables (see "Create_Summary_Tables") from the records of the FTIR table. 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    """
+    cursor.execute("DELETE FROM Summary_Bnumber")
+    cursor.execute("DELETE FROM Summary_LabAging")
+    cursor.execute("DELETE FROM Summary_Binder")
+    cursor.execute("""INSERT INTO Summary_Bnumber (Bnumber, NumValid) SELECT Bnumber, COUNT(*) FROM FTIR 
+                   WHERE IsOutlier = 0 AND Bnumber IS NOT NULL GROUP BY Bnumber""")
+    cursor.execute("""INSERT INTO Summary_LabAging (Lab_Aging, NumValid) SELECT Lab_Aging, COUNT(*) FROM FTIR 
+                   WHERE IsOutlier = 0 AND Lab_Aging IS NOT NULL GROUP BY Lab_Aging""")
+    cursor.execute("""INSERT INTO Summary_Binder (Bnumber, Lab_Aging, NumRows) SELECT Bnumber, Lab_Aging, COUNT(*) 
+                   FROM FTIR WHERE Bnumber IS NOT NULL AND Lab_Aging IS NOT NULL GROUP BY Bnumber, Lab_Aging""")
+    # The totals (overwrite the values changed by the triggers of the group tables). 
+    cursor.execute("""INSERT OR REPLACE INTO DB_Summary 
+                   (id, NumRows, NumValidRows, NumUniqueBnumber, NumUniqueLabAging, NumUniqueBnumLabAge) 
+                   SELECT 1, (SELECT COUNT(*) FROM FTIR), (SELECT COUNT(*) FROM FTIR WHERE IsOutlier = 0), 
+                   (SELECT COUNT(*) FROM Summary_Bnumber), (SELECT COUNT(*) FROM Summary_LabAging), 
+                   (SELECT COUNT(*) FROM Summary_Binder)""")
+    # Commit the changes. 
+    conn.commit()
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Migrate_Spectra_to_Separate_Table(conn, cursor):
+    """
+    This function moves the array columns (spectra and deconvolution results) of the FTIR table in older databases to 
+    the "Spectra" table, and rebuilds the FTIR table with only the scalar columns. This way, the filtering and 
+    aggregation on the FTIR table only read the small pages. The whole migration is done in a single transaction. 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    """
+    cursor.execute("PRAGMA table_info(FTIR)")
+    TableInfo = cursor.fetchall()
+    ArrayCols = [Col[1] for Col in TableInfo if Col[1] in Spectra_Columns]
+    ScalarCols= [Col for Col in TableInfo if Col[1] not in Spectra_Columns]
+    if conn.in_transaction:
+        conn.commit()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        # Copy the arrays to the "Spectra" table. 
+        cursor.execute(f"""INSERT OR REPLACE INTO Spectra (id, {', '.join(ArrayCols)}) 
+                       SELECT id, {', '.join(ArrayCols)} FROM FTIR""")
+        # Rebuild the FTIR table with only the scalar columns (same name, type, and order). 
+        cursor.execute(f"""CREATE TABLE FTIR_Scalar ({', '.join(
+            [f"{Col[1]} {Col[2]}{' PRIMARY KEY' if Col[5] else ''}" for Col in ScalarCols])})""")
+        cursor.execute(f"""INSERT INTO FTIR_Scalar ({', '.join([Col[1] for Col in ScalarCols])}) 
+                       SELECT {', '.join([Col[1] for Col in ScalarCols])} FROM FTIR""")
+        cursor.execute("DROP TABLE FTIR")
+        cursor.execute("ALTER TABLE FTIR_Scalar RENAME TO FTIR")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_filename ON FTIR (FileName);")
+        conn.commit()
+    except:
+        conn.rollback()
+        raise
+    # Store the arrays in the compact binary format, and release the free pages of the removed arrays. 
+    Recompress_Spectra_Arrays(conn, cursor)
+    cursor.execute("VACUUM")
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Recompress_Spectra_Arrays(conn, cursor):
+    """
+    This function converts the arrays of the "Spectra" table which are saved in the older raw format to the compact 
+    binary format of the "Array_to_Binary". The conversion is always lossless (the float64 arrays are never stored as 
+    float32, regardless of the "Array_Float32" setting). 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :return: Number of the converted arrays. 
+    """
+    NumConverted = 0
+    for Col in Spectra_Array_Columns:
+        cursor.execute(f"""SELECT id, {Col}, {Col}_shape, {Col}_dtype FROM Spectra 
+                       WHERE typeof({Col}) = 'blob' AND substr({Col}, 1, 4) != ?""", (Array_Codec_Magic,))
+        Updates = []
+        for idx, Binary, StrShape, StrDtype in cursor.fetchall():
+            Updates.append(Array_to_Binary(Binary_to_Array(Binary, StrShape, StrDtype), Float32=False) + (idx,))
+        cursor.executemany(f"UPDATE Spectra SET {Col} = ?, {Col}_shape = ?, {Col}_dtype = ? WHERE id = ?", Updates)
+        NumConverted += len(Updates)
+    # Commit the changes. 
+    conn.commit()
+    # Return the results. 
+    return NumConverted
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+# List of the array columns (and their shape and dtype) which are stored in the "Spectra" table. 
+Spectra_Columns = [
+    'Wavenumber', 'Wavenumber_shape', 'Wavenumber_dtype',
+    'Absorption', 'Absorption_shape', 'Absorption_dtype',
+    'RawWavenumber', 'RawWavenumber_shape', 'RawWavenumber_dtype',
+    'RawAbsorbance', 'RawAbsorbance_shape', 'RawAbsorbance_dtype',
+    'Deconv_GaussianList',  'Deconv_GaussianList_shape',  'Deconv_GaussianList_dtype',
+    'Deconv_CarbonylList',  'Deconv_CarbonylList_shape',  'Deconv_CarbonylList_dtype',
+    'Deconv_SulfoxideList', 'Deconv_SulfoxideList_shape', 'Deconv_SulfoxideList_dtype',
+    'Deconv_AliphaticList', 'Deconv_AliphaticList_shape', 'Deconv_AliphaticList_dtype']
+# List of the columns of the FTIR table which are filled when a new record is added (all columns but "id").
+FTIR_Insert_Columns = [
+    'Bnumber', 'Lab_Aging', 'RepNumber', 'FileName', 'FileDirectory',
+    'ICO_Baseline', 'ICO_Tangential', 'ISO_Baseline', 'ISO_Tangential',
+    'Carbonyl_Area_Baseline', 'Carbonyl_Area_Tangential', 'Sulfoxide_Area_Baseline', 'Sulfoxide_Area_Tangential',
+    'Aliphatic_Area_Baseline', 'Aliphatic_Area_Tangential',
+    'Carbonyl_Peak_Wavenumber', 'Sulfoxide_Peak_Wavenumber', 'Aliphatic_Peak_Wavenumber_1', 'Aliphatic_Peak_Wavenumber_2',
+    'Carbonyl_Peak_Absorption', 'Sulfoxide_Peak_Absorption', 'Aliphatic_Peak_Absorption_1', 'Aliphatic_Peak_Absorption_2',
+    'Wavenumber', 'Wavenumber_shape', 'Wavenumber_dtype',
+    'Absorption', 'Absorption_shape', 'Absorption_dtype',
+    'RawWavenumber', 'RawWavenumber_shape', 'RawWavenumber_dtype',
+    'RawAbsorbance', 'RawAbsorbance_shape', 'RawAbsorbance_dtype',
+    'Carbonyl_Min_Wavenumber', 'Carbonyl_Max_Wavenumber',
+    'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber',
+    'Aliphatic_Min_Wavenumber', 'Aliphatic_Max_Wavenumber',
+    'Baseline_Adjustment_Method', 'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter',
+    'Normalization_Method', 'Normalization_Coeff', 'IsOutlier',
+    'Deconv_ICO', 'Deconv_ISO',
+    'Deconv_GaussianList',  'Deconv_GaussianList_shape',  'Deconv_GaussianList_dtype',
+    'Deconv_CarbonylList',  'Deconv_CarbonylList_shape',  'Deconv_CarbonylList_dtype',
+    'Deconv_SulfoxideList', 'Deconv_SulfoxideList_shape', 'Deconv_SulfoxideList_dtype',
+    'Deconv_AliphaticList', 'Deconv_AliphaticList_shape', 'Deconv_AliphaticList_dtype']
+# The columns of a new record which are stored in the FTIR table itself (all but the arrays). 
+FTIR_Scalar_Columns = [Col for Col in FTIR_Insert_Columns if Col not in Spectra_Columns]
+# The array columns of the "Spectra" table (without their shape and dtype). 
+Spectra_Array_Columns = [Col for Col in Spectra_Columns if not Col.endswith(('_shape', '_dtype'))]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
 def Append_to_Database(conn, cursor, data):
     """
     This function adds data as new row to the database. 
     """
     # Add the data using execute command. 
     # Insert data into the table
-    cursor.execute("""
-    INSERT INTO FTIR (
-        Bnumber, Lab_Aging, RepNumber, FileName, FileDirectory,
-        ICO_Baseline, ICO_Tangential, ISO_Baseline, ISO_Tangential,
-        Carbonyl_Area_Baseline, Carbonyl_Area_Tangential, Sulfoxide_Area_Baseline, Sulfoxide_Area_Tangential,
-        Aliphatic_Area_Baseline, Aliphatic_Area_Tangential,
-        Carbonyl_Peak_Wavenumber, Sulfoxide_Peak_Wavenumber, Aliphatic_Peak_Wavenumber_1, Aliphatic_Peak_Wavenumber_2,
-        Carbonyl_Peak_Absorption, Sulfoxide_Peak_Absorption, Aliphatic_Peak_Absorption_1, Aliphatic_Peak_Absorption_2,
-        Wavenumber, Wavenumber_shape, Wavenumber_dtype,
-        Absorption, Absorption_shape, Absorption_dtype,
-        RawWavenumber, RawWavenumber_shape, RawWavenumber_dtype,
-        RawAbsorbance, RawAbsorbance_shape, RawAbsorbance_dtype,
-        Carbonyl_Min_Wavenumber, Carbonyl_Max_Wavenumber,
-        Sulfoxide_Min_Wavenumber, Sulfoxide_Max_Wavenumber,
-        Aliphatic_Min_Wavenumber, Aliphatic_Max_Wavenumber,
-        Baseline_Adjustment_Method, ALS_Lambda, ALS_Ratio, ALS_NumIter,
-        Normalization_Method, Normalization_Coeff, IsOutlier, 
-        Deconv_ICO, Deconv_ISO, 
-        Deconv_GaussianList,  Deconv_GaussianList_shape,  Deconv_GaussianList_dtype,
-        Deconv_CarbonylList,  Deconv_CarbonylList_shape,  Deconv_CarbonylList_dtype, 
-        Deconv_SulfoxideList, Deconv_SulfoxideList_shape, Deconv_SulfoxideList_dtype, 
-        Deconv_AliphaticList, Deconv_AliphaticList_shape, Deconv_AliphaticList_dtype
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 
-               ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) 
-    """, (
-        data["Bnumber"], data["Lab_Aging"], data["RepNumber"], data["FileName"], data["FileDirectory"],
-        data["ICO_Baseline"], data["ICO_Tangential"], data["ISO_Baseline"], data["ISO_Tangential"],
-        data["Carbonyl_Area_Baseline"], data["Carbonyl_Area_Tangential"],
-        data["Sulfoxide_Area_Baseline"], data["Sulfoxide_Area_Tangential"],
-        data["Aliphatic_Area_Baseline"], data["Aliphatic_Area_Tangential"],
-        data["Carbonyl_Peak_Wavenumber"], data["Sulfoxide_Peak_Wavenumber"],
-        data["Aliphatic_Peak_Wavenumber_1"], data["Aliphatic_Peak_Wavenumber_2"],
-        data["Carbonyl_Peak_Absorption"], data["Sulfoxide_Peak_Absorption"],
-        data["Aliphatic_Peak_Absorption_1"], data["Aliphatic_Peak_Absorption_2"],
-        data["Wavenumber"], data["Wavenumber_shape"], data["Wavenumber_dtype"],
-        data["Absorption"], data["Absorption_shape"], data["Absorption_dtype"],
-        data["RawWavenumber"], data["RawWavenumber_shape"], data["RawWavenumber_dtype"],
-        data["RawAbsorbance"], data["RawAbsorbance_shape"], data["RawAbsorbance_dtype"],
-        data["Carbonyl_Min_Wavenumber"], data["Carbonyl_Max_Wavenumber"],
-        data["Sulfoxide_Min_Wavenumber"], data["Sulfoxide_Max_Wavenumber"],
-        data["Aliphatic_Min_Wavenumber"], data["Aliphatic_Max_Wavenumber"],
-        data["Baseline_Adjustment_Method"], data["ALS_Lambda"], data["ALS_Ratio"], data["ALS_NumIter"],
-        data["Normalization_Method"], data["Normalization_Coeff"], data["IsOutlier"], 
-        data["Deconv_ICO"], data["Deconv_ISO"],
-        data["Deconv_GaussianList"],  data["Deconv_GaussianList_shape"],  data["Deconv_GaussianList_dtype"],
-        data["Deconv_CarbonylList"],  data["Deconv_CarbonylList_shape"],  data["Deconv_CarbonylList_dtype"], 
-        data["Deconv_SulfoxideList"], data["Deconv_SulfoxideList_shape"], data["Deconv_SulfoxideList_dtype"], 
-        data["Deconv_AliphaticList"], data["Deconv_AliphaticList_shape"], data["Deconv_AliphaticList_dtype"]
-    ))
+    cursor.execute(f"""
+    INSERT INTO FTIR ({', '.join(FTIR_Scalar_Columns)}) VALUES ({', '.join(['?'] * len(FTIR_Scalar_Columns))})
+    """, tuple(data[Col] for Col in FTIR_Scalar_Columns))
+    # Insert the arrays into the "Spectra" table (or the external store) with the same "id". 
+    idx = cursor.lastrowid
+    Values = Store_Spectra_Arrays(cursor, idx, {Col: data[Col] for Col in Spectra_Columns})
+    cursor.execute(f"""
+    INSERT INTO Spectra (id, {', '.join(Spectra_Columns)}) VALUES ({', '.join(['?'] * (len(Spectra_Columns) + 1))})
+    """, (idx,) + tuple(Values[Col] for Col in Spectra_Columns))
 
     # Commit the changes. 
     conn.commit()
@@ -208,6 +500,205 @@ def Append_to_Database(conn, cursor, data):
 # ======================================================================================================================
 
 
+def Store_Spectra_Arrays(cursor, idx, Values, Sync=True):
+    """
+    This function prepares the values of the "Spectra" table columns for a record. If the database uses the external 
+    store of the spectra (see "Sub08_External_Spectra_Store"), the arrays are written to the store and their BLOBs are 
+    replaced with None (the shape and dtype columns are kept). Otherwise, the values are returned unchanged. 
+
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param idx: The "id" of the record. 
+    :param Values: A dictionary of the "Spectra" columns (binary, shape, and dtype of the arrays) and their values. 
+    :param Sync: True to sync the external store to disk after writing the arrays (for a batch of records, use False 
+    and sync the store once before the commit). 
+    :return: A dictionary of the values to be saved in the "Spectra" table. 
+    """
+    Store = Get_External_Store(cursor)
+    if Store is None:
+        return Values
+    Arrays = {Col: Binary_to_Array(Values[Col], Values[f'{Col}_shape'], Values[f'{Col}_dtype']) 
+              for Col in Spectra_Array_Columns if isinstance(Values.get(Col), bytes)}
+    Store.Write(cursor, idx, Arrays, Sync=Sync)
+    # Return the results. 
+    return {Col: (None if Col in Arrays else Value) for Col, Value in Values.items()}
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Read_Spectra_Arrays(cursor, idx, Columns):
+    """
+    This function reads the arrays of a record from the "Spectra" table, or from the external store of the spectra. 
+
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param idx: The "id" of the record. 
+    :param Columns: The list of the array columns, e.g., ['Wavenumber', 'Absorption']. 
+    :return: A list of the arrays (None for the missing arrays). 
+    """
+    Store = Get_External_Store(cursor)
+    if Store is not None:
+        # Copy the arrays from the memory map (the views of the file are read-only). 
+        return [None if Arr is None else np.array(Arr) for Arr in [Store.Read(cursor, idx, Col) for Col in Columns]]
+    cursor.execute(f"""SELECT {', '.join([f'{Col}, {Col}_shape, {Col}_dtype' for Col in Columns])} FROM Spectra 
+                   WHERE id = ?""", (idx,))
+    Row = cursor.fetchone()
+    if Row is None:
+        return [None] * len(Columns)
+    # Return the results. 
+    return [Binary_to_Array(Row[3 * j], Row[3 * j + 1], Row[3 * j + 2]) if Row[3 * j] is not None else None 
+            for j in range(len(Columns))]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+class Bulk_Database_Writer:
+    """
+    This class collects the new records (and their deconvolution diagnostics) in memory and writes them to the database 
+    in batches, where each batch is a single transaction using "executemany". The batch is written when the number of 
+    pending records reaches "Max_Rows", or when the oldest pending record is older than "Max_Interval" seconds, or when 
+    the "Flush" is called explicitly (e.g., at the end of the loop or when leaving the page). A failed batch is rolled 
+    back completely and kept in memory (the error is raised), so the database never contains a partially written batch 
+    and the batch can be written again later. Note that only the written (committed) records are safe against a crash 
+    of the application; the pending records are only in memory. 
+    """
+    def __init__(self, conn, cursor, Max_Rows=20, Max_Interval=30.0):
+        self.conn = conn                    # connection to the SQL database.
+        self.cursor = cursor                # cursor for running the SQL commands. 
+        self.Max_Rows = Max_Rows            # Maximum number of pending records before writing the batch. 
+        self.Max_Interval = Max_Interval    # Maximum age (in seconds) of the oldest pending record. 
+        self.Pending = []                   # List of the pending records as (data, diagnostics) tuples. 
+        self.FirstPendingTime = None        # Time that the oldest pending record was added. 
+    # ------------------------------------------------------------------------------------------------------------------
+    def Append(self, data, Diagnostics=None):
+        """
+        This function adds a new record to the batch. The batch should be written by "Flush_If_Due" (or "Flush"). 
+
+        :param data: A dictionary of the FTIR record (same as the "Append_to_Database" function). 
+        :param Diagnostics: A dictionary of the deconvolution diagnostics (same as "Save_Diagnostics"), or None. 
+        """
+        if len(self.Pending) == 0:
+            self.FirstPendingTime = time.monotonic()
+        self.Pending.append((data, Diagnostics))
+        # Return Nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Flush_If_Due(self):
+        """
+        This function writes the batch only if the number of pending records or the age of the batch reached the limits.
+
+        :return: Number of the written records. 
+        """
+        if len(self.Pending) == 0:
+            return 0
+        if len(self.Pending) >= self.Max_Rows or time.monotonic() - self.FirstPendingTime >= self.Max_Interval:
+            return self.Flush()
+        # Return the results. 
+        return 0
+    # ------------------------------------------------------------------------------------------------------------------
+    def Flush(self):
+        """
+        This function writes all the pending records to the database in a single transaction. The "id" of the new 
+        records are assigned explicitly (same as what SQLite does by default), so that the diagnostics of each record
+        can be saved with the same "id" in the same transaction. 
+
+        :return: Number of the written records. 
+        """
+        if len(self.Pending) == 0:
+            return 0
+        if self.conn.in_transaction:        # Close any open (implicit) transaction before starting the batch. 
+            self.conn.commit()
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM FTIR")
+            FirstID = self.cursor.fetchone()[0] + 1
+            IDs = range(FirstID, FirstID + len(self.Pending))
+            # Write the FTIR records. 
+            self.cursor.executemany(f"""
+            INSERT INTO FTIR (id, {', '.join(FTIR_Scalar_Columns)}) 
+            VALUES ({', '.join(['?'] * (len(FTIR_Scalar_Columns) + 1))})
+            """, [(idx,) + tuple(data[Col] for Col in FTIR_Scalar_Columns) 
+                  for idx, (data, _) in zip(IDs, self.Pending)])
+            self.cursor.executemany(f"""
+            INSERT INTO Spectra (id, {', '.join(Spectra_Columns)}) 
+            VALUES ({', '.join(['?'] * (len(Spectra_Columns) + 1))})
+            """, [(idx,) + tuple(Values[Col] for Col in Spectra_Columns) for idx, Values in 
+                  [(idx, Store_Spectra_Arrays(self.cursor, idx, {Col: data[Col] for Col in Spectra_Columns}, 
+                                              Sync=False)) for idx, (data, _) in zip(IDs, self.Pending)]])
+            # Write the diagnostics. 
+            self.cursor.executemany("""
+            INSERT OR REPLACE INTO FTIR_Diagnostics (
+                id, NumAttempts, NumRejected, TotalNFev, Elapsed_Time, Diagnostics, Diagnostics_shape, Diagnostics_dtype,
+                Refinement_Residual, Refinement_NumIter
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(idx, Diag["NumAttempts"], Diag["NumRejected"], Diag["TotalNFev"], Diag["Elapsed_Time"], 
+                   Diag["Diagnostics"], Diag["Diagnostics_shape"], Diag["Diagnostics_dtype"], 
+                   Diag.get("Refinement_Residual"), Diag.get("Refinement_NumIter")) 
+                  for idx, (_, Diag) in zip(IDs, self.Pending) if Diag is not None])
+            # The arrays in the external store (if any) are synced to disk once for the whole batch. 
+            Store = Get_External_Store(self.cursor)
+            if Store is not None:
+                Store.Sync()
+            self.conn.commit()
+        except:
+            # Roll back the whole batch, and keep the records in memory for the next try. 
+            self.conn.rollback()
+            raise
+        NumRows = len(self.Pending)
+        self.Pending = []
+        self.FirstPendingTime = None
+        # Return the results. 
+        return NumRows
+    # ------------------------------------------------------------------------------------------------------------------
+    def Has_Pending_Record(self, **Conditions):
+        """
+        This function checks if any of the pending records matches all the given conditions (e.g., FileName='...'). 
+        """
+        # Return the results. 
+        return any(all(data[Key] == Value for Key, Value in Conditions.items()) for data, _ in self.Pending)
+    # ------------------------------------------------------------------------------------------------------------------
+    def Get_Pending_GaussianList(self, Bnumber, LabAging):
+        """
+        This function is the same as "Get_Sibling_GaussianList", but it only searches among the pending records. 
+
+        :return: The Gaussian list (np.ndarray), or None if no replicate was found. 
+        """
+        for data, _ in reversed(self.Pending):
+            if data['Bnumber'] == Bnumber and data['Lab_Aging'] == LabAging and data['IsOutlier'] == 0 and \
+                    data['Deconv_GaussianList'] is not None:
+                return Binary_to_Array(data['Deconv_GaussianList'], data['Deconv_GaussianList_shape'], 
+                                       data['Deconv_GaussianList_dtype'])
+        # Return the results. 
+        return None
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_DB_Settings():
+    """
+    This function reads the (optional) database settings from the "Database_Settings" item of the config file, and 
+    fills the missing items with the default values. 
+
+    :return: A dictionary of the database settings. 
+    """
+    Settings = {'Bulk_Max_Rows': 20, 'Bulk_Max_Interval': 30.0, 
+                'Journal_Mode': 'WAL', 'Synchronous': 'NORMAL', 'Cache_Size_MB': 64, 'Mmap_Size_MB': 256, 
+                'Busy_Timeout': 10.0, 'External_Spectra_Store': False, 'Analysis_Engine': 'pandas', 
+                'Analysis_Chunk_Size': 5000, 'Review_Page_Size': 200, 'Array_Float32': False}
+    ConfigPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..//configs//config.json')
+    try:
+        config = json.load(open(ConfigPath, 'r'))
+        Settings.update(config.get('Database_Settings', {}))
+    except:
+        pass
+    # Return the results. 
+    return Settings
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
 def Update_Row_in_Database(conn, cursor, idx, data):
     """
     This function adds data as new row to the database. 
@@ -228,14 +719,8 @@ def Update_Row_in_Database(conn, cursor, idx, data):
          Carbonyl_Min_Wavenumber = ?, Carbonyl_Max_Wavenumber = ?,
          Sulfoxide_Min_Wavenumber = ?, Sulfoxide_Max_Wavenumber = ?,
          Aliphatic_Min_Wavenumber = ?, Aliphatic_Max_Wavenumber = ?,
-         Deconv_CarbonylList = ?, Deconv_CarbonylList_shape = ?, Deconv_CarbonylList_dtype = ?, 
-         Deconv_SulfoxideList = ?, Deconv_SulfoxideList_shape = ?, Deconv_SulfoxideList_dtype = ?, 
-         Deconv_AliphaticList = ?, Deconv_AliphaticList_shape = ?, Deconv_AliphaticList_dtype = ?, 
-         Deconv_GaussianList = ?, Deconv_GaussianList_shape = ?, Deconv_GaussianList_dtype = ?,
          Deconv_ICO = ?, Deconv_ISO = ?, 
          ALS_Lambda = ?, ALS_Ratio = ?, ALS_NumIter = ?, Normalization_Method = ?, Normalization_Coeff = ?, 
-         Wavenumber = ?, Wavenumber_shape = ?, Wavenumber_dtype = ?,
-         Absorption = ?, Absorption_shape = ?, Absorption_dtype = ?,
          IsOutlier = ? 
     WHERE id = ?
     """, (
@@ -250,17 +735,23 @@ def Update_Row_in_Database(conn, cursor, idx, data):
         data["Carbonyl_Min_Wavenumber"], data["Carbonyl_Max_Wavenumber"],
         data["Sulfoxide_Min_Wavenumber"], data["Sulfoxide_Max_Wavenumber"],
         data["Aliphatic_Min_Wavenumber"], data["Aliphatic_Max_Wavenumber"],
-        data["Decon_Carbonyl"], data["Decon_Carbonyl_shape"], data["Decon_Carbonyl_dtype"],
-        data["Decon_Sulfoxide"], data["Decon_Sulfoxide_shape"], data["Decon_Sulfoxide_dtype"],
-        data["Decon_Aliphatic"], data["Decon_Aliphatic_shape"], data["Decon_Aliphatic_dtype"], 
-        data["Decon_GaussianList"], data["Decon_GaussianList_shape"], data["Decon_GaussianList_dtype"], 
         data["Decon_ICO"], data["Decon_ISO"], 
         data["ALS_Lambda"], data["ALS_Ratio"], data["ALS_NumIter"], 
         data["Normalization_Method"], data["Normalization_Coeff"],
-        data["Wavenumber"], data["Wavenumber_shape"], data["Wavenumber_dtype"],
-        data["Absorption"], data["Absorption_shape"], data["Absorption_dtype"],
         data["IsOutlier"], idx
     ))
+    # Update the arrays in the "Spectra" table (or the external store). 
+    Values = {'Wavenumber': data["Wavenumber"], 'Absorption': data["Absorption"]}
+    for Col, Key in [('Deconv_CarbonylList', 'Decon_Carbonyl'), ('Deconv_SulfoxideList', 'Decon_Sulfoxide'), 
+                     ('Deconv_AliphaticList', 'Decon_Aliphatic'), ('Deconv_GaussianList', 'Decon_GaussianList')]:
+        Values[Col] = data[Key]
+        Values[f'{Col}_shape'], Values[f'{Col}_dtype'] = data[f'{Key}_shape'], data[f'{Key}_dtype']
+    for Col in ['Wavenumber', 'Absorption']:
+        Values[f'{Col}_shape'], Values[f'{Col}_dtype'] = data[f'{Col}_shape'], data[f'{Col}_dtype']
+    Values = Store_Spectra_Arrays(cursor, idx, Values)
+    cursor.execute(f"""
+    UPDATE Spectra SET {', '.join([f'{Col} = ?' for Col in Values])} WHERE id = ?
+    """, tuple(Values.values()) + (idx,))
 
     # Commit the changes. 
     conn.commit()
@@ -272,6 +763,66 @@ def Update_Row_in_Database(conn, cursor, idx, data):
 # ======================================================================================================================
 
 
+def Save_Diagnostics(conn, cursor, idx, data):
+    """
+    This function saves (or replaces) the deconvolution diagnostics of a record in the "FTIR_Diagnostics" table. 
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param idx: The "id" of the record in the FTIR table. 
+    :param data: A dictionary of the diagnostics summary and the binary of the diagnostics array. 
+    """
+    cursor.execute("""
+    INSERT OR REPLACE INTO FTIR_Diagnostics (
+        id, NumAttempts, NumRejected, TotalNFev, Elapsed_Time, Diagnostics, Diagnostics_shape, Diagnostics_dtype, 
+        Refinement_Residual, Refinement_NumIter
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        idx, data["NumAttempts"], data["NumRejected"], data["TotalNFev"], data["Elapsed_Time"], 
+        data["Diagnostics"], data["Diagnostics_shape"], data["Diagnostics_dtype"], 
+        data.get("Refinement_Residual"), data.get("Refinement_NumIter")
+    ))
+    # Commit the changes. 
+    conn.commit()
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Explain_Query_Plans(cursor):
+    """
+    This function reports the query plans (using "EXPLAIN QUERY PLAN") of the frequently used queries, to check if 
+    they are using the indexes (e.g., "USING COVERING INDEX ...") instead of scanning the whole FTIR table. 
+
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :return: A list of (query label, query, list of the query plan details). 
+    """
+    Queries = [
+        ('File existence check',        "SELECT EXISTS(SELECT 1 FROM FTIR WHERE FileName = ?)", ('',)),
+        ('Identifier existence check',  "SELECT EXISTS(SELECT 1 FROM FTIR WHERE Bnumber = ? AND RepNumber = ? AND " + 
+                                        "Lab_Aging = ?)", (0, 0, '')),
+        ('Fetch by B-number',           "SELECT id FROM FTIR WHERE Bnumber = ?", (0,)),
+        ('Fetch by lab aging',          "SELECT id FROM FTIR WHERE Lab_Aging = ?", ('',)),
+        ('Fetch by B-number and aging', "SELECT id FROM FTIR WHERE Bnumber = ? AND Lab_Aging = ?", (0, '')),
+        ('Review table page',           "SELECT id FROM FTIR WHERE Bnumber = ? AND Lab_Aging = ? AND id > ? " + 
+                                        "ORDER BY id LIMIT 200", (0, '', 0)),
+        ('Database summary',            "SELECT NumRows, NumValidRows FROM DB_Summary WHERE id = ?", (1,)),
+        ('Identifier combinations',     "SELECT DISTINCT Bnumber, Lab_Aging, RepNumber FROM FTIR", ()),
+        ('Sibling replicate',           "SELECT id FROM FTIR WHERE Bnumber = ? AND Lab_Aging = ? AND IsOutlier = ? " + 
+                                        "ORDER BY id DESC LIMIT 1", (0, '', 0))]
+    Results = []
+    for Label, Query, Params in Queries:
+        cursor.execute(f"EXPLAIN QUERY PLAN {Query}", Params)
+        Results.append((Label, Query, [Row[-1] for Row in cursor.fetchall()]))
+    # Return the results. 
+    return Results
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
 def Get_Info_From_Name(FileName):
     """
     This function tries to extract the B-number, sample repetition number, and lag aging levels. It is noted that the 
@@ -326,3 +877,243 @@ def Get_Identifier_Combinations(cursor):
 # ======================================================================================================================
 # ======================================================================================================================
 # ======================================================================================================================
+
+
+def Get_Sibling_GaussianList(cursor, Bnumber, LabAging):
+    """
+    This function fetch the deconvolution results (list of all Gaussians) of the latest non-outlier replicate with the 
+    same B-number and lab aging condition, which can be used as a seed for the deconvolution of the next replicates. 
+
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param Bnumber: The B-number of the binder. 
+    :param LabAging: The lab aging condition of the binder. 
+    :return: The Gaussian list (np.ndarray), or None if no replicate was found. 
+    """
+    cursor.execute("""SELECT id FROM FTIR WHERE Bnumber = ? AND Lab_Aging = ? AND IsOutlier = ? 
+                   ORDER BY id DESC""", (Bnumber, LabAging, 0))
+    for (idx,) in cursor.fetchall():
+        GaussianList = Read_Spectra_Arrays(cursor, idx, ['Deconv_GaussianList'])[0]
+        if GaussianList is not None:
+            return GaussianList
+    # Return the results. 
+    return None
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Load_Spectra_Matrix(cursor, IDs=None, Bnumber=None, Lab_Aging=None, IsOutlier=None, Raw=False):
+    """
+    This function loads the spectra of many records at once, as a single matrix (one row per record), e.g., for the 
+    chemometrics or batch re-analysis. The records are read by one streaming query, and each spectrum is decoded into 
+    a temporary array (decompressed, for the default codec of the arrays) and then copied into its row of a 
+    preallocated matrix, so only one spectrum is held besides the matrix. The X axis (wavenumbers) of the first record 
+    is used for all records; the spectra with a different X axis are linearly interpolated (NaN outside of their 
+    range). The records without the spectra (NULL arrays) are skipped. If the database uses the external store of the 
+    spectra, the arrays are gathered directly from its memory map. 
+
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param IDs: A list of the "id" values of the records to load, or None for no filter on the ids. 
+    :param Bnumber: The B-number of the binders to load, or None for all B-numbers. 
+    :param Lab_Aging: The lab aging condition to load, or None for all aging levels. 
+    :param IsOutlier: 0 or 1 to load only the valid or outlier records, or None for all records. 
+    :param Raw: True to load the raw spectra (before baseline adjustment and normalization). 
+    :return: Three variables, (i) matrix of the absorbance (M, N), (ii) the shared X axis (N,), and (iii) a DataFrame 
+    of the metadata of the records (M rows), sorted by "id". 
+    """
+    XCol, YCol = ('RawWavenumber', 'RawAbsorbance') if Raw else ('Wavenumber', 'Absorption')
+    MetaCols = ['id', 'Bnumber', 'Lab_Aging', 'RepNumber', 'IsOutlier', 'FileName']
+    Store = Get_External_Store(cursor)
+    # Prepare the filters. 
+    if Store is None:
+        Conditions, Params = [f'S.{XCol} IS NOT NULL', f'S.{YCol} IS NOT NULL'], []
+        Join = 'JOIN Spectra AS S ON S.id = F.id'
+    else:
+        Conditions, Params = [f"SX.Array = '{XCol}'", f"SY.Array = '{YCol}'"], []
+        Join = 'JOIN Spectra_Store_Index AS SX ON SX.id = F.id JOIN Spectra_Store_Index AS SY ON SY.id = F.id'
+    for Col, Value in [('Bnumber', Bnumber), ('Lab_Aging', Lab_Aging), ('IsOutlier', IsOutlier)]:
+        if Value is not None:
+            Conditions.append(f'F.{Col} = ?')
+            Params.append(Value)
+    if IDs is not None:
+        # The list of ids is passed as one JSON array (no limit on the number of ids, and nothing is written to the 
+        # database, so the transaction of the caller is not changed). 
+        Conditions.append('F.id IN (SELECT value FROM json_each(?))')
+        Params.append(json.dumps([int(idx) for idx in IDs]))
+    Where = ' AND '.join(Conditions)
+    if Store is not None:
+        # The spectra are in the external store: only the locations are fetched, and the arrays are gathered at once. 
+        cursor.execute(f"""SELECT {', '.join([f'F.{Col}' for Col in MetaCols])}, SX.Offset, SX.Length, SY.Offset, 
+                       SY.Length FROM FTIR AS F {Join} WHERE {Where} ORDER BY F.id""", Params)
+        Rows = cursor.fetchall()
+        Meta = pd.DataFrame([Row[:6] for Row in Rows], columns=MetaCols)
+        Loc = np.array([Row[6:] for Row in Rows], dtype=np.int64).reshape(-1, 4)
+        if len(Rows) == 0:
+            return np.zeros((0, 0)), np.zeros(0), Meta
+        Length = Loc[0, 1]
+        if np.all(Loc[:, [1, 3]] == Length):
+            Xs, Matrix = Store.Read_Rows(Loc[:, 0], Length), Store.Read_Rows(Loc[:, 2], Length)
+            X = np.array(Xs[0])
+            Others = np.nonzero(np.any(np.abs(Xs - X) > 1e-3, axis=1))[0]
+        else:
+            Map = Store.Get_Map(int((Loc[:, [0, 2]] + Loc[:, [1, 3]]).max()))
+            Xs = [Map[Offset:Offset + Len] for Offset, Len in Loc[:, :2]]
+            X = np.array(Xs[0])
+            Matrix = np.empty((len(Rows), len(X)), dtype=np.float64)
+            Others = []
+            for i, (Offset, Len) in enumerate(Loc[:, 2:]):
+                if Xs[i].shape == X.shape and np.allclose(Xs[i], X, rtol=0, atol=1e-3):
+                    Matrix[i] = Map[Offset:Offset + Len]
+                else:
+                    Others.append(i)
+        # Interpolate only the spectra with a different X axis. 
+        for i in Others:
+            Xi, Yi = np.asarray(Xs[i]), Store.Get_Map()[Loc[i, 2]:Loc[i, 2] + Loc[i, 3]]
+            Order = np.argsort(Xi)
+            Matrix[i] = np.interp(X, Xi[Order], Yi[Order], left=np.nan, right=np.nan)
+        # Return the results. 
+        return Matrix, X, Meta
+    # Number of the records (to preallocate the matrix). 
+    cursor.execute(f"SELECT COUNT(*) FROM FTIR AS F {Join} WHERE {Where}", Params)
+    NumRecords = cursor.fetchone()[0]
+    # Stream the records. 
+    cursor.execute(f"""SELECT {', '.join([f'F.{Col}' for Col in MetaCols])}, 
+                   S.{XCol}, S.{XCol}_shape, S.{XCol}_dtype, S.{YCol}, S.{YCol}_shape, S.{YCol}_dtype 
+                   FROM FTIR AS F {Join} WHERE {Where} ORDER BY F.id""", Params)
+    X, Matrix, Meta = np.zeros(0), np.zeros((0, 0)), []
+    for Row in cursor:
+        if len(Meta) >= NumRecords:                 # Only if records are added after counting. 
+            break
+        Xi = Binary_to_Array(Row[6], Row[7], Row[8])
+        Yi = Binary_to_Array(Row[9], Row[10], Row[11])
+        if len(Meta) == 0:
+            X = np.array(Xi, dtype=np.float64)
+            Matrix = np.empty((NumRecords, len(X)), dtype=np.float64)
+        if Xi.shape == X.shape and np.allclose(Xi, X, rtol=0, atol=1e-3):
+            Matrix[len(Meta)] = Yi
+        else:
+            Order = np.argsort(Xi)
+            Matrix[len(Meta)] = np.interp(X, Xi[Order], Yi[Order], left=np.nan, right=np.nan)
+        Meta.append(Row[:6])
+    Matrix = Matrix[:len(Meta)]
+    Meta = pd.DataFrame(Meta, columns=MetaCols)
+    # Return the results. 
+    return Matrix, X, Meta
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Iterate_Records(cursor, Columns, Arrays=(), Where='', Params=(), OrderBy='F.id', ChunkSize=1000):
+    """
+    This generator reads the records of the FTIR table in chunks (one streaming query, so the memory doesn't grow 
+    with the size of the database), e.g., for exporting the whole database. The scalar columns are read from the FTIR 
+    table, and the arrays are decoded from the "Spectra" table (or gathered from the external store of the spectra). 
+
+    :param cursor: cursor for reading the records (should not be used for anything else until the end). 
+    :param Columns: A list of the scalar columns of the FTIR table. 
+    :param Arrays: A list of the array columns, e.g., ['Wavenumber', 'Absorption']. 
+    :param Where: The optional "WHERE" clause over the FTIR table (as "F"), e.g., "WHERE F.IsOutlier = ?". 
+    :param Params: The parameters of the "WHERE" clause. 
+    :param OrderBy: The "ORDER BY" clause of the records. 
+    :param ChunkSize: Number of the records to be read in each chunk. 
+    :return: Yields two variables for each chunk, (i) a list of the rows of the scalar columns, and (ii) a list of 
+    the arrays of each record (None for the missing arrays). 
+    """
+    Store = Get_External_Store(cursor)
+    Select, Join = [f'F.{Col}' for Col in Columns], ''
+    if Store is None:
+        Join = 'LEFT JOIN Spectra AS S ON S.id = F.id' if len(Arrays) else ''
+        for Col in Arrays:
+            Select += [f'S.{Col}', f'S.{Col}_shape', f'S.{Col}_dtype']
+    else:
+        for j, Col in enumerate(Arrays):
+            Join += f" LEFT JOIN Spectra_Store_Index AS S{j} ON S{j}.id = F.id AND S{j}.Array = '{Col}'"
+            Select += [f'S{j}.Offset', f'S{j}.Length', f'S{j}.Shape']
+    cursor.execute(f"SELECT {', '.join(Select)} FROM FTIR AS F {Join} {Where} ORDER BY {OrderBy}", Params)
+    NumCols = len(Columns)
+    while True:
+        Rows = cursor.fetchmany(ChunkSize)
+        if len(Rows) == 0:
+            break
+        Values = []
+        for Row in Rows:
+            Arrs = []
+            for j in range(NumCols, NumCols + 3 * len(Arrays), 3):
+                if Row[j] is None:
+                    Arrs.append(None)
+                elif Store is None:
+                    Arrs.append(Binary_to_Array(Row[j], Row[j + 1], Row[j + 2]))
+                else:
+                    Offset, Length = Row[j], Row[j + 1]
+                    Arrs.append(np.array(Store.Get_Map(Offset + Length)[Offset:Offset + Length]).reshape(
+                        Parse_Shape(Row[j + 2])))
+            Values.append(Arrs)
+        yield [Row[:NumCols] for Row in Rows], Values
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Benchmark_Connection_Settings(Folder, NumRows=200, NumPoints=1800):
+    """
+    This function compares the write and read throughput of the database with the default SQLite3 settings and with 
+    the settings of "Connect_to_Database". The records are written one-by-one (one commit per record, same as the 
+    main page without batching), and then all the spectra are read back. For the "Default" case, the database is 
+    opened by a plain "sqlite3.connect" and switched back to the rollback journal (the WAL mode is persistent in the 
+    database file, and it is set when the tables are created), with the default "synchronous" and cache settings. 
+
+    :param Folder: A directory for the temporary benchmark databases. 
+    :param NumRows: Number of the records to write and read. 
+    :param NumPoints: Number of the data points of each spectrum. 
+    :return: A dictionary of the results (records per second) for "Default" and "Tuned" settings. 
+    """
+    # Preparing a typical record (the binary arrays are not important, only their size). 
+    Blob = bytes(8 * NumPoints)
+    Record = {Col: 0.0 for Col in FTIR_Insert_Columns}
+    Record.update({Col: Blob for Col in ['Wavenumber', 'Absorption', 'RawWavenumber', 'RawAbsorbance']})
+    Results = {}
+    for Name, Tuned in [('Default', False), ('Tuned', True)]:
+        path = os.path.join(Folder, f'Benchmark_{Name}.db')
+        for Ext in ['', '-wal', '-shm']:
+            if os.path.isfile(path + Ext):
+                os.remove(path + Ext)
+        conn, cursor = Create_SQLite3_DB_Connect(path)
+        conn.close()
+        if Tuned:
+            conn = Connect_to_Database(path)
+        else:
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode = DELETE")
+        cursor = conn.cursor()
+        # Write test. 
+        Start = time.perf_counter()
+        for i in range(NumRows):
+            Record['FileName'] = f'File_{i}.dpt'
+            Append_to_Database(conn, cursor, Record)
+        WriteTime = time.perf_counter() - Start
+        # Read test. 
+        Start = time.perf_counter()
+        cursor.execute("SELECT id, FileName, Wavenumber, Absorption FROM FTIR JOIN Spectra USING (id)")
+        NumRead = len(cursor.fetchall())
+        for i in range(NumRows):
+            cursor.execute("SELECT Absorption FROM FTIR JOIN Spectra USING (id) WHERE FileName = ?", (f'File_{i}.dpt',))
+            cursor.fetchone()
+        ReadTime = time.perf_counter() - Start
+        conn.close()
+        Results[Name] = {'Write': NumRows / WriteTime, 'Read': (NumRead + NumRows) / ReadTime}
+    # Return the results. 
+    return Results
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+if __name__ == '__main__':
+    import tempfile
+    with tempfile.TemporaryDirectory() as Folder:
+        Results = Benchmark_Connection_Settings(Folder)
+    for Name, Res in Results.items():
+        print(f'{Name:>8s}: Write = {Res["Write"]:8.1f} records/s, Read = {Res["Read"]:8.1f} records/s')
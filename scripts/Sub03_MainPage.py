@@ -14,16 +14,19 @@ from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
     QPushButton, QWidget, QGridLayout, QFormLayout, QLineEdit, QFileDialog, QMessageBox, QGroupBox, QProgressBar, \
     QPlainTextEdit, QStackedWidget, QCheckBox, QDialog, QComboBox
 from PyQt5.QtGui import QPixmap, QFont, QRegExpValidator, QIntValidator, QDoubleValidator
-from PyQt5.QtCore import Qt, QRegExp
+from PyQt5.QtCore import Qt, QRegExp, QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from scripts.Sub02_CreateNewSQLTable import Get_DB_SummaryData, Append_to_Database, Get_Info_From_Name
+from scripts.Sub02_CreateNewSQLTable import Get_DB_SummaryData, Get_Info_From_Name, Get_Sibling_GaussianList, \
+    Bulk_Database_Writer, Get_DB_Settings
 from scripts.Sub04_FTIR_Analysis_Functions import Read_FTIR_Data, Baseline_Adjustment_ALS, Normalization_Method_B, \
     Calc_Aliphatic_Area, Calc_Carbonyl_Area, Calc_Sulfoxide_Area, Array_to_Binary, Binary_to_Array, Find_Peaks, \
     Normalization_Method_A, Normalization_Method_C, Normalization_Method_D
 from scripts.Sub05_ReviewPage import DB_ReviewPage
 from scripts.Sub06_FTIR_RevisePage import Revise_FTIR_AnalysisPage
-from scripts.Sub07_Deconvolution_Analysis import Run_Deconvolution, gaussian_bell
+from scripts.Sub07_Deconvolution_Analysis import Run_Deconvolution, Get_Gaussian_Curves, Summarize_Diagnostics, \
+    Get_Deconvolution_Settings
+from scripts.Sub11_Region_Highlight import Region_Highlighter
 
 
 
@@ -66,6 +69,18 @@ class Main_Window(QMainWindow):
         self.stack.addWidget(self.FTIR_revise_page)     # This page has stack index 2. 
         # Set the stack as the central widget
         self.setCentralWidget(self.stack)
+    # ------------------------------------------------------------------------------------------------------------------
+    def closeEvent(self, event):
+        # Write the pending records before closing; if it fails, ask the user before losing them. 
+        if not self.main_page.Flush_DB_Writer():
+            Reply = QMessageBox.question(self, "Database Error!", 
+                                         f"{len(self.main_page.DB_Writer.Pending)} new records could NOT be written " + 
+                                         f"to the database (see the terminal). Do you want to close anyway and lose " + 
+                                         f"these records?", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if Reply != QMessageBox.Yes:
+                event.ignore()
+                return
+        super().closeEvent(event)
 # ======================================================================================================================
 # ======================================================================================================================
 # ======================================================================================================================
@@ -88,7 +103,16 @@ class MainPage(QMainWindow):
         self.stack = stack
         self.ShowFileExistedError = True
         self.Deconv = {}
+        self.Gaussian_Curves = {}   # Cache of the evaluated Gaussian curves of the current file. 
+        self.Seed_Gaussians = None  # Gaussians of another replicate of the same binder (seed for deconvolution).
         self.CurBinderInfo = {'Bnumber': -1, 'RepNum': -1, 'LabAging': ''}  # To share binder info between functions.
+        # Writer for adding the new records to the database in batches (periodically checked by a timer). 
+        Settings = Get_DB_Settings()
+        self.DB_Writer = Bulk_Database_Writer(conn, cursor, Max_Rows=Settings['Bulk_Max_Rows'], 
+                                              Max_Interval=Settings['Bulk_Max_Interval'])
+        self.Timer_DB_Writer = QTimer(self)
+        self.Timer_DB_Writer.timeout.connect(lambda: self.Flush_DB_Writer(Force=False))
+        self.Timer_DB_Writer.start(5000)
         self.PushButtonStyle = {
             "General": """
         QPushButton:enabled {
@@ -274,6 +298,7 @@ class MainPage(QMainWindow):
         self.fig.set_facecolor("#f0f0f0")
         self.canvas = FigureCanvas(self.fig)
         self.axes = [self.fig.add_subplot(2, 2, i + 1) for i in range(4)]
+        self.Highlighter = Region_Highlighter(self.canvas, self.axes)
         # Add the labels to the axes. 
         Titles = ['Wide Range Data', 'Carbonyl Area', 'Sulfoxide Area', 'Aliphatic Area']
         for i in range(4):
@@ -402,7 +427,8 @@ class MainPage(QMainWindow):
         layout.addLayout(RightLayout, 20)
     # ------------------------------------------------------------------------------------------------------------------
     def Sync_Summary_Info(self):
-        # Get the latest summary information. 
+        # Write the pending records, and get the latest summary information. 
+        self.Flush_DB_Writer()
         SummaryData = Get_DB_SummaryData(self.cursor)
         # Update the values. 
         self.Label_NumData.setText(f'{SummaryData["NumRows"]}')
@@ -446,12 +472,10 @@ class MainPage(QMainWindow):
                 continue
     # ------------------------------------------------------------------------------------------------------------------
     def Review_Edit_DB_Function(self):
+        self.Flush_DB_Writer()          # Write the remaining records before leaving the page. 
         self.stack.setCurrentIndex(1)  # Switch to the second page
     # ------------------------------------------------------------------------------------------------------------------
     def update_Carbonyl_min(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[1].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XC - value))
         if self.XCmaxIndx > idx + 1:
@@ -460,18 +484,11 @@ class MainPage(QMainWindow):
             idx = self.XCminIndx
         self.spinboxes[0].setValue(self.XC[idx])
         self.spinboxes[1].setRange(self.XC[self.XCminIndx + 1], 1800)
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XCminIndx, self.XCmaxIndx + 1)
-        self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.1, 
-                                  label='Carbonyl Area')
-        self.axes[1].set_xticklabels(f'{num:,.0f}' for num in self.axes[1].get_xticks())
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(1, self.XC[self.CIndex2], self.YC[self.CIndex2], color='r', label='Carbonyl Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Carbonyl_max(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[1].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XC - value))
         if self.XCminIndx < idx - 1:
@@ -480,18 +497,11 @@ class MainPage(QMainWindow):
             idx = self.XCmaxIndx
         self.spinboxes[1].setValue(self.XC[idx])
         self.spinboxes[0].setRange(1600, self.XC[self.XCmaxIndx - 1])
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XCminIndx, self.XCmaxIndx + 1)
-        self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.1, 
-                                  label='Carbonyl Area')
-        self.axes[1].set_xticklabels(f'{num:,.0f}' for num in self.axes[1].get_xticks())
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(1, self.XC[self.CIndex2], self.YC[self.CIndex2], color='r', label='Carbonyl Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Sulfoxide_min(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[2].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XS - value))
         if self.XSmaxIndx > idx + 1:
@@ -500,18 +510,11 @@ class MainPage(QMainWindow):
             idx = self.XSminIndx
         self.spinboxes[2].setValue(self.XS[idx])
         self.spinboxes[3].setRange(self.XS[self.XSminIndx + 1], 1100)
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XSminIndx, self.XSmaxIndx + 1)
-        self.axes[2].fill_between(self.XS[self.CIndex2], self.YS[self.CIndex2], 0, color='y', alpha=0.1, 
-                                  label='Sulfoxide Area')
-        self.axes[2].set_xticklabels(f'{num:,.0f}' for num in self.axes[2].get_xticks())
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(2, self.XS[self.CIndex2], self.YS[self.CIndex2], color='y', label='Sulfoxide Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Sulfoxide_max(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[2].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XS - value))
         if self.XSminIndx < idx - 1:
@@ -520,18 +523,11 @@ class MainPage(QMainWindow):
             idx = self.XSmaxIndx
         self.spinboxes[3].setValue(self.XS[idx])
         self.spinboxes[2].setRange(940, self.XS[self.XSmaxIndx - 1])
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XSminIndx, self.XSmaxIndx + 1)
-        self.axes[2].fill_between(self.XS[self.CIndex2], self.YS[self.CIndex2], 0, color='y', alpha=0.1, 
-                                  label='Sulfoxide Area')
-        self.axes[2].set_xticklabels(f'{num:,.0f}' for num in self.axes[2].get_xticks())
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(2, self.XS[self.CIndex2], self.YS[self.CIndex2], color='y', label='Sulfoxide Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Aliphatic_min(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[3].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XA - value))
         if self.XAmaxIndx > idx + 1:
@@ -540,18 +536,11 @@ class MainPage(QMainWindow):
             idx = self.XAminIndx
         self.spinboxes[4].setValue(self.XA[idx])
         self.spinboxes[5].setRange(self.XA[self.XAminIndx + 1], 1600)
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.AIndex2 = np.arange(self.XAminIndx, self.XAmaxIndx + 1)
-        self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.1, 
-                                  label='Aliphatic Area')
-        self.axes[3].set_xticklabels(f'{num:,.0f}' for num in self.axes[3].get_xticks())
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(3, self.XA[self.AIndex2], self.YA[self.AIndex2], color='g', label='Aliphatic Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Aliphatic_max(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[3].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XA - value))
         if self.XAminIndx < idx - 1:
@@ -560,13 +549,9 @@ class MainPage(QMainWindow):
             idx = self.XAmaxIndx
         self.spinboxes[5].setValue(self.XA[idx])
         self.spinboxes[4].setRange(1300, self.XA[self.XAmaxIndx - 1])
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.AIndex2 = np.arange(self.XAminIndx, self.XAmaxIndx + 1)
-        self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.1, 
-                                  label='Aliphatic Area')
-        self.axes[3].set_xticklabels(f'{num:,.0f}' for num in self.axes[3].get_xticks())
-        # Redraw the canvas.
-        self.canvas.draw()
+        self.Highlighter.Update(3, self.XA[self.AIndex2], self.YA[self.AIndex2], color='g', label='Aliphatic Area')
     # ------------------------------------------------------------------------------------------------------------------
     def SaveExit_Button_Function(self):
         # This function only saves the current progress, and exits the already started loop. 
@@ -612,15 +597,16 @@ class MainPage(QMainWindow):
         Bnumber  = self.CurBinderInfo['Bnumber']
         RepNumber= self.CurBinderInfo['RepNum']
         LabAging = self.CurBinderInfo['LabAging']
-        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X)
-        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y)
-        Xrawbinary, Xrawshape, Xrawdtype = Array_to_Binary(self.RawData[:, 0])
-        Yrawbinary, Yrawshape, Yrawdtype = Array_to_Binary(self.RawData[:, 1])
-        Gbinary, Gshape, Gdtype = Array_to_Binary(np.zeros((0, 3)))
-        Cbinary, Cshape, Cdtype = Array_to_Binary(np.zeros((0, 3)))
-        Sbinary, Sshape, Sdtype = Array_to_Binary(np.zeros((0, 3)))
-        Abinary, Ashape, Adtype = Array_to_Binary(np.zeros((0, 3)))
-        Append_to_Database(self.conn, self.cursor, {
+        Float32 = Get_DB_Settings()['Array_Float32']      # Store the arrays as float32 (see "Array_to_Binary").
+        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X, Float32=Float32)
+        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y, Float32=Float32)
+        Xrawbinary, Xrawshape, Xrawdtype = Array_to_Binary(self.RawData[:, 0], Float32=Float32)
+        Yrawbinary, Yrawshape, Yrawdtype = Array_to_Binary(self.RawData[:, 1], Float32=Float32)
+        Gbinary, Gshape, Gdtype = Array_to_Binary(np.zeros((0, 3)), Float32=Float32)
+        Cbinary, Cshape, Cdtype = Array_to_Binary(np.zeros((0, 3)), Float32=Float32)
+        Sbinary, Sshape, Sdtype = Array_to_Binary(np.zeros((0, 3)), Float32=Float32)
+        Abinary, Ashape, Adtype = Array_to_Binary(np.zeros((0, 3)), Float32=Float32)
+        self.DB_Writer.Append({
             "Bnumber": Bnumber, "Lab_Aging": LabAging, "RepNumber": RepNumber, 
             "FileName": FileName, "FileDirectory": Folder,
             "ICO_Baseline": ICO_base, "ICO_Tangential": ICO_tang,
@@ -648,7 +634,9 @@ class MainPage(QMainWindow):
             "Deconv_GaussianList" : Gbinary, "Deconv_GaussianList_shape" : Gshape, "Deconv_GaussianList_dtype" : Gdtype,
             "Deconv_CarbonylList" : Cbinary, "Deconv_CarbonylList_shape" : Cshape, "Deconv_CarbonylList_dtype" : Cdtype, 
             "Deconv_SulfoxideList": Sbinary, "Deconv_SulfoxideList_shape": Sshape, "Deconv_SulfoxideList_dtype": Sdtype, 
-            "Deconv_AliphaticList": Abinary, "Deconv_AliphaticList_shape": Ashape, "Deconv_AliphaticList_dtype": Adtype })
+            "Deconv_AliphaticList": Abinary, "Deconv_AliphaticList_shape": Ashape, "Deconv_AliphaticList_dtype": Adtype }, 
+            self.Get_Deconv_Diagnostics())
+        self.Flush_DB_Writer(Force=False)
         # --------------------------------------------------------------------------------------------------------------
         # Update the index and check for end of the process. 
         while True:
@@ -705,14 +693,15 @@ class MainPage(QMainWindow):
         Bnumber  = self.CurBinderInfo['Bnumber']
         RepNumber= self.CurBinderInfo['RepNum']
         LabAging = self.CurBinderInfo['LabAging']
-        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X)
-        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y)
-        Xrawbinary, Xrawshape, Xrawdtype = Array_to_Binary(self.RawData[:, 0])
-        Yrawbinary, Yrawshape, Yrawdtype = Array_to_Binary(self.RawData[:, 1])
-        Gbinary, Gshape, Gdtype = Array_to_Binary(self.Deconv['Gaussian_List'])
-        Cbinary, Cshape, Cdtype = Array_to_Binary(self.Deconv['Carbonyl_Gaussians'])
-        Sbinary, Sshape, Sdtype = Array_to_Binary(self.Deconv['Sulfoxide_Gaussians'])
-        Abinary, Ashape, Adtype = Array_to_Binary(self.Deconv['Aliphatic_Gaussians'])
+        Float32 = Get_DB_Settings()['Array_Float32']      # Store the arrays as float32 (see "Array_to_Binary").
+        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X, Float32=Float32)
+        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y, Float32=Float32)
+        Xrawbinary, Xrawshape, Xrawdtype = Array_to_Binary(self.RawData[:, 0], Float32=Float32)
+        Yrawbinary, Yrawshape, Yrawdtype = Array_to_Binary(self.RawData[:, 1], Float32=Float32)
+        Gbinary, Gshape, Gdtype = Array_to_Binary(self.Deconv['Gaussian_List'], Float32=Float32)
+        Cbinary, Cshape, Cdtype = Array_to_Binary(self.Deconv['Carbonyl_Gaussians'], Float32=Float32)
+        Sbinary, Sshape, Sdtype = Array_to_Binary(self.Deconv['Sulfoxide_Gaussians'], Float32=Float32)
+        Abinary, Ashape, Adtype = Array_to_Binary(self.Deconv['Aliphatic_Gaussians'], Float32=Float32)
         # Find the Aliphatic peaks.
         XPeak, YPeak, Prominence, XLeft, XRight = Find_Peaks(np.hstack((self.X.reshape(-1, 1), self.Y.reshape(-1, 1))), 
                                                              [XAmin, XAmax], 0.001)
@@ -729,7 +718,7 @@ class MainPage(QMainWindow):
             XPeak = np.array(XPeak)[MaxIndex]
             YPeak = np.array(YPeak)[MaxIndex]
         # Append the data to the database. 
-        Append_to_Database(self.conn, self.cursor, {
+        self.DB_Writer.Append({
             "Bnumber": Bnumber, "Lab_Aging": LabAging, "RepNumber": RepNumber, 
             "FileName": FileName, "FileDirectory": Folder,
             "ICO_Baseline": ICO_base, "ICO_Tangential": ICO_tang,
@@ -762,7 +751,8 @@ class MainPage(QMainWindow):
             "Deconv_CarbonylList" : Cbinary, "Deconv_CarbonylList_shape" : Cshape, "Deconv_CarbonylList_dtype" : Cdtype, 
             "Deconv_SulfoxideList": Sbinary, "Deconv_SulfoxideList_shape": Sshape, "Deconv_SulfoxideList_dtype": Sdtype, 
             "Deconv_AliphaticList": Abinary, "Deconv_AliphaticList_shape": Ashape, "Deconv_AliphaticList_dtype": Adtype            
-            })
+            }, self.Get_Deconv_Diagnostics())
+        self.Flush_DB_Writer(Force=False)
         # --------------------------------------------------------------------------------------------------------------
         # Reset the binder info. 
         self.CurBinderInfo = {'Bnumber': -1, 'RepNum': -1, 'LabAging': ''}
@@ -783,12 +773,47 @@ class MainPage(QMainWindow):
         # Return Nothing.
         return
     # ------------------------------------------------------------------------------------------------------------------
+    def Flush_DB_Writer(self, Force=True):
+        """
+        This function writes the pending records to the database (all of them, or only if the batch is due), where any 
+        error is reported in the terminal instead of being raised (this function is also called by the timer). The 
+        records of a failed batch are kept in memory, so they are written again by the next call. 
+
+        :param Force: If False, the records are only written if the batch is due (see "Flush_If_Due"). 
+        :return: True if all the due records are written, otherwise False. 
+        """
+        try:
+            self.DB_Writer.Flush() if Force else self.DB_Writer.Flush_If_Due()
+        except Exception as e:
+            self.Terminal.appendPlainText(f">>> ERROR!! {len(self.DB_Writer.Pending)} new records could NOT be " + 
+                                          f"written to the database (they are kept and will be written again " + 
+                                          f"later): {e}")
+            return False
+        # Return the results. 
+        return True
+    # ------------------------------------------------------------------------------------------------------------------
+    def Get_Deconv_Diagnostics(self):
+        """
+        This function prepares the diagnostics of the deconvolution of the current file for saving in the database. 
+
+        :return: A dictionary of the diagnostics, or None if the diagnostics are not available. 
+        """
+        if 'Diagnostics' not in self.Deconv:
+            return None
+        Float32 = Get_DB_Settings()['Array_Float32']      # Store the arrays as float32 (see "Array_to_Binary").
+        Dbinary, Dshape, Ddtype = Array_to_Binary(self.Deconv['Diagnostics'], Float32=Float32)
+        # Return the results.
+        return {**Summarize_Diagnostics(self.Deconv), 
+                "Diagnostics": Dbinary, "Diagnostics_shape": Dshape, "Diagnostics_dtype": Ddtype}
+    # ------------------------------------------------------------------------------------------------------------------
     def Check_EndofLoop(self):
         """
         This function only checks if all the required files are analyzed, and if the analysis is finished, it reactivate
         the main window. 
         """
         if self.CurrentFileIndex >= len(self.CurrentFileList):
+            # Write the remaining records to the database. 
+            self.Flush_DB_Writer()
             QMessageBox.information(self, "Success", 
                                     f"Loop over {len(self.CurrentFileList)} files has been finished!")
             # Clear the plots.
@@ -856,7 +881,8 @@ class MainPage(QMainWindow):
             # Check if the file is already exist in the database. 
             self.cursor.execute("SELECT EXISTS(SELECT 1 FROM FTIR WHERE FileName = ?)", 
                                 (os.path.basename(self.CurrentFileList[i]),))
-            exists = self.cursor.fetchone()[0]
+            exists = self.cursor.fetchone()[0] or \
+                self.DB_Writer.Has_Pending_Record(FileName=os.path.basename(self.CurrentFileList[i]))
             if exists:
                 if not self.ShowFileExistedError:
                     continue
@@ -870,7 +896,8 @@ class MainPage(QMainWindow):
             # Check the file name and binder information. 
             Bnumber, Rep, LabAging = Get_Info_From_Name(os.path.basename(self.CurrentFileList[i]))
             if Bnumber == None:
-                # Ask user for input. 
+                # Ask user for input (the pending records are written first, as the dialog checks the database). 
+                self.Flush_DB_Writer()
                 ManualDetails = Get_Details_Manually(os.path.basename(self.CurrentFileList[i]), self.conn, self.cursor)
                 if ManualDetails.exec_():
                     Bnumber, Rep, LabAging = ManualDetails.GetInputs()
@@ -954,8 +981,25 @@ class MainPage(QMainWindow):
             FlagA = True
             Aliphatic_Range = [1350, 1450]
         # --------------------------------------------------------------------------------------------------------------
+        self.Gaussian_Curves = {}       # New file, reset the cache of the Gaussian curves. 
+        # Use the Gaussians of another replicate of the same binder (if available) as the seed for deconvolution, only 
+        #   if it is enabled in the settings (see "Get_Deconvolution_Settings"). 
+        self.Seed_Gaussians, Sibling = None, None
+        if Get_Deconvolution_Settings()['Seed_From_Replicates']:
+            Sibling = self.DB_Writer.Get_Pending_GaussianList(self.CurBinderInfo['Bnumber'], 
+                                                              self.CurBinderInfo['LabAging'])
+            if Sibling is None:
+                Sibling = Get_Sibling_GaussianList(self.cursor, self.CurBinderInfo['Bnumber'], 
+                                                   self.CurBinderInfo['LabAging'])
+        if Sibling is not None:
+            try:
+                self.Seed_Gaussians = np.array(Sibling, dtype=np.float64)
+                self.Terminal.appendPlainText(f">>> Deconvolution seeded from a replicate of the same binder.")
+            except:
+                self.Seed_Gaussians = None
         # Run the deconvolution method and get the results. 
-        Deconv = Run_Deconvolution(X, Y)
+        Deconv = Run_Deconvolution(X, Y, Seed_Gaussians=self.Seed_Gaussians, 
+                                   Joint_Refinement=Get_Deconvolution_Settings()['Joint_Refinement'])
         self.Deconv = Deconv.copy()
         Carbonyl_Gaussians = Deconv['Carbonyl_Gaussians']
         Sulfoxide_Gaussians = Deconv['Sulfoxide_Gaussians']
@@ -992,16 +1036,10 @@ class MainPage(QMainWindow):
         self.axes[1].plot(data[CIndex, 0], data[CIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR Data')
         self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.2, 
                                   label='Carbonyl Area')
-        Xgaussian = np.linspace(1600, 1800, num=1000)
-        for ii in range(Carbonyl_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, Carbonyl_Gaussians[ii, 0], 
-                                                        Carbonyl_Gaussians[ii, 1], Carbonyl_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, Carbonyl_Gaussians[ii, 0], 
-                                                        Carbonyl_Gaussians[ii, 1], Carbonyl_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1600, 1800, Carbonyl_Gaussians)
+        Lines = self.axes[1].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[1].legend()
         self.axes[1].invert_xaxis()
         # For Sulfoxide plot
@@ -1017,16 +1055,10 @@ class MainPage(QMainWindow):
         self.axes[2].plot(data[SIndex, 0], data[SIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR Data')
         self.axes[2].fill_between(self.XS[self.SIndex2], self.YS[self.SIndex2], 0, color='y', alpha=0.2, 
                                   label='Sulfoxide Area')
-        Xgaussian = np.linspace(940, 1100, num=1000)
-        for ii in range(Sulfoxide_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, Sulfoxide_Gaussians[ii, 0], 
-                                                        Sulfoxide_Gaussians[ii, 1], Sulfoxide_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, Sulfoxide_Gaussians[ii, 0], 
-                                                        Sulfoxide_Gaussians[ii, 1], Sulfoxide_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 940, 1100, Sulfoxide_Gaussians)
+        Lines = self.axes[2].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[2].legend()
         self.axes[2].invert_xaxis()
         # For Aliphatic plot
@@ -1042,16 +1074,10 @@ class MainPage(QMainWindow):
         self.axes[3].plot(data[AIndex, 0], data[AIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR Data')
         self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.2, 
                                   label='Aliphatic Area')
-        Xgaussian = np.linspace(1300, 1600, num=1000)
-        for ii in range(Aliphatic_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, Aliphatic_Gaussians[ii, 0], 
-                                                        Aliphatic_Gaussians[ii, 1], Aliphatic_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, Aliphatic_Gaussians[ii, 0], 
-                                                        Aliphatic_Gaussians[ii, 1], Aliphatic_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1300, 1600, Aliphatic_Gaussians)
+        Lines = self.axes[3].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[3].legend()
         self.axes[3].invert_xaxis()
         for i in range(4):
@@ -1167,7 +1193,8 @@ class MainPage(QMainWindow):
         self.Y = Y
         # --------------------------------------------------------------------------------------------------------------
         # Re-Run the deconvolution method and get the results. 
-        Deconv = Run_Deconvolution(X, Y)
+        Deconv = Run_Deconvolution(X, Y, Seed_Gaussians=self.Seed_Gaussians, 
+                                   Joint_Refinement=Get_Deconvolution_Settings()['Joint_Refinement'])
         self.Deconv = Deconv.copy()
         Carbonyl_Gaussians = Deconv['Carbonyl_Gaussians']
         Sulfoxide_Gaussians = Deconv['Sulfoxide_Gaussians']
@@ -1195,16 +1222,10 @@ class MainPage(QMainWindow):
         self.axes[1].plot(data[CIndex, 0], data[CIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR Data')
         self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.2, 
                                   label='Carbonyl Area')
-        Xgaussian = np.linspace(1600, 1800, num=1000)
-        for ii in range(Carbonyl_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, Carbonyl_Gaussians[ii, 0], 
-                                                        Carbonyl_Gaussians[ii, 1], Carbonyl_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, Carbonyl_Gaussians[ii, 0], 
-                                                        Carbonyl_Gaussians[ii, 1], Carbonyl_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1600, 1800, Carbonyl_Gaussians)
+        Lines = self.axes[1].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[1].legend()
         self.axes[1].invert_xaxis()
         # For Sulfoxide plot
@@ -1220,16 +1241,10 @@ class MainPage(QMainWindow):
         self.axes[2].plot(data[SIndex, 0], data[SIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR Data')
         self.axes[2].fill_between(self.XS[self.SIndex2], self.YS[self.SIndex2], 0, color='y', alpha=0.2, 
                                   label='Sulfoxide Area')
-        Xgaussian = np.linspace(940, 1100, num=1000)
-        for ii in range(Sulfoxide_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, Sulfoxide_Gaussians[ii, 0], 
-                                                        Sulfoxide_Gaussians[ii, 1], Sulfoxide_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, Sulfoxide_Gaussians[ii, 0], 
-                                                        Sulfoxide_Gaussians[ii, 1], Sulfoxide_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 940, 1100, Sulfoxide_Gaussians)
+        Lines = self.axes[2].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[2].legend()
         self.axes[2].invert_xaxis()
         # For Aliphatic plot
@@ -1245,16 +1260,10 @@ class MainPage(QMainWindow):
         self.axes[3].plot(data[AIndex, 0], data[AIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR Data')
         self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.2, 
                                   label='Aliphatic Area')
-        Xgaussian = np.linspace(1300, 1600, num=1000)
-        for ii in range(Aliphatic_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, Aliphatic_Gaussians[ii, 0], 
-                                                        Aliphatic_Gaussians[ii, 1], Aliphatic_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, Aliphatic_Gaussians[ii, 0], 
-                                                        Aliphatic_Gaussians[ii, 1], Aliphatic_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1300, 1600, Aliphatic_Gaussians)
+        Lines = self.axes[3].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[3].legend()
         self.axes[3].invert_xaxis()
         for i in range(4):
@@ -8,28 +8,73 @@
 import os
 import sys
 import sqlite3
-import itertools
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Border, Side, Alignment, Font
+from openpyxl.styles import PatternFill, Border, Side, Alignment, Font, NamedStyle
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
-from openpyxl.drawing.image import Image
 from matplotlib import cm
 from matplotlib.colors import to_hex, LinearSegmentedColormap
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QGroupBox,
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTableView, QGroupBox,
                              QHBoxLayout, QVBoxLayout, QPushButton, QWidget, QMessageBox, QLabel, QFormLayout, 
-                             QComboBox, QPlainTextEdit, QInputDialog, QFileDialog)
+                             QComboBox, QPlainTextEdit, QInputDialog, QFileDialog, QDialog, QListWidget, 
+                             QListWidgetItem, QProgressDialog)
 from PyQt5.QtGui import QFont, QBrush, QColor
-from PyQt5.QtCore import Qt
-from scripts.Sub02_CreateNewSQLTable import Get_DB_SummaryData, Get_Identifier_Combinations
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from scripts.Sub02_CreateNewSQLTable import Get_DB_SummaryData, Get_Identifier_Combinations, Explain_Query_Plans, \
+    Read_Spectra_Arrays, Get_DB_Settings, Create_SQLite3_DB_Connect
 from scripts.Sub04_FTIR_Analysis_Functions import Binary_to_Array
+from scripts.Sub07_Deconvolution_Analysis import Diagnostics_Columns
+from scripts.Sub09_Federated_Databases import Get_Recent_Databases, Open_Federated_Databases, \
+    Get_Stale_Analysis_Databases
+from scripts.Sub10_Data_Export import Export_Records_Parquet, Export_Records_CSV, Get_Report_Record, \
+    Get_Report_FileName, Write_Individual_Report, Parquet_Available
 
 # Define the custom cmap for the table COV colors.
 Reds = cm.get_cmap('Reds', 256)             # Get the "reds" colormap.
 # Clip at 0.85 to prevent excessive dark red colors.
 New = Reds(np.linspace(0, 0.75, 256))
 Custom_cmap = LinearSegmentedColormap.from_list("custom_reds", New)
+# The columns of the "FTIR" table which are combined over the replicates ("FTIR_Analysis_DB"), and their labels.
+Analysis_Columns = [
+    'Deconv_ICO', 'Deconv_ISO',
+    'ICO_Baseline', 'ISO_Baseline',
+    'Carbonyl_Area_Baseline', 'Sulfoxide_Area_Baseline', 'Aliphatic_Area_Baseline',
+    'ICO_Tangential', 'ISO_Tangential', 
+    'Carbonyl_Area_Tangential', 'Sulfoxide_Area_Tangential', 'Aliphatic_Area_Tangential',
+    'Carbonyl_Peak_Wavenumber', 'Sulfoxide_Peak_Wavenumber',
+    'Aliphatic_Peak_Wavenumber_1', 'Aliphatic_Peak_Wavenumber_2',
+    'Carbonyl_Peak_Absorption', 'Sulfoxide_Peak_Absorption',
+    'Aliphatic_Peak_Absorption_1', 'Aliphatic_Peak_Absorption_2',
+    'Carbonyl_Min_Wavenumber', 'Carbonyl_Max_Wavenumber',
+    'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber',
+    'Aliphatic_Min_Wavenumber', 'Aliphatic_Max_Wavenumber']
+Analysis_Labels = [
+    'ICO (deconvolution)', 'ISO (deconvolution)', 
+    'ICO (baseline integration)', 'ISO (baseline integration)',
+    'Carbonyl Area (baseline integration)', 'Sulfoxide Area (baseline integration)',
+    'Aliphatic Area (baseline integration)',
+    'ICO (tangential integration)', 'ISO (tangential integration)',
+    'Carbonyl Area (tangential integration)', 'Sulfoxide Area (tangential integration)',
+    'Aliphatic Area (tangential integration)',
+    'Carbonyl Peak Wavenumber (cm⁻¹)', 'Sulfoxide Peak Wavenumber (cm⁻¹)',
+    'Aliphatic Peak Wavenumber 1 (cm⁻¹)', 'Aliphatic Peak Wavenumber 2 (cm⁻¹)',
+    'Carbonyl Peak Absorption', 'Sulfoxide Peak Absorption',
+    'Aliphatic Peak Absorption 1', 'Aliphatic Peak Absorption 2',
+    'Carbonyl Min Wavenumber', 'Carbonyl Max Wavenumber',
+    'Sulfoxide Min Wavenumber', 'Sulfoxide Max Wavenumber', 
+    'Aliphatic Min Wavenumber', 'Aliphatic Max Wavenumber']
+# Columns (and their labels) of the exported database of all individual records. 
+Export_Columns = [
+    'id', 'Bnumber', 'Lab_Aging', 'RepNumber', 'FileName', 'FileDirectory', 'IsOutlier',
+    'Baseline_Adjustment_Method', 'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter',
+    'Normalization_Method', 'Normalization_Coeff'] + Analysis_Columns
+Export_Labels = [
+    'DB id', 'ID-number', 'Laboratory Aging', 'Repetition Number', 'File Name', 'File Directory', 'Is Outlier?',
+    'Baseline Adjustment Method', 'ALS λ Coeff', 'ALS ρ Coeff', 'ALS Niter Coeff',
+    'Normalization Method', 'Normalization Coeff'] + Analysis_Labels
 
 
 class DB_ReviewPage(QMainWindow):
@@ -38,7 +83,7 @@ class DB_ReviewPage(QMainWindow):
     sample and revise its analysis procedure. 
     """
 
-    def __init__(self, conn, cursor, DB_Name, DB_Folder, stack, shared_data):
+    def __init__(self, conn, cursor, DB_Name, DB_Folder, stack, shared_data, Federated=False):
         # Initiate the required parameters.
         super().__init__()
         self.conn = conn            # connection to the SQL database.
@@ -47,6 +92,8 @@ class DB_ReviewPage(QMainWindow):
         self.DB_Folder = DB_Folder  # Directory at which the database is saved.
         self.stack = stack
         self.shared_data = shared_data
+        self.Federated = Federated  # Read-only review of several databases (see "Sub09_Federated_Databases").
+        self.Federated_Pages = []   # The opened federated review pages (to keep them alive).
         self.ColumnNames = ['id', 'ID-number', 'Lab Aging', 'Rep #',
                             'ICO (Decon)', 'ISO (Decon)',
                             'ICO (base)', 'ICO (tang)', 'ISO (base)', 'ISO (tang)',
@@ -96,6 +143,14 @@ class DB_ReviewPage(QMainWindow):
             'COV of Carbonyl Peak Absorption', 
             'Mean of Sulfoxide Peak Absorption', 'Std of Sulfoxide Peak Absorption', 
             'COV of Sulfoxide Peak Absorption',]
+        if self.Federated:
+            # Show the source database of each record (at the end, to keep the index of the other columns).
+            self.ColumnNames = self.ColumnNames + ['Database']
+            self.SQL_ColumnNames = self.SQL_ColumnNames + ['Source_DB']
+            self.ColumnNamesAnalysis = self.ColumnNamesAnalysis + ['Source_DB']
+            # The databases (in the order of selection), which the records are read from one after another.
+            self.cursor.execute("SELECT Source_DB FROM Federated_Databases ORDER BY rowid")
+            self.Source_DBs = [Row[0] for Row in self.cursor.fetchall()]
         self.IdentifierCombs = Get_Identifier_Combinations(self.cursor)
         self.PushButtonStyle = {
             "General": """
@@ -207,13 +262,12 @@ class DB_ReviewPage(QMainWindow):
         Section02_Layout = QVBoxLayout()
         # Adding one label to show the number of fetched data.
         self.Label_NumFetchedRows = QLabel('Number of fetched data (rows): 0')
-        # Create the table
-        self.Table = QTableWidget()
-        self.Table.setRowCount(10)
-        self.Table.setColumnCount(len(self.ColumnNames))
-        self.Table.setHorizontalHeaderLabels(self.ColumnNames)
+        # Create the table (the rows are read lazily from the database, see "Review_Table_Model").
+        self.Table = QTableView()
+        self.TableModel = Review_Table_Model(self.conn.cursor(), self.ColumnNames, self.Table)
+        self.Table.setModel(self.TableModel)
         self.Table.setSelectionBehavior(self.Table.SelectRows)
-        self.Table.setSelectionMode(self.Table.SingleSelection)
+        self.Table.setSelectionMode(self.Table.ExtendedSelection)
         # Placing the table in the window.
         Section02_Layout.addWidget(self.Label_NumFetchedRows)
         Section02_Layout.addWidget(self.Table)
@@ -276,7 +330,7 @@ class DB_ReviewPage(QMainWindow):
         self.Button_Go2Main.setSizePolicy(self.Button_Go2Main.sizePolicy().Expanding, 
                                           self.Button_Go2Main.sizePolicy().Preferred)
         # Next button for Exporting an individual record.
-        self.Button_Export_Record = QPushButton("Export Individual Record")
+        self.Button_Export_Record = QPushButton("Export Individual Record(s)")
         self.Button_Export_Record.setStyleSheet(self.PushButtonStyle['Export'])
         self.Button_Export_Record.clicked.connect(self.Function_Button_Export_Individual)
         self.Button_Export_Record.setSizePolicy(self.Button_Export_Record.sizePolicy().Expanding, 
@@ -293,18 +347,64 @@ class DB_ReviewPage(QMainWindow):
         self.Button_Export_Analysis.clicked.connect(self.Function_Button_Export_Database_Combined)
         self.Button_Export_Analysis.setSizePolicy(self.Button_Export_Analysis.sizePolicy().Expanding, 
                                                   self.Button_Export_Analysis.sizePolicy().Preferred)
+        # Next button for Exporting the database with the spectra (Parquet, for the data analysis tools).
+        self.Button_Export_Parquet = QPushButton("Export Database (Parquet)")
+        self.Button_Export_Parquet.setStyleSheet(self.PushButtonStyle['Export'])
+        self.Button_Export_Parquet.clicked.connect(self.Function_Button_Export_Parquet)
+        self.Button_Export_Parquet.setSizePolicy(self.Button_Export_Parquet.sizePolicy().Expanding, 
+                                                 self.Button_Export_Parquet.sizePolicy().Preferred)
+        if not Parquet_Available():
+            self.Button_Export_Parquet.setEnabled(False)
+            self.Button_Export_Parquet.setToolTip('The "pyarrow" library is required for the Parquet export '
+                                                  '(pip install pyarrow).')
+        # Next button for Exporting the database as the delimited text files (CSV/TSV, for archiving).
+        self.Button_Export_CSV = QPushButton("Export Database (CSV/TSV)")
+        self.Button_Export_CSV.setStyleSheet(self.PushButtonStyle['Export'])
+        self.Button_Export_CSV.clicked.connect(self.Function_Button_Export_CSV)
+        self.Button_Export_CSV.setSizePolicy(self.Button_Export_CSV.sizePolicy().Expanding, 
+                                             self.Button_Export_CSV.sizePolicy().Preferred)
         # Next button for Deleting a record.
         self.Button_Delete_Record = QPushButton("Delete Selected Record")
         self.Button_Delete_Record.setStyleSheet(self.PushButtonStyle['Delete'])
         self.Button_Delete_Record.clicked.connect(self.Function_Button_Delete_Record)
         self.Button_Delete_Record.setSizePolicy(self.Button_Delete_Record.sizePolicy().Expanding, 
                                                 self.Button_Delete_Record.sizePolicy().Preferred)
+        # Next button for viewing the deconvolution diagnostics of the selected record.
+        self.Button_Diagnostics = QPushButton("Deconvolution Diagnostics")
+        self.Button_Diagnostics.setStyleSheet(self.PushButtonStyle['General'])
+        self.Button_Diagnostics.clicked.connect(self.Function_Button_Diagnostics)
+        self.Button_Diagnostics.setSizePolicy(self.Button_Diagnostics.sizePolicy().Expanding, 
+                                              self.Button_Diagnostics.sizePolicy().Preferred)
+        # Next button for exporting the deconvolution diagnostics of all records.
+        self.Button_Export_Diagnostics = QPushButton("Export Diagnostics")
+        self.Button_Export_Diagnostics.setStyleSheet(self.PushButtonStyle['Export'])
+        self.Button_Export_Diagnostics.clicked.connect(self.Function_Button_Export_Diagnostics)
+        self.Button_Export_Diagnostics.setSizePolicy(self.Button_Export_Diagnostics.sizePolicy().Expanding, 
+                                                     self.Button_Export_Diagnostics.sizePolicy().Preferred)
+        # Next button for reporting the query plans of the database (to check the indexes).
+        self.Button_QueryPlans = QPushButton("Database Query Plans")
+        self.Button_QueryPlans.setStyleSheet(self.PushButtonStyle['General'])
+        self.Button_QueryPlans.clicked.connect(self.Function_Button_QueryPlans)
+        self.Button_QueryPlans.setSizePolicy(self.Button_QueryPlans.sizePolicy().Expanding, 
+                                             self.Button_QueryPlans.sizePolicy().Preferred)
+        # Next button for reviewing several databases together (federated, read-only).
+        self.Button_Federated = QPushButton("Compare Databases (Federated)")
+        self.Button_Federated.setStyleSheet(self.PushButtonStyle['General'])
+        self.Button_Federated.clicked.connect(self.Function_Button_Federated)
+        self.Button_Federated.setSizePolicy(self.Button_Federated.sizePolicy().Expanding, 
+                                            self.Button_Federated.sizePolicy().Preferred)
         # Placement of the buttons.
         Section04_Layout.addWidget(self.Button_Modify)
         Section04_Layout.addWidget(self.Button_Delete_Record)
         Section04_Layout.addWidget(self.Button_Export_Record)
         Section04_Layout.addWidget(self.Button_Export_Database)
         Section04_Layout.addWidget(self.Button_Export_Analysis)
+        Section04_Layout.addWidget(self.Button_Export_Parquet)
+        Section04_Layout.addWidget(self.Button_Export_CSV)
+        Section04_Layout.addWidget(self.Button_Diagnostics)
+        Section04_Layout.addWidget(self.Button_Export_Diagnostics)
+        Section04_Layout.addWidget(self.Button_QueryPlans)
+        Section04_Layout.addWidget(self.Button_Federated)
         Section04_Layout.addWidget(self.Button_Analysis)
         Section04_Layout.addWidget(self.Button_Go2Main)
         Section04.setLayout(Section04_Layout)
@@ -319,6 +419,10 @@ class DB_ReviewPage(QMainWindow):
         self.Terminal.setReadOnly(True)
         self.Terminal.setStyleSheet("background-color: black; color: white;")
         self.Terminal.appendPlainText(">>> Review_Database_Results()\n")
+        if self.Federated:
+            self.cursor.execute("SELECT Source_DB, Path FROM Federated_Databases ORDER BY Alias")
+            self.Terminal.appendPlainText(">>> Federated (read-only) review of the databases:\n" + 
+                                          "\n".join([f">>>\t{Name}: {path}" for Name, path in self.cursor.fetchall()]))
         Section05_Layout.addWidget(self.Terminal)
         Section05.setLayout(Section05_Layout)
         RightLayout.addWidget(Section05, 45)
@@ -326,6 +430,8 @@ class DB_ReviewPage(QMainWindow):
         # Final placement of the right and left layouts.
         layout.addLayout(LeftLayout, 70)
         layout.addLayout(RightLayout, 30)
+        if self.Federated:
+            self.Set_ReadOnly_Buttons()
     # ------------------------------------------------------------------------------------------------------------------
     def ShowEvent(self, event):
         # Update the identifier combinations.
@@ -352,10 +458,7 @@ class DB_ReviewPage(QMainWindow):
         # First, empty the table.
         self.Table.clearSelection()
         self.Label_NumFetchedRows.setText('Number of fetched data (rows): 0')
-        self.Table.setRowCount(10)
-        for row_idx in range(10):
-            for col_idx in range(len(self.ColumnNames)):
-                self.Table.setItem(row_idx, col_idx, QTableWidgetItem(''))
+        self.TableModel.Clear()
         # Determine the state of the LabAging dropdown menu.
         if self.DropDown_Bnumber.currentIndex() == 0:
             # "Please select..." is selected.
@@ -386,10 +489,7 @@ class DB_ReviewPage(QMainWindow):
         # Empty the table.
         self.Table.clearSelection()
         self.Label_NumFetchedRows.setText('Number of fetched data (rows): 0')
-        self.Table.setRowCount(10)
-        for row_idx in range(10):
-            for col_idx in range(len(self.ColumnNames)):
-                self.Table.setItem(row_idx, col_idx, QTableWidgetItem(''))
+        self.TableModel.Clear()
     # ------------------------------------------------------------------------------------------------------------------
     def Function_Button_Fetch(self):
         # First, read the filters.
@@ -400,34 +500,21 @@ class DB_ReviewPage(QMainWindow):
             return
         elif self.DropDown_Bnumber.currentIndex() == 1:         # For all binders.
             if self.DropDown_LabAging.currentIndex() == 0:    # For all aging levels.
-                self.cursor.execute(
-                    f"SELECT {', '.join(self.SQL_ColumnNames)} FROM FTIR")
+                Where, Params = '', ()
             else:
-                self.cursor.execute(f"SELECT {', '.join(self.SQL_ColumnNames)} FROM FTIR WHERE Lab_Aging = ?",
-                                    (LabAging,))
+                Where, Params = 'Lab_Aging = ?', (LabAging,)
         else:       # For a specific binder.
             if self.DropDown_LabAging.currentIndex() == 0:    # for all aging levels.
-                self.cursor.execute(f"SELECT {', '.join(self.SQL_ColumnNames)} FROM FTIR WHERE Bnumber = ?",
-                                    (Bnumber,))
+                Where, Params = 'Bnumber = ?', (Bnumber,)
             else:
-                self.cursor.execute(f"SELECT {', '.join(self.SQL_ColumnNames)} FROM FTIR " +
-                                    f"WHERE Bnumber = ? AND Lab_Aging = ?", (Bnumber, LabAging))
-        # Get the rows.
-        Rows = self.cursor.fetchall()
-        # Modify the table with the row value
+                Where, Params = 'Bnumber = ? AND Lab_Aging = ?', (Bnumber, LabAging)
+        # Set the query of the table (only the first page is read; the rest are read while scrolling).
+        NumRows = self.TableModel.Set_Query(self.ColumnNames, self.SQL_ColumnNames, 'FTIR', Where, Params, Keys=['id'],
+                                            Partition=('Source_DB', self.Source_DBs) if self.Federated else None)
         self.Label_NumFetchedRows.setText(
-            f'Number of fetched data (rows): {len(Rows)}')
-        self.Table.setRowCount(len(Rows))
-        for row_idx, row_data in enumerate(Rows):
-            for col_idx, cell_data in enumerate(row_data):
-                if type(cell_data) == float:
-                    item = QTableWidgetItem(f'{cell_data:.4f}')
-                else:
-                    item = QTableWidgetItem(str(cell_data))
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                self.Table.setItem(row_idx, col_idx, item)
+            f'Number of fetched data (rows): {NumRows}')
         # Print the selection to the terminal.
-        Msg = f'>>> "{len(Rows)}" rows found in the Database, for:\n>>>\tBnumber: {Bnumber}\n>>>\tAging: {LabAging}'
+        Msg = f'>>> "{NumRows}" rows found in the Database, for:\n>>>\tBnumber: {Bnumber}\n>>>\tAging: {LabAging}'
         self.Terminal.appendPlainText(Msg)
     # ------------------------------------------------------------------------------------------------------------------
     def Function_Button_Go2Main(self):
@@ -438,10 +525,7 @@ class DB_ReviewPage(QMainWindow):
         self.Table.clearSelection()
         self.DropDown_Bnumber.setCurrentIndex(0)
         self.DropDown_LabAging.setCurrentIndex(0)
-        self.Table.setRowCount(10)
-        for row_idx in range(10):
-            for col_idx in range(len(self.ColumnNames)):
-                self.Table.setItem(row_idx, col_idx, QTableWidgetItem(''))
+        self.TableModel.Clear()
         # Move to the main page.
         self.stack.setCurrentIndex(0)
     # ------------------------------------------------------------------------------------------------------------------
@@ -458,7 +542,11 @@ class DB_ReviewPage(QMainWindow):
         # First check which view needed to be shown.
         if self.Button_Analysis.text() == "Analysis Results Page":
             # First of all, check if the analysis is available or user may want to rerun the analysis.
-            self.Rerun_Database_Analysis()
+            if self.Federated:
+                if not self.Check_Federated_Analysis():
+                    return
+            else:
+                self.Rerun_Database_Analysis()
             # Prepare the page.
             self.DropDown_Bnumber.setEnabled(False)
             self.DropDown_Bnumber.setCurrentIndex(0)
@@ -473,32 +561,12 @@ class DB_ReviewPage(QMainWindow):
             self.Button_Go2Main.setEnabled(False)
             self.Terminal.appendPlainText(
                 f"\n>>> Moving to the Analysis of Results view.")
-            # Get the results from the DB.
-            self.cursor.execute(
-                f"SELECT {', '.join([f'[{col}]' for col in self.ColumnNamesAnalysis])} FROM FTIR_Analysis_DB")
-            Rows = self.cursor.fetchall()
-            # Clear the table.
-            self.Table.clearContents()
+            # Show the analysis results from the DB (sorted by ID-number; the COV columns are colored).
             self.Table.clearSelection()
-            self.Table.setColumnCount(len(self.ColumnNamesAnalysis))
-            self.Table.setHorizontalHeaderLabels(self.ColumnNamesAnalysis)
-            self.Table.setRowCount(len(Rows))
-            # Fill the table with the new analysis results.
-            for row_idx, row_data in enumerate(Rows):
-                for col_idx, cell_data in enumerate(row_data):
-                    if col_idx in [5, 8, 11, 14, 17, 20, 23, 26, 29, 32, 35, 38]:
-                        try:
-                            item = QTableWidgetItem(f'{cell_data*100:.1f}%')
-                            ColorNumber = Get_Color_4_COV(cell_data)
-                            item.setBackground(QBrush(QColor(ColorNumber)))
-                        except:
-                            item = QTableWidgetItem('None')
-                    elif type(cell_data) == float:
-                        item = QTableWidgetItem(f'{cell_data:.4f}')
-                    else:
-                        item = QTableWidgetItem(str(cell_data))
-                    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
-                    self.Table.setItem(row_idx, col_idx, item)
+            Keys = ["IFNULL([ID-number], '')", "IFNULL([Laboratory Aging], '')"]
+            self.TableModel.Set_Query(self.ColumnNamesAnalysis, [f'[{col}]' for col in self.ColumnNamesAnalysis],
+                                      'FTIR_Analysis_DB', Keys=Keys + (['Source_DB'] if self.Federated else []),
+                                      Percent_Columns=[5, 8, 11, 14, 17, 20, 23, 26, 29, 32, 35, 38])
             # Change the text on the button.
             self.Button_Analysis.setText('Database Page')
         else:
@@ -512,13 +580,12 @@ class DB_ReviewPage(QMainWindow):
             self.Button_Export_Analysis.setEnabled(True)
             self.Button_Go2Main.setEnabled(True)
             self.Button_Fetch.setEnabled(True)
+            if self.Federated:
+                self.Set_ReadOnly_Buttons()
             self.Terminal.appendPlainText(f"\n>>> Moving to the DB view.")
             # Clear the table.
-            self.Table.clearContents()
             self.Table.clearSelection()
-            self.Table.setColumnCount(len(self.ColumnNames))
-            self.Table.setHorizontalHeaderLabels(self.ColumnNames)
-            self.Table.setRowCount(10)
+            self.TableModel.Clear(self.ColumnNames)
             # change the name.
             self.Button_Analysis.setText('Analysis Results Page')
     # ------------------------------------------------------------------------------------------------------------------
@@ -549,9 +616,9 @@ class DB_ReviewPage(QMainWindow):
         #     return
         # else:
         #     ID = int(ID.text())
-        Bnumber = self.Table.item(idx, 1).text()
-        LabAging= self.Table.item(idx, 2).text()
-        RepNum  = self.Table.item(idx, 3).text()
+        Bnumber = self.TableModel.data(self.TableModel.index(idx, 1))
+        LabAging= self.TableModel.data(self.TableModel.index(idx, 2))
+        RepNum  = self.TableModel.data(self.TableModel.index(idx, 3))
         Msg  = f'Do you want to Permanently Delete the following record?:\n' + \
                 f'ID-number={Bnumber} at age level of "{LabAging}", Rep {RepNum}'
         Question = QMessageBox()
@@ -566,6 +633,8 @@ class DB_ReviewPage(QMainWindow):
             # User Choose Yes.
             # deleting the record from the Database.
             self.cursor.execute("DELETE FROM FTIR WHERE id = ?", (ID,))
+            self.cursor.execute("DELETE FROM FTIR_Diagnostics WHERE id = ?", (ID,))
+            self.cursor.execute("DELETE FROM Spectra WHERE id = ?", (ID,))
             self.conn.commit()
             # Updating the table. 
             self.Function_Button_Fetch()
@@ -603,85 +672,15 @@ class DB_ReviewPage(QMainWindow):
             return
         # --------------------------------------------------------------------------------------------------------------
         # Define the exporting columns and their corresponding labels.
-        ColNames = [
-            'id', 'Bnumber', 'Lab_Aging', 'RepNumber', 'FileName', 'FileDirectory', 'IsOutlier',
-            'Baseline_Adjustment_Method', 'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter',
-            'Normalization_Method', 'Normalization_Coeff',
-            'Deconv_ICO', 'Deconv_ISO',
-            'ICO_Baseline', 'ISO_Baseline',
-            'Carbonyl_Area_Baseline', 'Sulfoxide_Area_Baseline', 'Aliphatic_Area_Baseline',
-            'ICO_Tangential', 'ISO_Tangential', 
-            'Carbonyl_Area_Tangential', 'Sulfoxide_Area_Tangential', 'Aliphatic_Area_Tangential',
-            'Carbonyl_Peak_Wavenumber', 'Sulfoxide_Peak_Wavenumber',
-            'Aliphatic_Peak_Wavenumber_1', 'Aliphatic_Peak_Wavenumber_2',
-            'Carbonyl_Peak_Absorption', 'Sulfoxide_Peak_Absorption',
-            'Aliphatic_Peak_Absorption_1', 'Aliphatic_Peak_Absorption_2',
-            'Carbonyl_Min_Wavenumber', 'Carbonyl_Max_Wavenumber',
-            'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber',
-            'Aliphatic_Min_Wavenumber', 'Aliphatic_Max_Wavenumber']
-        Labels = [
-            'DB id', 'ID-number', 'Laboratory Aging', 'Repetition Number', 'File Name', 'File Directory', 'Is Outlier?',
-            'Baseline Adjustment Method', 'ALS λ Coeff', 'ALS ρ Coeff', 'ALS Niter Coeff',
-            'Normalization Method', 'Normalization Coeff',
-            'ICO (deconvolution)', 'ISO (deconvolution)', 
-            'ICO (baseline integration)', 'ISO (baseline integration)',
-            'Carbonyl Area (baseline integration)', 'Sulfoxide Area (baseline integration)',
-            'Aliphatic Area (baseline integration)',
-            'ICO (tangential integration)', 'ISO (tangential integration)',
-            'Carbonyl Area (tangential integration)', 'Sulfoxide Area (tangential integration)',
-            'Aliphatic Area (tangential integration)',
-            'Carbonyl Peak Wavenumber (cm⁻¹)', 'Sulfoxide Peak Wavenumber (cm⁻¹)',
-            'Aliphatic Peak Wavenumber 1 (cm⁻¹)', 'Aliphatic Peak Wavenumber 2 (cm⁻¹)',
-            'Carbonyl Peak Absorption', 'Sulfoxide Peak Absorption',
-            'Aliphatic Peak Absorption 1', 'Aliphatic Peak Absorption 2',
-            'Carbonyl Min Wavenumber', 'Carbonyl Max Wavenumber',
-            'Sulfoxide Min Wavenumber', 'Sulfoxide Max Wavenumber', 
-            'Aliphatic Min Wavenumber', 'Aliphatic Max Wavenumber']
+        ColNames, Labels = list(Export_Columns), list(Export_Labels)
+        if self.Federated:
+            ColNames.append('Source_DB')
+            Labels.append('Database')
         # --------------------------------------------------------------------------------------------------------------
-        # Fetch data from Database. 
+        # Fetch data from Database, and write it to the Excel file (the records are streamed in chunks). 
         self.cursor.execute(f"SELECT {','.join(ColNames)} FROM FTIR")
-        Content = self.cursor.fetchall()
-        # --------------------------------------------------------------------------------------------------------------
-        # Prepare the output file. 
-        # Create a new workbook and select the active sheet
-        wb = Workbook()
-        ws = wb.active
-        # Set the title of the sheet
-        ws.title = "Sheet1"
-        # Define some styles. 
-        Title_fill      = PatternFill(start_color="FFE989", end_color="FFCC00", fill_type="solid")
-        Valid_fill      = PatternFill(start_color="D4FEC2", end_color="D4FEC2", fill_type="solid")
-        Invalid_fill    = PatternFill(start_color="FDBBBB", end_color="FDBBBB", fill_type="solid")
-        Data_fill       = PatternFill(start_color="DFDED9", end_color="DFDED9", fill_type="solid")
-        thin            = Side(border_style="thin", color="000000")
-        cell_border     = Border(top=thin, left=thin, right=thin, bottom=thin)
-        header_font     = Font(name="Arial", bold=True, size=11, color="000000")
-        cell_font       = Font(name="Arial", size=11, color="000000")
-        center_alignment= Alignment(horizontal="center", vertical="center")
-        # Write the titles. 
-        for j, col in enumerate(Labels, start=1):
-            cell = ws.cell(row=1, column=j, value=col)
-            cell.fill = Title_fill
-            cell.border = cell_border
-            cell.font = header_font
-            cell.alignment = center_alignment
-        # Write the data. 
-        for i in range(len(Content)):
-            Fill = Invalid_fill if Content[i][6] else Valid_fill
-            for j, Value in enumerate(Content[i], start=1):
-                cell = ws.cell(row=2 + i, column=j, value=Value)
-                cell.fill = Fill
-                cell.border = cell_border
-                cell.font = cell_font
-                cell.alignment = center_alignment
-        # Adjust the size of each column in the final excel file. 
-        for j, col in enumerate(Labels, start=1):
-            col_letter = get_column_letter(j)
-            # Estimate width: character count + padding (2 to 5 is typical)
-            max_label_length = len(str(col)) + 2
-            ws.column_dimensions[col_letter].width = max_label_length
-        # Save the results. 
-        wb.save(os.path.join(Directory, FileName))
+        Export_Records_Excel(self.cursor, Labels, os.path.join(Directory, FileName), 
+                             ChunkSize=Get_DB_Settings()['Analysis_Chunk_Size'])
         # Return nothing. 
         return
     # ------------------------------------------------------------------------------------------------------------------
@@ -691,7 +690,11 @@ class DB_ReviewPage(QMainWindow):
         same samples. 
         """
         # First, running the combined analysis, if user prefferred to do so. 
-        self.Rerun_Database_Analysis()
+        if self.Federated:
+            if not self.Check_Federated_Analysis():
+                return
+        else:
+            self.Rerun_Database_Analysis()
         # Ask for a directory to save the file and file name. 
         Directory = QFileDialog.getExistingDirectory(self, "Please select Saving Directory", "")
         # If a file is selected by the user, update the Input_SavePath.
@@ -711,44 +714,98 @@ class DB_ReviewPage(QMainWindow):
                                  f"Output file name was NOT confirmed. Please try again.")
             return
         # Retrieve the analysis from the database. 
-        self.cursor.execute("SELECT * FROM FTIR_Analysis_DB")
+        self.cursor.execute("SELECT * FROM FTIR_Analysis_DB ORDER BY [ID-number]")
         Content = self.cursor.fetchall()
         self.cursor.execute("PRAGMA Table_Info(FTIR_Analysis_DB)")
         ColNames = [column[1] for column in self.cursor.fetchall()]
         # Save the results into the Excel file. 
         # Do the same as other export options using openpyxl library. But for the sake of time, I'll do it more simply. 
-        Res = pd.read_sql("SELECT * FROM FTIR_Analysis_DB", self.conn)
+        Res = pd.read_sql("SELECT * FROM FTIR_Analysis_DB ORDER BY [ID-number]", self.conn)
         Res.to_excel(os.path.join(Directory, FileName), index=False)
     # ------------------------------------------------------------------------------------------------------------------
+    def Function_Button_Export_Parquet(self):
+        """
+        This function exports all records of the database, including the spectra and the list of the Gaussians, to a 
+        Parquet file (see "Export_Records_Parquet"), which can be read directly by the data analysis tools. 
+        """
+        # Ask for the path of the output file. 
+        FilePath, _ = QFileDialog.getSaveFileName(self, "Save Parquet File", f'{self.DB_Name}_Export.parquet', 
+                                                  "Parquet Files (*.parquet)")
+        if not FilePath:
+            QMessageBox.critical(self, "Output File Failed!", f"Output file was NOT selected. Please try again.")
+            return
+        # Export the records. 
+        try:
+            NumRecords = Export_Records_Parquet(self.conn.cursor(), FilePath, 
+                                                BatchSize=Get_DB_Settings()['Analysis_Chunk_Size'])
+        except Exception as e:
+            QMessageBox.critical(self, "Parquet Export Failed!", str(e))
+            return
+        self.Terminal.appendPlainText(f'>>> {NumRecords} records (with the spectra) were exported to:\n' + 
+                                      f'>>>\t{FilePath}\n>>>')
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Function_Button_Export_CSV(self):
+        """
+        This function exports all records of the database to a delimited text file (CSV or TSV, optionally gzip 
+        compressed), and optionally the spectra to another file in the long format (see "Export_Records_CSV"). 
+        """
+        # Ask for the path of the output file (the format is based on the selected extension). 
+        FilePath, _ = QFileDialog.getSaveFileName(
+            self, "Save Delimited Text File", f'{self.DB_Name}_Export.csv', 
+            "CSV Files (*.csv);;TSV Files (*.tsv);;Compressed CSV Files (*.csv.gz);;Compressed TSV Files (*.tsv.gz)")
+        if not FilePath:
+            QMessageBox.critical(self, "Output File Failed!", f"Output file was NOT selected. Please try again.")
+            return
+        # Ask whether the spectra should be exported too (next to the output file, with the same format). 
+        SpectraPath = None
+        Reply = QMessageBox.question(self, "Export Spectra", "Do you also want to export the spectra (long format: " + 
+                                     "id, wavenumber, absorbance) to a separate file?", 
+                                     QMessageBox.Yes | QMessageBox.No)
+        if Reply == QMessageBox.Yes:
+            Ext = [Ext for Ext in ['.csv.gz', '.tsv.gz', '.csv', '.tsv', ''] if FilePath.lower().endswith(Ext)][0]
+            SpectraPath = FilePath[:len(FilePath) - len(Ext)] + '_Spectra' + Ext
+        # Export the records. 
+        try:
+            NumRecords, NumPoints = Export_Records_CSV(self.conn.cursor(), FilePath, SpectraPath, 
+                                                       ChunkSize=Get_DB_Settings()['Analysis_Chunk_Size'])
+        except Exception as e:
+            QMessageBox.critical(self, "Export Failed!", str(e))
+            return
+        Msg = f'>>> {NumRecords} records were exported to:\n>>>\t{FilePath}\n'
+        if SpectraPath is not None:
+            Msg += f'>>> {NumPoints} data points of the spectra were exported to:\n>>>\t{SpectraPath}\n'
+        self.Terminal.appendPlainText(Msg + '>>>')
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
     def Function_Button_Export_Individual(self):
         """
-        This function exports the raw and analyzed results of the selected individual record as an Excel file. 
+        This function exports the raw and analyzed results of the selected individual records, each as an Excel file 
+        (see "Write_Individual_Report"). If no row is selected, all fetched records (current filter) are exported. For 
+        a single record, the file name is asked; otherwise, the files are named after the raw data files, and they are 
+        generated in parallel (see "Export_Individual_Reports"). 
         """
-        # Find the selected index. 
-        idx, ID = self.Check_Row_Selection(ActionLabel='export')
-        if (ID == -1) or (idx == -1):
+        # Find the selected rows (or all fetched rows, including the ones which are not shown yet). 
+        Rows = sorted(set([Index.row() for Index in self.Table.selectionModel().selectedIndexes()]))
+        if len(Rows) == 0:
+            IDs = self.TableModel.Get_Column_Values(0)
+            if len(IDs) > 1:
+                Reply = QMessageBox.question(self, "Export Individual Records", 
+                                             f"No row is selected. Do you want to export all {len(IDs)} fetched " + 
+                                             f"records (current filter)?", QMessageBox.Yes | QMessageBox.No)
+                if Reply != QMessageBox.Yes:
+                    return
+        else:
+            IDs = [self.TableModel.Get_Value(idx, 0) for idx in Rows]
+        IDs = [int(ID) for ID in IDs if ID is not None]
+        if len(IDs) == 0:
+            QMessageBox.critical(self, "Data Selection Error!", 
+                                 f'No record is available. Please first fetch the data using the "Search and ' + 
+                                 f'Filter" section, then select the intended rows to export, and then click the ' + 
+                                 f'corresponding button.')
             return
-        # SelectedIndices = self.Table.selectionModel().selectedIndexes()
-        # if len(SelectedIndices) == 0:           
-        #     # Nothing is selected. 
-        #     QMessageBox.critical(self, "Data Selection Error!", 
-        #                                 f"Row was not selected. Please first select the row you want to export " + 
-        #                                 f"from the database.")
-        #     self.Export_ProgressBar.hide()
-        #     return
-        # idx = SelectedIndices[0].row()
-        # # Check the id value. 
-        # ID = self.Table.item(idx, 0)
-        # if ID == None or ID.text() == '':
-        #     # Table is empty. 
-        #     QMessageBox.critical(self, "Data Selection Error!", 
-        #                                 f"Selected row ({idx + 1}) is empty. Please first fetch the data using the " +
-        #                                 f'"Search and Filter" section, then select the intended row, and then click ' +
-        #                                 f'"Export (Individual Record)" button.')
-        #     self.Export_ProgressBar.hide()
-        #     return
-        # # Otherwise, everything is ready for exporting. 
-        # ID = int(ID.text())             # The ID to retrieve the data from the DB. 
         # --------------------------------------------------------------------------------------------------------------
         # Ask for a directory to save the file and file name. 
         Directory = QFileDialog.getExistingDirectory(self, "Please select Saving Directory", "")
@@ -757,11 +814,14 @@ class DB_ReviewPage(QMainWindow):
             QMessageBox.critical(self, "Directory Selection Failed!", f"Directory was NOT selected. Please try again.")
             return
         print(f'Saving Directory: {Directory}')
+        if len(IDs) > 1:
+            self.Export_Individual_Reports(IDs, Directory)
+            return
         # Ask for the file name. 
-        self.cursor.execute("SELECT FileName FROM FTIR WHERE id = ?", (ID,))
+        Record = Get_Report_Record(self.cursor, IDs[0])
         FileName, IsOkButtonPressed = QInputDialog.getText(
             self, "Output File Name", "Please enter the output file name (without .xlsx):", 
-            text=os.path.splitext(self.cursor.fetchone()[0])[0])
+            text=os.path.splitext(Get_Report_FileName(Record, set()))[0])
         if IsOkButtonPressed:
             FileName = FileName + '.xlsx'
             print(f"Saving File Name: {FileName}")
@@ -769,279 +829,242 @@ class DB_ReviewPage(QMainWindow):
             QMessageBox.critical(self, "Output File Name Failed!", 
                                  f"Output file name was NOT confirmed. Please try again.")
             return
-        # --------------------------------------------------------------------------------------------------------------
-        # Prepare the output file. 
-        # Create a new workbook and select the active sheet
-        wb = Workbook()
-        ws = wb.active
-        # Set the title of the sheet
-        ws.title = "Sheet1"
-        # Define some styles. 
-        Info_fill       = PatternFill(start_color="FFE989", end_color="FFCC00", fill_type="solid")
-        Pre_fill        = PatternFill(start_color="A7E2FF", end_color="A7E2FF", fill_type="solid")
-        Res_fill        = PatternFill(start_color="D4FEC2", end_color="D4FEC2", fill_type="solid")
-        GL_fill         = PatternFill(start_color="FDBBBB", end_color="FDBBBB", fill_type="solid")
-        Data_fill       = PatternFill(start_color="DFDED9", end_color="DFDED9", fill_type="solid")
-        thin            = Side(border_style="thin", color="000000")
-        cell_border     = Border(top=thin, left=thin, right=thin, bottom=thin)
-        header_font     = Font(name="Arial", bold=True, size=11, color="000000")
-        cell_font       = Font(name="Arial", size=11, color="000000")
-        center_alignment= Alignment(horizontal="center", vertical="center")
-        left_alignment  = Alignment(horizontal="left", vertical="center")
-        # ----------------------------------------------------------------------------
-        # Extract the General information parameters. 
-        ColNames_Info = ['Bnumber', 'Lab_Aging', 'RepNumber', 'FileName',  'FileDirectory', 
-                        'IsOutlier']
-        Labels_Info   = ['B-number', 'Lab aging level', 'Repetition number', 'Raw data file name', 'Raw data file directory', 
-                        'Is this test considered Outlier']
-        self.cursor.execute(f'SELECT {", ".join(ColNames_Info)} FROM FTIR WHERE id = ?', (ID,))
-        Values_Info = list(self.cursor.fetchone())
-        # Make isOutlier yes/no.
-        Values_Info[5] = 'Yes' if Values_Info[5] else "No"
-        # ------------------------------------------------------
-        # Write the General information. 
-        ws.merge_cells('A1:B1')
-        cell = ws.cell(row=1, column=1, value='General Information')
-        cell.fill = Info_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        for i, (header, value) in enumerate(zip(Labels_Info, Values_Info), start=2):
-            # Write the title.
-            cell1 = ws.cell(row=i, column=1, value=header + ':')
-            cell1.fill = Info_fill
-            cell1.border = cell_border
-            cell1.font = header_font
-            cell1.alignment = left_alignment
-            # Write the value. 
-            cell1 = ws.cell(row=i, column=2, value=value)
-            cell1.fill = Info_fill
-            cell1.border = cell_border
-            cell1.font = cell_font
-            cell1.alignment = left_alignment
-        NextRowIndex = i + 2
-        # ----------------------------------------------------------------------------------------------------------------------
-        # Next, write the Pre-processing properties. 
-        # Extract the results. 
-        ColNames_Pre = ['Baseline_Adjustment_Method', 'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter', 
-                        'Normalization_Method', 'Normalization_Coeff']
-        Labels_Pre = ['Baseline adjustment method', 'ALSS λ coefficient', 'ALSS ρ coefficient', 'ALSS n coefficient', 
-                    'Normalization method', 'Normalization β coefficient']
-        self.cursor.execute(f'SELECT {", ".join(ColNames_Pre)} FROM FTIR WHERE id = ?', (ID,))
-        Values_Pre = list(self.cursor.fetchone())
-        # ------------------------------------------------------
-        # Write the General information. 
-        ws.merge_cells(f'A{NextRowIndex}:B{NextRowIndex}')
-        cell = ws.cell(row=NextRowIndex, column=1, value='Pre-processing Properties')
-        cell.fill = Pre_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        for i in range(1, 9):
-            for j in range(2):
-                cell1 = ws.cell(row=NextRowIndex+i, column=j+1, value='')
-                cell1.fill = Pre_fill
-        # Put the image. 
-        Image_Obj = Read_Resize_Image(ResourcePath(os.path.join(".", "assets", "ALSS Baseline Correction.png")), 153)
-        ws.add_image(Image_Obj, f"A{NextRowIndex+1}")
-        NextRowIndex += 9
-        # Write the 2PP model parameters. 
-        for i, (header, value) in enumerate(zip(Labels_Pre, Values_Pre), start=NextRowIndex):
-            # Write the title.
-            cell1 = ws.cell(row=i, column=1, value=header + ':')
-            cell1.fill = Pre_fill
-            cell1.border = cell_border
-            cell1.font = header_font
-            cell1.alignment = left_alignment
-            # Write the value. 
-            cell1 = ws.cell(row=i, column=2, value=value)
-            cell1.fill = Pre_fill
-            cell1.border = cell_border
-            cell1.font = cell_font
-            cell1.alignment = left_alignment
-        NextRowIndex = i + 2
-        # ----------------------------------------------------------------------------------------------------------------------
-        # Next, provide the results. 
-        # Extract the results. 
-        ColNames_Res = [
-            'Deconv_ICO', 'Deconv_ISO', 
-            'ICO_Baseline', 'ISO_Baseline', 'ICO_Tangential', 'ISO_Tangential',
-            'Carbonyl_Area_Baseline', 'Sulfoxide_Area_Baseline', 'Aliphatic_Area_Baseline', 
-            'Carbonyl_Area_Tangential', 'Sulfoxide_Area_Tangential', 'Aliphatic_Area_Tangential',
-            'Carbonyl_Peak_Wavenumber', 'Sulfoxide_Peak_Wavenumber', 
-            'Aliphatic_Peak_Wavenumber_1', 'Aliphatic_Peak_Wavenumber_2',
-            'Carbonyl_Peak_Absorption', 'Sulfoxide_Peak_Absorption', 
-            'Aliphatic_Peak_Absorption_1', 'Aliphatic_Peak_Absorption_2',
-            'Carbonyl_Min_Wavenumber', 'Carbonyl_Max_Wavenumber', 
-            'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber', 
-            'Aliphatic_Min_Wavenumber', 'Aliphatic_Max_Wavenumber',]
-        Labels_Res = [
-            'ICO (deconvolution)', 'ISO (deconvolution)', 
-            'ICO (baseline integration)', 'ISO (baseline integration)', 
-            'ICO (tangential integration)', 'ISO (tangential integration)', 
-            'Carbonyl area (baseline integration)', 
-            'Sulfoxide area (baseline integration)', 
-            'Aliphatic area (baseline integration)', 
-            'Carbonyl area (tangential integration)', 
-            'Sulfoxide area (tangential integration)', 
-            'Aliphatic area (tangential integration)', 
-            'Carbonyl peak location (cm⁻¹)', 'Sulfoxide peak location (cm⁻¹)', 
-            'First Aliphatic peak location (cm⁻¹)', 'Second aliphatic peak location (cm⁻¹)',
-            'Carbonyl peak absorbance', 'Sulfoxide peak absorbance', 
-            'First Aliphatic peak absorbance', 'Second aliphatic peak absorbance', 
-            'Carbonyl peak min boundary (cm⁻¹)', 'Carbonyl peak max boundary (cm⁻¹)', 
-            'Sulfoxide peak min boundary (cm⁻¹)', 'Sulfoxide peak max boundary (cm⁻¹)', 
-            'Aliphatic peak min boundary (cm⁻¹)', 'Aliphatic peak max boundary (cm⁻¹)',]
-        self.cursor.execute(f'SELECT {", ".join(ColNames_Res)} FROM FTIR WHERE id = ?', (ID,))
-        Values_Res = list(self.cursor.fetchone())
-        # ------------------------------------------------------
-        # Write the General information. 
-        ws.merge_cells(f'A{NextRowIndex}:B{NextRowIndex}')
-        cell = ws.cell(row=NextRowIndex, column=1, value='Results')
-        cell.fill = Res_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        NextRowIndex += 1
-        # Write the Results. 
-        for i, (header, value) in enumerate(zip(Labels_Res, Values_Res), start=NextRowIndex):
-            # Write the title.
-            cell1 = ws.cell(row=i, column=1, value=header + ':')
-            cell1.fill = Res_fill
-            cell1.border = cell_border
-            cell1.font = header_font
-            cell1.alignment = left_alignment
-            # Write the value. 
-            cell1 = ws.cell(row=i, column=2, value=value)
-            cell1.fill = Res_fill
-            cell1.border = cell_border
-            cell1.font = cell_font
-            cell1.alignment = left_alignment
-        NextRowIndex = i + 2
-        # ----------------------------------------------------------------------------------------------------------------------
-        # Next, provide the deconvolution gaussians. 
-        # Get the Gaussian lists. 
-        ColNames = [ 
-            'Deconv_GaussianList', 'Deconv_GaussianList_shape', 'Deconv_GaussianList_dtype', 
-            'Deconv_CarbonylList', 'Deconv_CarbonylList_shape', 'Deconv_CarbonylList_dtype', 
-            'Deconv_SulfoxideList', 'Deconv_SulfoxideList_shape', 'Deconv_SulfoxideList_dtype', 
-            'Deconv_AliphaticList', 'Deconv_AliphaticList_shape', 'Deconv_AliphaticList_dtype']
-        self.cursor.execute(f'SELECT {", ".join(ColNames)} FROM FTIR WHERE id = ?', (ID,))
-        Content = list(self.cursor.fetchone())
-        Gaussians = Binary_to_Array(Content[0], Content[1],  Content[2])
-        GL_C      = Binary_to_Array(Content[3], Content[4],  Content[5])
-        GL_S      = Binary_to_Array(Content[6], Content[7],  Content[8])
-        GL_A      = Binary_to_Array(Content[9], Content[10], Content[11])
-        # ------------------------------------------------------
-        # Write the title. 
-        ws.merge_cells(f'D1:H1')
-        cell = ws.cell(row=1, column=4, value='Deconvolution Results')
-        cell.fill = GL_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        for i in range(2, 9):
-            for j in range(5):
-                cell1 = ws.cell(row=i, column=j+4, value='')
-                cell1.fill = GL_fill
-        # Put the image. 
-        Image_Obj = Read_Resize_Image(ResourcePath(os.path.join(".", "assets", "Deconcolution Gaussian.png")), 125)
-        ws.add_image(Image_Obj, "E2")
-        NextRowIndex = 8
-        Titles = ['Number', 'μ (cm⁻¹)', 'σ (cm⁻¹)', 'α', 'Area']
-        for j in range(5):
-            # Write the title.
-            cell1 = ws.cell(row=NextRowIndex + 1, column=j + 4, value=Titles[j])
-            cell1.fill = GL_fill
-            cell1.border = cell_border
-            cell1.font = header_font
-            cell1.alignment = center_alignment
-        for i in range(Gaussians.shape[0]):
-            Values = [i + 1, Gaussians[i, 0], abs(Gaussians[i, 1]), Gaussians[i, 2], 
-                    np.abs(np.sqrt(2 * np.pi) * Gaussians[i, 2] * Gaussians[i, 1])]
-            NumberFormat = ["0", "0.00", "0.0000", "0.000000", "0.0000"]
-            for j in range(5):
-                # Write the title.
-                cell1 = ws.cell(row=i + NextRowIndex + 2, column=j + 4, value=Values[j])
-                cell1.fill = GL_fill
-                cell1.border = cell_border
-                cell1.font = cell_font
-                cell1.alignment = center_alignment
-                cell1.number_format = NumberFormat[j]
-        NextRowIndex = i + 2
-        # ----------------------------------------------------------------------------------------------------------------------
-        # Finally, Provide the raw data. 
-        # Extract the raw data. 
-        ColNames = [ 
-            'Wavenumber', 'Wavenumber_shape', 'Wavenumber_dtype', 
-            'Absorption', 'Absorption_shape', 'Absorption_dtype', 
-            'RawWavenumber', 'RawWavenumber_shape', 'RawWavenumber_dtype', 
-            'RawAbsorbance', 'RawAbsorbance_shape', 'RawAbsorbance_dtype',]
-        self.cursor.execute(f'SELECT {", ".join(ColNames)} FROM FTIR WHERE id = ?', (ID,))
-        Content = list(self.cursor.fetchone())
-        X_BC = Binary_to_Array(Content[0], Content[1],  Content[2])     # Preprocessed: wavenumbers (cm⁻¹). 
-        Y_BC = Binary_to_Array(Content[3], Content[4],  Content[5])     # Preprocessed: absorbance. 
-        Xraw = Binary_to_Array(Content[6], Content[7],  Content[8])     # Raw data: wavenumbers (cm⁻¹). 
-        Yraw = Binary_to_Array(Content[9], Content[10], Content[11])    # Raw data: absorbance.
-        # ------------------------------------------------------
-        # Write the title. 
-        ws.merge_cells(f'J1:M1')
-        cell = ws.cell(row=1, column=10, value='FTIR Test Data')
-        cell.fill = Data_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        ws.merge_cells(f'J2:K2')
-        cell = ws.cell(row=2, column=10, value='Raw Data')
-        cell.fill = Data_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        ws.merge_cells(f'L2:M2')
-        cell = ws.cell(row=2, column=12, value='Pre-Processed')
-        cell.fill = Data_fill
-        cell.border = cell_border
-        cell.font = Font(name="Arial", size=13, bold=True, color="000000")
-        cell.alignment = center_alignment
-        Titles = ['Wavenumber (cm⁻¹)', 'Absorbance', 'Wavenumber (cm⁻¹)', 'Absorbance',]
-        for j in range(4):
-            # Write the title.
-            cell1 = ws.cell(row=3, column=j + 10, value=Titles[j])
-            cell1.fill = Data_fill
-            cell1.border = cell_border
-            cell1.font = header_font
-            cell1.alignment = center_alignment
-        for i in range(len(Xraw)):
-            Values = [Xraw[i], Yraw[i], X_BC[i], Y_BC[i]]
-            NumberFormat = ["0.00", "0.0000", "0.00", "0.0000"]
-            for j in range(4):
-                # Write the title.
-                cell1 = ws.cell(row=i + 4, column=j + 10, value=Values[j])
-                cell1.fill = Data_fill
-                cell1.border = cell_border
-                cell1.font = cell_font
-                cell1.alignment = center_alignment
-                cell1.number_format = NumberFormat[j]
-        # --------------------------------------------------------------------------------------------------------------
-        # Adjust the column dimensions. 
-        ws.column_dimensions["A"].width = 40
-        ws.column_dimensions["B"].width = 30
-        ws.column_dimensions["C"].width = 8
-        ws.column_dimensions["D"].width = 12
-        ws.column_dimensions["E"].width = 12
-        ws.column_dimensions["F"].width = 13
-        ws.column_dimensions["G"].width = 13
-        ws.column_dimensions["H"].width = 13
-        ws.column_dimensions["I"].width = 8
-        ws.column_dimensions["J"].width = 21
-        ws.column_dimensions["K"].width = 15
-        ws.column_dimensions["L"].width = 21
-        ws.column_dimensions["M"].width = 15
         # Save the Excel file. 
-        wb.save(os.path.join(Directory, FileName))
+        Write_Individual_Report(Record, os.path.join(Directory, FileName), Get_Report_Images())
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Export_Individual_Reports(self, IDs, Directory):
+        """
+        This function exports the reports of many individual records in parallel. The records are read one by one (a 
+        single query for each record), and the Excel files are generated in a pool of processes, where only a few 
+        records are waiting in the pool at a time (bounded memory). The progress is shown, and the export can be 
+        canceled (the files which are already being generated are completed). 
+
+        :param IDs: A list of the "id" values of the records. 
+        :param Directory: The directory to save the files. 
+        """
+        Progress = QProgressDialog("Exporting the individual records...", "Cancel", 0, len(IDs), self)
+        Progress.setWindowTitle("Export Individual Records")
+        Progress.setWindowModality(Qt.WindowModal)
+        Progress.setMinimumDuration(0)
+        Progress.setValue(0)
+        NumWorkers = max(1, min(len(IDs), (os.cpu_count() or 2) - 1))
+        Images, UsedNames, Failed, NumDone = Get_Report_Images(), set(), [], 0
+        Remaining, Pending = list(reversed(IDs)), {}
+        Pool = ProcessPoolExecutor(max_workers=NumWorkers)
+        try:
+            while not Progress.wasCanceled():
+                # Keep the pool busy. 
+                while len(Remaining) and len(Pending) < 2 * NumWorkers:
+                    ID = Remaining.pop()
+                    Record = Get_Report_Record(self.cursor, ID)
+                    if Record is None:
+                        Failed.append((ID, 'Record is not found.'))
+                        NumDone += 1
+                        continue
+                    FilePath = os.path.join(Directory, Get_Report_FileName(Record, UsedNames))
+                    Pending[Pool.submit(Write_Individual_Report, Record, FilePath, Images)] = ID
+                if len(Pending) == 0:
+                    break
+                # Wait for the next finished file (the GUI is kept responsive). 
+                Finished, _ = wait(list(Pending), timeout=0.1, return_when=FIRST_COMPLETED)
+                for Future in Finished:
+                    ID = Pending.pop(Future)
+                    if Future.exception() is not None:
+                        Failed.append((ID, str(Future.exception())))
+                    NumDone += 1
+                Progress.setValue(NumDone)
+                QApplication.processEvents()
+        finally:
+            Canceled = Progress.wasCanceled()
+            for Future in Pending:
+                Future.cancel()
+            Pool.shutdown(wait=True)
+            # The files which were already being generated are completed. 
+            for Future, ID in Pending.items():
+                if not Future.cancelled():
+                    if Future.exception() is not None:
+                        Failed.append((ID, str(Future.exception())))
+                    NumDone += 1
+            Progress.close()
+        # Print the message to the output terminal. 
+        Msg = f'>>> {NumDone - len(Failed)} individual records were exported to:\n>>>\t{Directory}\n'
+        if Canceled:
+            Msg += f'>>> Export was canceled ({len(IDs) - NumDone} records were not exported).\n'
+        for ID, Error in Failed:
+            Msg += f'>>> Failed to export the record (id={ID}): {Error}\n'
+        self.Terminal.appendPlainText(Msg)
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Function_Button_Diagnostics(self):
+        """
+        This function shows the diagnostics of the deconvolution (each Gaussian fitting attempt) for the selected record 
+        in the terminal. 
+        """
+        # Find the selected index. 
+        idx, ID = self.Check_Row_Selection(ActionLabel='view the diagnostics')
+        if (ID == -1) or (idx == -1):
+            return
+        # Retrieve the diagnostics from the database. 
+        self.cursor.execute("""SELECT NumAttempts, NumRejected, TotalNFev, Elapsed_Time, 
+                            Diagnostics, Diagnostics_shape, Diagnostics_dtype, Refinement_Residual, 
+                            Refinement_NumIter FROM FTIR_Diagnostics WHERE id = ?""", 
+                            (ID,))
+        row = self.cursor.fetchone()
+        if row is None:
+            self.Terminal.appendPlainText(f'>>> No deconvolution diagnostics is available for record id={ID}.\n>>>')
+            return
+        Diagnostics = Binary_to_Array(row[4], row[5], row[6])
+        # Print out the results in Terminal. 
+        Msg = f'>>> Deconvolution diagnostics of record id={ID}:\n' + \
+              f'>>>\tAttempts: {row[0]}, Rejected: {row[1]}, Total nfev: {row[2]}, Time: {row[3] * 1000:.1f} ms\n' + \
+              (f'>>>\tJoint refinement: RMS residual = {row[7]:.6f}, Iterations: {row[8]}\n' if row[7] is not None 
+               else f'>>>\tJoint refinement: not performed\n') + \
+              f'>>>\t{"Mu":>8s} {"Trials":>6s} {"nfev":>5s} {"Sigma0":>8s} {"Acc.":>4s} ' + \
+              f'{"ResMax0":>8s} {"ResMax1":>8s} {"ms":>6s}\n'
+        for Rec in Diagnostics:
+            Msg += f'>>>\t{Rec[0]:8.1f} {Rec[1]:6.0f} {Rec[2]:5.0f} {Rec[3]:8.2f} {Rec[4]:4.0f} ' + \
+                   f'{Rec[5]:8.4f} {Rec[6]:8.4f} {Rec[7] * 1000:6.2f}\n'
+        self.Terminal.appendPlainText(Msg + '>>>')
         # Return nothing. 
         return
     # ------------------------------------------------------------------------------------------------------------------
+    def Function_Button_QueryPlans(self):
+        """
+        This function shows the query plans of the frequently used queries in the terminal. 
+        """
+        Msg = f'>>> Query plans of the frequently used queries:\n'
+        for Label, Query, Plan in Explain_Query_Plans(self.cursor):
+            Msg += f'>>>\t{Label}: {Query}\n'
+            for Detail in Plan:
+                Msg += f'>>>\t\t{Detail}\n'
+        self.Terminal.appendPlainText(Msg + '>>>')
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Function_Button_Export_Diagnostics(self):
+        """
+        This function exports the deconvolution diagnostics of all records in an Excel file, including a summary sheet 
+        (sorted by the elapsed time, to find the pathological inputs) and a sheet of all Gaussian fitting attempts. 
+        """
+        # Ask for a directory to save the file and file name. 
+        Directory = QFileDialog.getExistingDirectory(self, "Please select Saving Directory", "")
+        # If a file is selected by the user, update the Input_SavePath.
+        if not Directory:
+            QMessageBox.critical(self, "Directory Selection Failed!", f"Directory was NOT selected. Please try again.")
+            return
+        print(f'Saving Directory: {Directory}')
+        # Ask for the file name. 
+        FileName, IsOkButtonPressed = QInputDialog.getText(
+            self, "Output File Name", "Please enter the output file name (without .xlsx):", 
+            text=f'{self.DB_Name}_Diagnostics')
+        if IsOkButtonPressed:
+            FileName = FileName + '.xlsx'
+            print(f"Saving File Name: {FileName}")
+        else:
+            QMessageBox.critical(self, "Output File Name Failed!", 
+                                 f"Output file name was NOT confirmed. Please try again.")
+            return
+        # Retrieve the summary of the diagnostics from the database. 
+        Summary = pd.read_sql("""SELECT F.id, F.Bnumber, F.Lab_Aging, F.RepNumber, F.FileName, 
+                              D.NumAttempts, D.NumRejected, D.TotalNFev, D.Elapsed_Time, 
+                              D.Refinement_Residual, D.Refinement_NumIter 
+                              FROM FTIR_Diagnostics AS D JOIN FTIR AS F ON F.id = D.id 
+                              ORDER BY D.Elapsed_Time DESC""", self.conn)
+        # Retrieve the diagnostics of all attempts. 
+        Attempts = []
+        self.cursor.execute("SELECT id, Diagnostics, Diagnostics_shape, Diagnostics_dtype FROM FTIR_Diagnostics")
+        for row in self.cursor.fetchall():
+            df = pd.DataFrame(Binary_to_Array(row[1], row[2], row[3]).reshape(-1, len(Diagnostics_Columns)), 
+                              columns=Diagnostics_Columns)
+            df.insert(0, 'id', row[0])
+            Attempts.append(df)
+        if len(Attempts) > 0:
+            Attempts = pd.concat(Attempts, ignore_index=True)
+        else:
+            Attempts = pd.DataFrame(columns=['id'] + Diagnostics_Columns)
+        # Save the results into the Excel file. 
+        with pd.ExcelWriter(os.path.join(Directory, FileName)) as Writer:
+            Summary.to_excel(Writer, sheet_name='Summary', index=False)
+            Attempts.to_excel(Writer, sheet_name='Attempts', index=False)
+        self.Terminal.appendPlainText(f'>>> Diagnostics of {len(Summary)} records were exported to:\n' + 
+                                      f'>>>\t{os.path.join(Directory, FileName)}\n>>>')
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Function_Button_Federated(self):
+        """
+        This function opens a new (read-only) review page for several databases together, which are selected from the 
+        recent databases. The records, summary, and the analysis results of all selected databases are shown together 
+        (see "Sub09_Federated_Databases"), e.g., to compare the binders of different projects. 
+        """
+        RecentDBs = Get_Recent_Databases()
+        CurrentDB = os.path.abspath(os.path.join(self.DB_Folder, self.DB_Name + '.db'))
+        if CurrentDB not in [os.path.abspath(path) for path in RecentDBs]:
+            RecentDBs = [CurrentDB] + RecentDBs
+        Dialog = Select_Federated_Databases(RecentDBs, CurrentDB)
+        if not Dialog.exec_():
+            return
+        Paths = Dialog.GetInputs()
+        if len(Paths) < 2:
+            QMessageBox.critical(self, "Database Selection Error!", 
+                                 f"Please select at least two databases to review together.")
+            return
+        try:
+            conn, cursor = Open_Federated_Databases(Paths)
+        except Exception as e:
+            QMessageBox.critical(self, "Federated Database Error!", f"Databases couldn't be opened together:\n{e}")
+            return
+        Page = DB_ReviewPage(conn, cursor, 'Federated', self.DB_Folder, None, self.shared_data, Federated=True)
+        Page.setWindowTitle(f"AutoFTIR (version 1.0) | Federated review of {len(Paths)} databases (read-only)")
+        Page.resize(1250, 900)
+        Page.show()
+        self.Federated_Pages.append(Page)
+        self.Terminal.appendPlainText(f">>> Federated review of {len(Paths)} databases is opened.")
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Set_ReadOnly_Buttons(self):
+        """
+        This function disables the buttons which are not available in the federated (read-only) review: changing 
+        the records, and the options which need the arrays (spectra and diagnostics) of the records. 
+        """
+        for Button in [self.Button_Modify, self.Button_Delete_Record, self.Button_Export_Record, 
+                       self.Button_Export_Parquet, self.Button_Export_CSV, self.Button_Diagnostics, 
+                       self.Button_Export_Diagnostics, self.Button_Go2Main, self.Button_Federated]:
+            Button.setEnabled(False)
+        # Return nothing. 
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Check_Federated_Analysis(self):
+        """
+        This function checks the analysis results in the federated review. The analysis can't be updated here 
+        (read-only), so the user is informed about the databases with missing or outdated analysis. 
+
+        :return: True if the analysis results of at least one database is available. 
+        """
+        Stale = Get_Stale_Analysis_Databases(self.cursor)
+        if len(Stale):
+            self.Terminal.appendPlainText(
+                f">>> Analysis results are missing or outdated for: {', '.join(Stale)}\n" + 
+                f">>>\tOpen each of these databases and go to the analysis page to update its results.")
+        self.cursor.execute("SELECT name FROM sqlite_temp_master WHERE type = 'view' AND name = 'FTIR_Analysis_DB'")
+        if self.cursor.fetchone() is None:
+            QMessageBox.critical(self, "Analysis Results Error!", 
+                                 f"None of the selected databases has the analysis results. Please open each " + 
+                                 f"database and go to the analysis page to calculate its results.")
+            return False
+        # Return the results. 
+        return True
+    # ------------------------------------------------------------------------------------------------------------------
+    def closeEvent(self, event):
+        # Close the connection of the federated review (the main connection is closed by the main window). 
+        if self.Federated:
+            self.conn.close()
+        super().closeEvent(event)
+    # ------------------------------------------------------------------------------------------------------------------
     def Check_Row_Selection(self, ActionLabel):
         """
         This function checks if a row from the table is selected and have valid data in it. Then, it will return the 
@@ -1055,10 +1078,16 @@ class DB_ReviewPage(QMainWindow):
                                  f"Row was not selected. Please first select the row you want to {ActionLabel} " + 
                                  f"from the database.")
             return -1, -1
+        if len(set([Index.row() for Index in SelectedIndices])) > 1:
+            # More than one row is selected. 
+            QMessageBox.critical(self, "Data Selection Error!", 
+                                 f"More than one row is selected. Please select only the row you want to " + 
+                                 f"{ActionLabel}.")
+            return -1, -1
         idx = SelectedIndices[0].row()
         # Check the id value. 
-        ID = self.Table.item(idx, 0)
-        if ID == None or ID.text() == '':
+        ID = self.TableModel.Get_Value(idx, 0)
+        if ID == None:
             # Table is empty. 
             QMessageBox.critical(self, "Data Selection Error!",
                                  f"Selected row ({idx + 1}) is empty. Please first fetch the data using the " +
@@ -1067,122 +1096,260 @@ class DB_ReviewPage(QMainWindow):
             return -1, -1
         else:
             # Return the row index and database "id" value correspond to the selected row. 
-            return idx, int(ID.text())
+            return idx, int(ID)
     # ------------------------------------------------------------------------------------------------------------------
-    def Rerun_Database_Analysis(self):
+    def Rerun_Database_Analysis(self, Full=False):
         """
-        This function first asks user if the analysis for combining the results should be re-run and do the analysis if 
-        neccessary. Then, it will overwrite the results in the database. 
+        This function updates the analysis for combining the results of the replicates ("FTIR_Analysis_DB" table), 
+        using the engine selected in the database settings (see "Update_Analysis_Table"). Only the (B-number, lab 
+        aging) groups which their records are changed since the last analysis are re-analyzed, unless "Full" is True. 
         """
-        # First, check if the combined result table is available in the SQL database. 
-        self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        TableNames = [name[0] for name in self.cursor.fetchall()]
-        if 'FTIR_Analysis_DB' in TableNames:
-            # Analysis is available. Ask the user to re-run or not. 
-            Msg  = f'Do you want to update the analysis for aggregation of the available FTIR results?'
-            Question = QMessageBox()
-            Question.setIcon(QMessageBox.Question)
-            Question.setWindowTitle("Re-Run Analysis Confirmation")
-            Question.setText(Msg)
-            Question.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
-            Question.setDefaultButton(QMessageBox.Yes)
-            Reply = Question.exec_()
-            if Reply == QMessageBox.Yes:
-                pass
-            else:
-                return
-        # If user decided to re-run the analysis. 
-        # Now, get the latest values of the required parameters from the database. 
-        Column2Fetch = [            
-            'id', 'Bnumber', 'Lab_Aging', 'RepNumber', 'IsOutlier',
-            'Deconv_ICO', 'Deconv_ISO',
-            'ICO_Baseline', 'ISO_Baseline',
-            'Carbonyl_Area_Baseline', 'Sulfoxide_Area_Baseline', 'Aliphatic_Area_Baseline',
-            'ICO_Tangential', 'ISO_Tangential', 
-            'Carbonyl_Area_Tangential', 'Sulfoxide_Area_Tangential', 'Aliphatic_Area_Tangential',
-            'Carbonyl_Peak_Wavenumber', 'Sulfoxide_Peak_Wavenumber',
-            'Aliphatic_Peak_Wavenumber_1', 'Aliphatic_Peak_Wavenumber_2',
-            'Carbonyl_Peak_Absorption', 'Sulfoxide_Peak_Absorption',
-            'Aliphatic_Peak_Absorption_1', 'Aliphatic_Peak_Absorption_2',
-            'Carbonyl_Min_Wavenumber', 'Carbonyl_Max_Wavenumber',
-            'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber',
-            'Aliphatic_Min_Wavenumber', 'Aliphatic_Max_Wavenumber']
-        Labels = [
-            'DB id', 'ID-number', 'Laboratory Aging', 'Repetition Number', 'Is Outlier?',
-            'ICO (deconvolution)', 'ISO (deconvolution)', 
-            'ICO (baseline integration)', 'ISO (baseline integration)',
-            'Carbonyl Area (baseline integration)', 'Sulfoxide Area (baseline integration)',
-            'Aliphatic Area (baseline integration)',
-            'ICO (tangential integration)', 'ISO (tangential integration)',
-            'Carbonyl Area (tangential integration)', 'Sulfoxide Area (tangential integration)',
-            'Aliphatic Area (tangential integration)',
-            'Carbonyl Peak Wavenumber (cm⁻¹)', 'Sulfoxide Peak Wavenumber (cm⁻¹)',
-            'Aliphatic Peak Wavenumber 1 (cm⁻¹)', 'Aliphatic Peak Wavenumber 2 (cm⁻¹)',
-            'Carbonyl Peak Absorption', 'Sulfoxide Peak Absorption',
-            'Aliphatic Peak Absorption 1', 'Aliphatic Peak Absorption 2',
-            'Carbonyl Min Wavenumber', 'Carbonyl Max Wavenumber',
-            'Sulfoxide Min Wavenumber', 'Sulfoxide Max Wavenumber', 
-            'Aliphatic Min Wavenumber', 'Aliphatic Max Wavenumber']
-        self.cursor.execute(f"SELECT {', '.join(Column2Fetch)} FROM FTIR")
-        data = self.cursor.fetchall()
-        data = pd.DataFrame(data, columns=Column2Fetch)         # Convert the retrieved data to DataFrame. 
-        data = data[data.IsOutlier == 0]                        # Exclude the outlier data. 
-        # Prepare a table for the results. 
-        Res = {'B_Number': [], 'Lab_Aging_Condition': [], 'Num_Data': []}
-        for col in Column2Fetch[5:]:
-            for metric in ['mean', 'std', 'COV', 'min', 'max', 'data']:
-                Res[f'{col}_{metric}'] = []
-        # Define a function to add data to the results. 
-        def AddResults(Res, arr, ResLabel):
-            Res[f'{ResLabel}_mean'].append(arr.mean())
-            Res[f'{ResLabel}_std'].append(arr.std())
-            Res[f'{ResLabel}_COV'].append(arr.std() / arr.mean())
-            Res[f'{ResLabel}_min'].append(arr.min())
-            Res[f'{ResLabel}_max'].append(arr.max())
-            Res[f'{ResLabel}_data'].append('|'.join(list(arr.astype(str))))
-            return Res
-        # Start iterating over the unique "B-numbers" and analyze the results. 
-        Bnumber = data['Bnumber'].unique()              # Unique B-numbers. 
-        for bnum in Bnumber:                            # Iterate over all B-numbers. 
-            # Get the unique aging condition. 
-            AgeData = data[data['Bnumber'] == bnum]
-            Aging = AgeData['Lab_Aging'].unique()
-            # Iterate over the aging condition. 
-            for aging in Aging:
-                # Get the unique sample repetitions. 
-                RepData = AgeData[AgeData['Lab_Aging'] == aging]
-                if len(RepData) < 3:
-                    self.Terminal.appendPlainText(f'>>> Warning! Not enough available repetitions for ' + 
-                                                  f'B-number={bnum} at aging level of {aging}: ' + 
-                                                  f'Need {3 - len(RepData)} more.')
-                elif len(RepData) > 3:
-                    RepData = RemoveOutliers(RepData)
-                # Add the data to the "Res" dictionary. 
-                Res['B_Number'].append(bnum)
-                Res['Lab_Aging_Condition'].append(aging)
-                Res['Num_Data'].append(len(RepData))
-                for col in Column2Fetch[5:]:
-                    Res = AddResults(Res, RepData[col].to_numpy(), col)
-        # Convert "Res" dictionary to DataFrame. 
-        Labels4DF = ['ID-number', 'Laboratory Aging', 'Number of Data']
-        for lbl in Labels[5:]:
-            for metric in ['Mean of ', 'Std of ', 'COV of ', 'Min of ', 'Max of ']:
-                Labels4DF.append(metric + lbl)
-            Labels4DF.append(lbl + ' Data')
-        OrgLabels = list(Res.keys())
-        Res = pd.DataFrame(Res)
-        Res = Res.sort_values(by=["B_Number"])
-        Res.rename(columns={OrgLabels[i]: Labels4DF[i] for i in range(len(Labels4DF))}, inplace=True)
-        # Save the results to the Database. 
-        Res.to_sql('FTIR_Analysis_DB', self.conn, if_exists="replace", index=False)
+        Settings = Get_DB_Settings()
+        Result = Update_Analysis_Table(self.conn, self.cursor, Full=Full, Engine=Settings['Analysis_Engine'], 
+                                       ChunkSize=Settings['Analysis_Chunk_Size'])
+        if Result is None:
+            self.Terminal.appendPlainText(f'>>> The analysis for aggregation of the FTIR results is up to date.\n')
+            return
+        Full, NumGroups, Incomplete = Result
+        for bnum, aging, NumRep in Incomplete:
+            self.Terminal.appendPlainText(f'>>> Warning! Not enough available repetitions for ' + 
+                                          f'B-number={bnum} at aging level of {aging}: ' + 
+                                          f'Need {3 - NumRep} more.')
         # Print the message to the output terminal. 
-        Msg = f'>>> The analysis for aggregation of the available FTIR results is successfully performed!\n'
+        Msg = f'>>> The analysis for aggregation of the available FTIR results is successfully performed ' + \
+              (f'(all groups)!\n' if Full else f'({NumGroups} updated groups)!\n')
         self.Terminal.appendPlainText(Msg)
 # ======================================================================================================================
 # ======================================================================================================================
 # ======================================================================================================================
 
 
+class Select_Federated_Databases(QDialog):
+    """
+    This class represents the dialog for selecting the databases of the federated review (from the recent databases). 
+    """
+    def __init__(self, Paths, CurrentDB):
+        super().__init__()
+        self.Result = []
+        self.setWindowTitle("Select Databases to Compare")
+        self.setMinimumSize(600, 300)
+        layout = QVBoxLayout()
+        # List of the databases (current database is selected by default). 
+        self.List_Databases = QListWidget(self)
+        for path in Paths:
+            item = QListWidgetItem(path)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if os.path.abspath(path) == CurrentDB else Qt.Unchecked)
+            self.List_Databases.addItem(item)
+        # OK and Cancel buttons
+        button_layout = QHBoxLayout()
+        self.ok_button = QPushButton("OK")
+        self.cancel_button = QPushButton("Cancel")
+        self.ok_button.clicked.connect(self.Function_OK)
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.ok_button)
+        button_layout.addWidget(self.cancel_button)
+        # Add widgets to layout
+        layout.addWidget(QLabel('Please select the databases to review together (read-only):'))
+        layout.addWidget(self.List_Databases)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+    # ------------------------------------------------------------------------------------------------------------------
+    def Function_OK(self):
+        self.Result = [self.List_Databases.item(i).text() for i in range(self.List_Databases.count()) 
+                       if self.List_Databases.item(i).checkState() == Qt.Checked]
+        self.accept()
+    # ------------------------------------------------------------------------------------------------------------------
+    def GetInputs(self):
+        return self.Result
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+class Review_Table_Model(QAbstractTableModel):
+    """
+    This class represents the (read-only) model of the review table, which is filled lazily from a SQL query. Instead
+    of reading all records at once, the rows are read page by page ("Review_Page_Size" rows of the database settings)
+    when the view is scrolled to the end (through "canFetchMore" and "fetchMore"), where each page starts after the
+    sort keys of the last read row (keyset pagination, "WHERE (keys) > (last keys) ORDER BY keys LIMIT page size").
+    This way, each page is read using the indexes, regardless of how deep the table is scrolled. The values are only
+    formatted (and colored) when they are shown in the view (see "data"). The rows can also be read partition by
+    partition (e.g., each database of the federated review, "WHERE Source_DB = ?"), where each partition is paged by
+    its own keys; the keys of one partition (e.g., "id") are then served by the index of that partition, while a sort
+    over the partition column of a "UNION ALL" view would require a full scan and sort of all databases for each page.
+    """
+    def __init__(self, cursor, Headers, parent=None):
+        super().__init__(parent)
+        self.cursor = cursor            # cursor for reading the pages (separate from the one of the review page).
+        self.PageSize = Get_DB_Settings()['Review_Page_Size']
+        self.Clear(Headers)
+    # ------------------------------------------------------------------------------------------------------------------
+    def Clear(self, Headers=None):
+        """
+        This function empties the table (and optionally changes the header labels).
+        """
+        self.beginResetModel()
+        if Headers is not None:
+            self.Headers = list(Headers)
+        self.Rows = []                  # The read rows (values of the columns, followed by the sort keys).
+        self.Query = None               # (columns, table, where, parameters, keys, partition) of the current query.
+        self.PartitionIndex = 0         # Index of the partition which is being read.
+        self.LastKeys = None            # The sort keys of the last read row of the current partition.
+        self.Percent_Columns = set()    # Index of the columns which are shown as colored percentage (COV).
+        self.NumRows = 0                # Total number of the rows of the query.
+        self.Finished = True            # If all rows of the query are read.
+        self.endResetModel()
+    # ------------------------------------------------------------------------------------------------------------------
+    def Set_Query(self, Headers, Columns, Table, Where='', Params=(), Keys=('id',), Partition=None,
+                  Percent_Columns=()):
+        """
+        This function sets the query of the table, where only the first page of the rows is read.
+
+        :param Headers: A list of the header labels of the columns.
+        :param Columns: A list of the columns (SQL expressions), in the same order of the headers.
+        :param Table: The table (or view) to be read.
+        :param Where: The filter of the rows (SQL expression, without "WHERE").
+        :param Params: The parameters of the filter.
+        :param Keys: The sort keys (SQL expressions), which should be unique for each row (used for the pagination).
+        :param Partition: None, or the partition column and the list of its values as (column, values); the rows of
+        each value are read (and sorted by the keys) one after another, in the same order of the values.
+        :param Percent_Columns: Index of the columns which are shown as colored percentage (COV).
+        :return: Total number of the rows of the query.
+        """
+        self.beginResetModel()
+        self.Headers = list(Headers)
+        self.Rows = []
+        self.Query = (list(Columns), Table, Where, tuple(Params), list(Keys), Partition)
+        self.PartitionIndex = 0
+        self.LastKeys = None
+        self.Percent_Columns = set(Percent_Columns)
+        self.cursor.execute(f"SELECT COUNT(*) FROM {Table}" + (f" WHERE {Where}" if Where else ''), tuple(Params))
+        self.NumRows = self.cursor.fetchone()[0]
+        self.Finished = Partition is not None and len(Partition[1]) == 0
+        self.Rows = self.Read_Page()
+        self.endResetModel()
+        # Return the results.
+        return self.NumRows
+    # ------------------------------------------------------------------------------------------------------------------
+    def Read_Page(self):
+        """
+        This function reads the next page of the rows (after the last read row), and returns them. If the current
+        partition is finished before the page is full, the page is filled from the next partitions.
+        """
+        Columns, Table, Where, Params, Keys, Partition = self.Query
+        Rows = []
+        while (not self.Finished) and len(Rows) < self.PageSize:
+            Conditions, PageParams = self.Partition_Conditions()
+            if self.LastKeys is not None:
+                Conditions.append(f"({', '.join(Keys)}) > ({', '.join(['?'] * len(Keys))})")
+                PageParams = PageParams + self.LastKeys
+            Limit = self.PageSize - len(Rows)
+            self.cursor.execute(f"SELECT {', '.join(Columns + Keys)} FROM {Table} " +
+                                (f"WHERE {' AND '.join(Conditions)} " if len(Conditions) else '') +
+                                f"ORDER BY {', '.join(Keys)} LIMIT {Limit}", PageParams)
+            Page = self.cursor.fetchall()
+            Rows.extend(Page)
+            if len(Page):
+                self.LastKeys = tuple(Page[-1][-len(Keys):])
+            if len(Page) < Limit:
+                # The current partition is finished; go to the next one (if any).
+                if Partition is None or self.PartitionIndex + 1 >= len(Partition[1]):
+                    self.Finished = True
+                else:
+                    self.PartitionIndex += 1
+                    self.LastKeys = None
+        # Return the results.
+        return Rows
+    # ------------------------------------------------------------------------------------------------------------------
+    def Partition_Conditions(self, Index=None):
+        """
+        This function returns the filter of the query for a partition (the current one by default), as the list of the
+        conditions and their parameters.
+        """
+        Columns, Table, Where, Params, Keys, Partition = self.Query
+        Conditions = [f'({Where})'] if Where else []
+        if Partition is not None:
+            Conditions.append(f'{Partition[0]} = ?')
+            Params = Params + (Partition[1][self.PartitionIndex if Index is None else Index],)
+        # Return the results.
+        return Conditions, Params
+    # ------------------------------------------------------------------------------------------------------------------
+    def canFetchMore(self, parent=QModelIndex()):
+        return (not parent.isValid()) and (not self.Finished)
+    # ------------------------------------------------------------------------------------------------------------------
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.Finished:
+            return
+        Rows = self.Read_Page()
+        if len(Rows) == 0:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.Rows), len(self.Rows) + len(Rows) - 1)
+        self.Rows.extend(Rows)
+        self.endInsertRows()
+    # ------------------------------------------------------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.Rows)
+    # ------------------------------------------------------------------------------------------------------------------
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.Headers)
+    # ------------------------------------------------------------------------------------------------------------------
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.Headers[section]
+        return super().headerData(section, orientation, role)
+    # ------------------------------------------------------------------------------------------------------------------
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        Value = self.Rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            if index.column() in self.Percent_Columns:
+                try:
+                    return f'{Value*100:.1f}%'
+                except:
+                    return 'None'
+            elif type(Value) == float:
+                return f'{Value:.4f}'
+            else:
+                return str(Value)
+        elif role == Qt.BackgroundRole and index.column() in self.Percent_Columns:
+            try:
+                return QBrush(QColor(Get_Color_4_COV(Value)))
+            except:
+                return None
+        return None
+    # ------------------------------------------------------------------------------------------------------------------
+    def Get_Value(self, Row, Col):
+        """
+        This function returns the (raw) value of a cell, or None if the row is not available.
+        """
+        if 0 <= Row < len(self.Rows):
+            return self.Rows[Row][Col]
+        return None
+    # ------------------------------------------------------------------------------------------------------------------
+    def Get_Column_Values(self, Col):
+        """
+        This function returns the values of a column for all rows of the query (including the rows which are not read
+        yet), in the same order of the table.
+        """
+        if self.Query is None:
+            return []
+        Columns, Table, Where, Params, Keys, Partition = self.Query
+        Values = []
+        for i in range(1 if Partition is None else len(Partition[1])):
+            Conditions, PartParams = self.Partition_Conditions(i)
+            self.cursor.execute(f"SELECT {Columns[Col]} FROM {Table} " +
+                                (f"WHERE {' AND '.join(Conditions)} " if len(Conditions) else '') +
+                                f"ORDER BY {', '.join(Keys)}", PartParams)
+            Values.extend([Row[0] for Row in self.cursor.fetchall()])
+        # Return the results.
+        return Values
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
 def Get_Color_4_COV(value):
     """
     This function gets the COV value and return a corresponding background color to specify high COV values. 
@@ -1223,19 +1390,451 @@ def ResourcePath(relative_path):
 # ======================================================================================================================
 
 
-def Read_Resize_Image(path, targetPixel):
+def Export_Records_Excel(cursor, Labels, FilePath, ChunkSize=5000, WriteOnly=True):
+    """
+    This function writes the records of the last query of the cursor to an Excel file, with a colored row for each 
+    record (the 7th column should be "IsOutlier"). By default, a "write-only" workbook is used, where the rows are 
+    written to the file as they are fetched (in chunks), and the cells only refer to the shared named styles, so the 
+    time and memory don't grow with the formatting of each cell. The column widths are set from the labels before 
+    writing any row (needed in the write-only mode). "WriteOnly=False" uses a normal workbook, where the format of 
+    each cell is set separately (much slower for the large databases; kept for comparison, see 
+    "Benchmark_Excel_Export"). 
+
+    :param cursor: cursor with the executed query of the records. 
+    :param Labels: A list of the labels of the columns (titles of the Excel file). 
+    :param FilePath: Path of the Excel file. 
+    :param ChunkSize: Number of the records to be fetched in each chunk. 
+    :param WriteOnly: True to use the write-only workbook. 
+    """
+    # Define some styles. 
+    thin            = Side(border_style="thin", color="000000")
+    cell_border     = Border(top=thin, left=thin, right=thin, bottom=thin)
+    center_alignment= Alignment(horizontal="center", vertical="center")
+    Styles = {
+        'Export_Title':   NamedStyle(name='Export_Title', border=cell_border, alignment=center_alignment, 
+                                     fill=PatternFill(start_color="FFE989", end_color="FFCC00", fill_type="solid"), 
+                                     font=Font(name="Arial", bold=True, size=11, color="000000")), 
+        'Export_Valid':   NamedStyle(name='Export_Valid', border=cell_border, alignment=center_alignment, 
+                                     fill=PatternFill(start_color="D4FEC2", end_color="D4FEC2", fill_type="solid"), 
+                                     font=Font(name="Arial", size=11, color="000000")), 
+        'Export_Invalid': NamedStyle(name='Export_Invalid', border=cell_border, alignment=center_alignment, 
+                                     fill=PatternFill(start_color="FDBBBB", end_color="FDBBBB", fill_type="solid"), 
+                                     font=Font(name="Arial", size=11, color="000000"))}
+    # Prepare the output file. 
+    wb = Workbook(write_only=WriteOnly)
+    ws = wb.create_sheet("Sheet1") if WriteOnly else wb.active
+    ws.title = "Sheet1"
+    for Style in Styles.values():
+        wb.add_named_style(Style)
+    # Adjust the size of each column (character count of the label + padding). 
+    for j, col in enumerate(Labels, start=1):
+        ws.column_dimensions[get_column_letter(j)].width = len(str(col)) + 2
+    # Write the titles. 
+    if WriteOnly:
+        Row = []
+        for col in Labels:
+            cell = WriteOnlyCell(ws, value=col)
+            cell.style = 'Export_Title'
+            Row.append(cell)
+        ws.append(Row)
+    else:
+        for j, col in enumerate(Labels, start=1):
+            cell = ws.cell(row=1, column=j, value=col)
+            cell.style = 'Export_Title'
+    # Write the data (fetched in chunks, so they are not all loaded at once). 
+    i = 0
+    while True:
+        Content = cursor.fetchmany(ChunkSize)
+        if len(Content) == 0:
+            break
+        for Values in Content:
+            Style = 'Export_Invalid' if Values[6] else 'Export_Valid'
+            if WriteOnly:
+                Row = []
+                for Value in Values:
+                    cell = WriteOnlyCell(ws, value=Value)
+                    cell.style = Style
+                    Row.append(cell)
+                ws.append(Row)
+            else:
+                for j, Value in enumerate(Values, start=1):
+                    cell = ws.cell(row=2 + i, column=j, value=Value)
+                    cell.fill = Styles[Style].fill
+                    cell.border = cell_border
+                    cell.font = Styles[Style].font
+                    cell.alignment = center_alignment
+            i += 1
+    # Save the results. 
+    wb.save(FilePath)
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Report_Images():
+    """
+    This function returns the paths of the images of the report of an individual record (see 
+    "Write_Individual_Report"). 
+    """
+    # Return the results. 
+    return [ResourcePath(os.path.join(".", "assets", "ALSS Baseline Correction.png")), 
+            ResourcePath(os.path.join(".", "assets", "Deconcolution Gaussian.png"))]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Analysis_Labels(Labels):
+    """
+    This function returns the column names of the combined results ("FTIR_Analysis_DB" table). 
+
+    :param Labels: A list of the labels of the combined columns. 
+    :return: A list of the column names. 
+    """
+    Labels4DF = ['ID-number', 'Laboratory Aging', 'Number of Data']
+    for lbl in Labels:
+        for metric in ['Mean of ', 'Std of ', 'COV of ', 'Min of ', 'Max of ']:
+            Labels4DF.append(metric + lbl)
+        Labels4DF.append(lbl + ' Data')
+    # Return the results. 
+    return Labels4DF
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Factorize_Keys(Values):
+    """
+    This function converts the values (e.g., B-numbers) to integer codes in the order of their first appearance, where 
+    the missing values (NaN/None) get a code of their own (instead of -1 of the "pd.factorize"). 
+
+    :param Values: A Series (or array) of the values. 
+    :return: An integer array of the codes. 
+    """
+    try:
+        Codes = pd.factorize(Values, use_na_sentinel=False)[0]
+    except TypeError:
+        # Older pandas (< 1.5). 
+        Codes = pd.factorize(Values, na_sentinel=None)[0]
+    # Return the results. 
+    return Codes
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Aggregate_Replicates(data, Columns, Labels):
+    """
+    This function combines the results of the replicates of each (B-number, lab aging) group, i.e., mean, std, COV, 
+    min, max, and the list of values of each column (the layout of the "FTIR_Analysis_DB" table). The outliers of the 
+    groups with more than 3 replicates are removed first (see "Find_Replicate_Outliers"). The records are sorted by 
+    group only once, and then all statistics of all groups and columns are calculated together (using "reduceat" 
+    over the group boundaries), instead of filtering the data for each group. 
+
+    :param data: A DataFrame of the valid records, with "Bnumber", "Lab_Aging", and the "Columns". 
+    :param Columns: A list of the columns to be combined. 
+    :param Labels: A list of the labels of the columns (used for naming the results). 
+    :return: Two variables, (i) a DataFrame of the combined results (one row per group, sorted by B-number), and 
+    (ii) a list of (B-number, lab aging, number of replicates) of the groups with less than 3 replicates. 
+    """
+    Labels4DF = Get_Analysis_Labels(Labels)
+    data = data.reset_index(drop=True)
+    if len(data) == 0:
+        return pd.DataFrame({lbl: [] for lbl in Labels4DF}), []
+    # Group number of each record; groups are ordered by the first appearance of their B-number, and then by the 
+    #   first appearance of their aging level (a missing B-number or aging level is a group of its own). 
+    BnumOrder = Factorize_Keys(data['Bnumber'])
+    AgingOrder = Factorize_Keys(data['Lab_Aging'])
+    GroupID = Factorize_Keys(BnumOrder * (AgingOrder.max() + 1) + AgingOrder)
+    FirstRow = np.full(GroupID.max() + 1, len(data))
+    np.minimum.at(FirstRow, GroupID, np.arange(len(data)))
+    GroupRank = np.empty_like(FirstRow)
+    GroupRank[np.lexsort((FirstRow, BnumOrder[FirstRow]))] = np.arange(len(FirstRow))
+    GroupID = GroupRank[GroupID]
+    # Sort the records by group (stable, so the replicates keep their order). 
+    Order = np.argsort(GroupID, kind='stable')
+    # Remove the outliers of the groups with more than 3 replicates (all groups at once). 
+    Keep = Find_Replicate_Outliers(GroupID, data['ICO_Baseline'], data['Deconv_ICO'])
+    Order = Order[Keep[Order]]
+    Starts = np.r_[0, np.flatnonzero(np.diff(GroupID[Order])) + 1]
+    Counts = np.diff(np.r_[Starts, len(Order)])
+    Sorted = data.iloc[Order]
+    # Statistics of all groups and columns. 
+    Values = Sorted[Columns].to_numpy(dtype=np.float64)
+    Mean = np.add.reduceat(Values, Starts, axis=0) / Counts[:, None]
+    Dev = Values - np.repeat(Mean, Counts, axis=0)
+    Std = np.sqrt(np.add.reduceat(Dev * Dev, Starts, axis=0) / Counts[:, None])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        COV = Std / Mean
+    Min = np.minimum.reduceat(Values, Starts, axis=0)
+    Max = np.maximum.reduceat(Values, Starts, axis=0)
+    Ends = np.r_[Starts[1:], len(Order)]
+    # Prepare the results. 
+    Res = {'ID-number': Sorted['Bnumber'].to_numpy()[Starts], 
+           'Laboratory Aging': Sorted['Lab_Aging'].to_numpy()[Starts], 
+           'Number of Data': Counts}
+    for j, (col, lbl) in enumerate(zip(Columns, Labels)):
+        for metric, Arr in zip(['Mean of ', 'Std of ', 'COV of ', 'Min of ', 'Max of '], [Mean, Std, COV, Min, Max]):
+            Res[metric + lbl] = Arr[:, j]
+        Str = Sorted[col].to_numpy().astype(str)
+        Res[lbl + ' Data'] = ['|'.join(Str[Start:End]) for Start, End in zip(Starts, Ends)]
+    Res = pd.DataFrame(Res)
+    Incomplete = [(bnum, aging, NumRep) for bnum, aging, NumRep in 
+                  zip(Res['ID-number'], Res['Laboratory Aging'], Res['Number of Data']) if NumRep < 3]
+    Res = Res.sort_values(by=["ID-number"])
+    # Return the results. 
+    return Res, Incomplete
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Register_SQL_Functions(conn):
+    """
+    This function registers the functions required for the aggregation in SQLite: "float_repr", the text of a value 
+    the same as in the "Data" columns of "Aggregate_Replicates" (shortest repr of the float, "nan" for NULL), and 
+    "sqrt" if SQLite is compiled without the math functions. 
+
+    :param conn: connection to the database. 
+    """
+    # The functions are only registered once per connection (it fails while a statement of the connection is active). 
+    try:
+        conn.execute("SELECT float_repr(1.0)")
+    except sqlite3.OperationalError:
+        conn.create_function('float_repr', 1, lambda x: 'nan' if x is None else repr(float(x)), deterministic=True)
+    try:
+        conn.execute("SELECT sqrt(4.0)")
+    except sqlite3.OperationalError:
+        conn.create_function('sqrt', 1, lambda x: None if x is None or x < 0 else x ** 0.5, deterministic=True)
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Aggregate_Replicates_SQL(conn, cursor, Columns, Labels, Dirty=False):
+    """
+    This function combines the results of the replicates of each (B-number, lab aging) group inside SQLite, the same 
+    as "Aggregate_Replicates", so only the combined results (one row per group) are fetched into Python and memory 
+    doesn't grow with the size of the database. First, the valid records are copied (id, group, and the ICO used for 
+    the outliers) to a temporary table. Then, the outliers are removed in rounds; in each round, the leave-one-out COV 
+    of all records is calculated with the window functions over the groups (closed form, see 
+    "Find_Replicate_Outliers"), and the outlier of each group is deleted from the temporary table. Finally, the 
+    statistics of the remaining records are calculated with the aggregate functions (std in two passes, from the 
+    deviations from the group mean). The results are the same as "Aggregate_Replicates": the "Number of Data" is the 
+    number of replicates, the statistics of a column are NULL (NaN) if any replicate is missing that value, and the 
+    values in the "Data" columns are written by "float_repr" (see "Register_SQL_Functions"). 
+
+    :param conn: connection to the database. 
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param Columns: A list of the columns to be combined. 
+    :param Labels: A list of the labels of the columns (used for naming the results). 
+    :param Dirty: True to only combine the groups of the "Analysis_Dirty_Groups" table. 
+    :return: Two variables, (i) a DataFrame of the combined results (one row per group, sorted by B-number), and 
+    (ii) a list of (B-number, lab aging, number of replicates) of the groups with less than 3 replicates. 
+    """
+    Register_SQL_Functions(conn)
+    Join = 'JOIN Analysis_Dirty_Groups AS D ON F.Bnumber IS D.Bnumber AND F.Lab_Aging IS D.Lab_Aging' if Dirty else ''
+    # Valid records, with the ICO of the "Baseline" method, or "deconvolution" if it is missing in the group. 
+    cursor.execute("DROP TABLE IF EXISTS temp.Temp_Analysis_Records")
+    cursor.execute(f"""
+    CREATE TEMP TABLE Temp_Analysis_Records AS 
+    SELECT F.id, F.Bnumber, F.Lab_Aging, 
+        CASE WHEN MAX(F.ICO_Baseline IS NULL) OVER (PARTITION BY F.Bnumber, F.Lab_Aging) THEN F.Deconv_ICO 
+        ELSE F.ICO_Baseline END AS Value 
+    FROM FTIR AS F {Join} WHERE F.IsOutlier = 0
+    """)
+    # Remove the outliers in rounds (one record of each group per round). 
+    while True:
+        cursor.execute("""
+        DELETE FROM Temp_Analysis_Records WHERE id IN (
+            SELECT id FROM (
+                SELECT id, NumRows, MAX(COV) OVER W - MIN(COV) OVER W AS Range, 
+                    ROW_NUMBER() OVER (PARTITION BY Bnumber, Lab_Aging ORDER BY COV IS NULL, COV, id DESC) AS Rank 
+                FROM (
+                    SELECT id, Bnumber, Lab_Aging, NumRows, 
+                        sqrt(MAX(s2 - s1 * s1 / n, 0.0) / (n - 1)) / (s1 / n + Shift) * 100 AS COV 
+                    FROM (
+                        SELECT id, Bnumber, Lab_Aging, NumRows, Shift, N - (Value IS NOT NULL) AS n, 
+                            SUM(d) OVER W - d AS s1, SUM(d * d) OVER W - d * d AS s2 
+                        FROM (
+                            SELECT id, Bnumber, Lab_Aging, Value, COUNT(*) OVER W AS NumRows, COUNT(Value) OVER W AS N, 
+                                AVG(Value) OVER W AS Shift, IFNULL(Value - AVG(Value) OVER W, 0.0) AS d 
+                            FROM Temp_Analysis_Records WINDOW W AS (PARTITION BY Bnumber, Lab_Aging)
+                        ) WINDOW W AS (PARTITION BY Bnumber, Lab_Aging)
+                    )
+                ) WINDOW W AS (PARTITION BY Bnumber, Lab_Aging)
+            ) WHERE Rank = 1 AND NumRows > 3 AND Range > 10
+        )""")
+        if cursor.rowcount <= 0:
+            break
+    # Statistics of the remaining records (NULL if a value is missing, the same as NaN in "Aggregate_Replicates"). 
+    Window, Inner, Outer = [], [], []
+    for j, col in enumerate(Columns):
+        Window.append(f"F.{col}, F.{col} - AVG(F.{col}) OVER W AS E{j}")
+        Inner.append(f"COUNT({col}) = COUNT(*) AS V{j}, AVG({col}) AS M{j}, sqrt(AVG(E{j} * E{j})) AS S{j}, " + 
+                     f"MIN({col}) AS L{j}, MAX({col}) AS H{j}, group_concat(float_repr({col}), '|') AS D{j}")
+        Outer.append(f"CASE WHEN V{j} THEN M{j} END, CASE WHEN V{j} THEN S{j} END, " + 
+                     f"CASE WHEN V{j} THEN S{j} / M{j} END, CASE WHEN V{j} THEN L{j} END, " + 
+                     f"CASE WHEN V{j} THEN H{j} END, D{j}")
+    cursor.execute(f"""
+    SELECT Bnumber, Lab_Aging, NumRows, {', '.join(Outer)} FROM (
+        SELECT Bnumber, Lab_Aging, COUNT(*) AS NumRows, MIN(id) AS FirstID, {', '.join(Inner)} FROM (
+            SELECT F.id, F.Bnumber, F.Lab_Aging, {', '.join(Window)} 
+            FROM FTIR AS F JOIN Temp_Analysis_Records USING (id) 
+            WINDOW W AS (PARTITION BY F.Bnumber, F.Lab_Aging) ORDER BY F.Bnumber, F.Lab_Aging, F.id
+        ) GROUP BY Bnumber, Lab_Aging
+    ) ORDER BY Bnumber IS NULL, Bnumber, FirstID
+    """)
+    Res = pd.DataFrame(cursor.fetchall(), columns=Get_Analysis_Labels(Labels))
+    cursor.execute("DROP TABLE IF EXISTS temp.Temp_Analysis_Records")
+    Incomplete = [(bnum, aging, NumRep) for bnum, aging, NumRep in 
+                  zip(Res['ID-number'], Res['Laboratory Aging'], Res['Number of Data']) if NumRep < 3]
+    # Return the results. 
+    return Res, Incomplete
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Update_Analysis_Table(conn, cursor, Full=False, Engine='pandas', ChunkSize=5000):
     """
-    This function reads the image (*.png, *.jpg) and resize it to properly fit in the Excel file. 
+    This function updates the combined results of the replicates ("FTIR_Analysis_DB" table). Only the (B-number, lab 
+    aging) groups which their records are changed since the last analysis (tracked by triggers in 
+    "Analysis_Dirty_Groups" table) are re-analyzed and replaced in the table. The whole table is regenerated if it is 
+    not available or if "Full" is True. The groups are matched with "IS", so the groups with a missing B-number or lab 
+    aging are updated as well. 
 
-    :param path: The complete/relative path to the image. 
-    :param targetPixel: The height of the image after resize in pixels, given the fixed aspect ratio. 
-    :param return: the resized image object. 
+    :param conn: connection to the database. 
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param Full: True to regenerate the whole table. 
+    :param Engine: The engine for combining the replicates, "pandas" (default), "sql", or "stream". 
+    :param ChunkSize: Number of the records to be read in each chunk (only for the "stream" engine). 
+    :return: None if the table is up to date, otherwise three variables, (i) True if the whole table is regenerated, 
+    (ii) number of the updated groups (None if the whole table is regenerated), and (iii) a list of (B-number, lab 
+    aging, number of replicates) of the updated groups with less than 3 replicates. 
     """
-    Image_Obj = Image(path)
-    Ratio = targetPixel / Image_Obj.height
-    Image_Obj.height = targetPixel
-    Image_Obj.width  = Image_Obj.width * Ratio
-    return Image_Obj
+    # First, check if the combined result table is available in the SQL database. 
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='FTIR_Analysis_DB'")
+    Full = Full or (cursor.fetchone() is None)
+    DirtyGroups = None
+    if not Full:
+        cursor.execute("SELECT Bnumber, Lab_Aging FROM Analysis_Dirty_Groups")
+        DirtyGroups = cursor.fetchall()
+        if len(DirtyGroups) == 0:
+            return None
+    if Engine == 'stream':
+        # Combine the replicates chunk by chunk, and write the results of each chunk to the database right away 
+        #   (memory doesn't grow with the size of the database). 
+        if Full:
+            Create_Analysis_Table(cursor, Analysis_Labels)
+        else:
+            cursor.executemany("DELETE FROM FTIR_Analysis_DB WHERE [ID-number] IS ? AND [Laboratory Aging] IS ?", 
+                               DirtyGroups)
+        NumColumns = len(Get_Analysis_Labels(Analysis_Labels))
+        Insert = f"INSERT INTO FTIR_Analysis_DB VALUES ({', '.join(['?'] * NumColumns)})"
+        Incomplete = []
+        for Res, Inc in Aggregate_Replicates_Stream(conn.cursor(), Analysis_Columns, Analysis_Labels, Dirty=not Full, 
+                                                    ChunkSize=ChunkSize):
+            cursor.executemany(Insert, Res.astype(object).itertuples(index=False, name=None))
+            Incomplete += Inc
+        cursor.execute("DELETE FROM Analysis_Dirty_Groups")
+        conn.commit()
+    else:
+        if Engine == 'sql':
+            # Combine the replicates inside the database (only the combined results are fetched). 
+            Res, Incomplete = Aggregate_Replicates_SQL(conn, cursor, Analysis_Columns, Analysis_Labels, Dirty=not Full)
+        else:
+            # Now, get the latest values of the required parameters from the database. 
+            Column2Fetch = ['id', 'Bnumber', 'Lab_Aging', 'RepNumber', 'IsOutlier'] + Analysis_Columns
+            if Full:
+                cursor.execute(f"SELECT {', '.join(Column2Fetch)} FROM FTIR")
+            else:
+                cursor.execute(f"SELECT {', '.join([f'F.{col}' for col in Column2Fetch])} FROM FTIR AS F " + 
+                               f"JOIN Analysis_Dirty_Groups AS D " + 
+                               f"ON F.Bnumber IS D.Bnumber AND F.Lab_Aging IS D.Lab_Aging ORDER BY F.id")
+            data = cursor.fetchall()
+            data = pd.DataFrame(data, columns=Column2Fetch)         # Convert the retrieved data to DataFrame. 
+            data = data[data.IsOutlier == 0]                        # Exclude the outlier data. 
+            # Combine the replicates of each (B-number, lab aging) group. 
+            Res, Incomplete = Aggregate_Replicates(data, Analysis_Columns, Analysis_Labels)
+        # Save the results to the Database (the changed groups are replaced, and all in a single transaction). 
+        if not Full:
+            cursor.executemany("DELETE FROM FTIR_Analysis_DB WHERE [ID-number] IS ? AND [Laboratory Aging] IS ?", 
+                               DirtyGroups)
+        cursor.execute("DELETE FROM Analysis_Dirty_Groups")
+        Res.to_sql('FTIR_Analysis_DB', conn, if_exists="replace" if Full else "append", index=False)
+    # Return the results. 
+    return Full, None if Full else len(DirtyGroups), Incomplete
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Create_Analysis_Table(cursor, Labels):
+    """
+    This function (re)creates the empty table of the combined results ("FTIR_Analysis_DB"), with the same column 
+    types as the table created by "pandas.DataFrame.to_sql". 
+
+    :param cursor: cursor for executing the SQLite3 commands. 
+    :param Labels: A list of the labels of the combined columns. 
+    """
+    Types = {'ID-number': 'INTEGER', 'Laboratory Aging': 'TEXT', 'Number of Data': 'INTEGER'}
+    Columns = [f'"{lbl}" ' + Types.get(lbl, 'TEXT' if lbl.endswith(' Data') else 'REAL') 
+               for lbl in Get_Analysis_Labels(Labels)]
+    cursor.execute("DROP TABLE IF EXISTS FTIR_Analysis_DB")
+    cursor.execute(f"CREATE TABLE FTIR_Analysis_DB ({', '.join(Columns)})")
+    # Return Nothing. 
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Aggregate_Replicates_Stream(cursor, Columns, Labels, Dirty=False, ChunkSize=5000):
+    """
+    This generator combines the results of the replicates of each (B-number, lab aging) group, the same as 
+    "Aggregate_Replicates", while reading the records in chunks, so the memory doesn't grow with the size of the 
+    database. The valid records are read sorted by (B-number, lab aging), which is served by the "idx_outlier" index 
+    (no sorting of the whole table), so all groups of a chunk are complete except its last group, which is carried 
+    to the next chunk. The combined results of the completed groups are yielded after each chunk. 
+
+    :param cursor: cursor for reading the records (should not be used for anything else until the end). 
+    :param Columns: A list of the columns to be combined. 
+    :param Labels: A list of the labels of the columns (used for naming the results). 
+    :param Dirty: True to only combine the groups of the "Analysis_Dirty_Groups" table. 
+    :param ChunkSize: Number of the records to be read in each chunk. 
+    :return: Yields two variables for each chunk, (i) a DataFrame of the combined results of the completed groups 
+    (sorted by B-number and lab aging), and (ii) a list of (B-number, lab aging, number of replicates) of the groups 
+    with less than 3 replicates. 
+    """
+    Column2Fetch = ['id', 'Bnumber', 'Lab_Aging'] + Columns
+    Join = 'JOIN Analysis_Dirty_Groups AS D ON F.Bnumber IS D.Bnumber AND F.Lab_Aging IS D.Lab_Aging' if Dirty else ''
+    cursor.execute(f"SELECT {', '.join([f'F.{col}' for col in Column2Fetch])} FROM FTIR AS F {Join} " + 
+                   f"WHERE F.IsOutlier = 0 ORDER BY F.Bnumber, F.Lab_Aging, F.id")
+    Carry = None
+    while True:
+        Rows = cursor.fetchmany(ChunkSize)
+        if len(Rows) == 0:
+            # The last group. 
+            if Carry is not None:
+                yield Aggregate_Replicates(Carry, Columns, Labels)
+            break
+        data = pd.DataFrame(Rows, columns=Column2Fetch)
+        data[Columns] = data[Columns].astype(np.float64)
+        if Carry is not None:
+            data = pd.concat([Carry, data], ignore_index=True)
+        # Keep the last group for the next chunk (it may be continued); a missing key is the same as another one. 
+        Same = lambda col: (data[col] == data[col].iloc[-1]) | (data[col].isna() & pd.isna(data[col].iloc[-1]))
+        Last = Same('Bnumber') & Same('Lab_Aging')
+        Carry = data[Last]
+        if not Last.all():
+            yield Aggregate_Replicates(data[~Last], Columns, Labels)
+    # Return Nothing. 
+    return
 # ======================================================================================================================
 # ======================================================================================================================
 # ======================================================================================================================
@@ -1244,37 +1843,206 @@ def Read_Resize_Image(path, targetPixel):
 def RemoveOutliers(df):
     """
     In case we have more than 3 repetition for a given FTIR sample, this function tries to find the outliers and return 
-    the processed Dataframe. 
+    the processed Dataframe (see "Find_Replicate_Outliers"). 
 
     VERY IMPORTANT NOTE: this function uses the "ICO" calculated using the "Baseline" method as an index to pick the 
     best combination of three, if the manual results are available. Otherwise, it will use "ICO" calculated using the 
     "deconvolution" method. 
     """
-    # Check if "ICO_Baseline" is available for all rows. 
-    ColName = 'ICO_Baseline'
-    if -1 in df[ColName] or np.any(pd.isnull(df[ColName])):
-        ColName = 'Deconv_ICO'
-    while len(df) > 3:
-        Index = list(df.index)
-        Combinations = list(itertools.combinations(Index, len(Index) - 1))
-        COVs = []
-        for comb in Combinations:
-            Arr = df.loc[list(comb), ColName]
-            COVs.append(Arr.std() / Arr.mean() * 100)
-        if max(COVs) - min(COVs) > 10:
-            # This means that if by removing a specific measurement, the COV reduces by at least 10%, we can assume that 
-            # specific measurement as outlier. Note that the total number of measurements are more than 3. 
-            df = df.loc[list(Combinations[np.argmin(COVs)])]
-        else:
-            break
+    Keep = Find_Replicate_Outliers(np.zeros(len(df), dtype=np.int64), df['ICO_Baseline'], df['Deconv_ICO'])
     # Return the updated DataFrame. 
-    return df
+    return df[Keep]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Find_Replicate_Outliers(GroupID, ICO_Baseline, Deconv_ICO):
+    """
+    This function finds the outliers of the replicates, for all groups (same B-number and lab aging) at once. In each 
+    group with more than 3 replicates, the COV of the ICO is calculated after leaving out each replicate; if leaving 
+    out a replicate reduces the COV by more than 10% compared to the other choices (max COV - min COV > 10%), the one 
+    with the minimum COV is an outlier and removed. This is repeated until 3 replicates remain or no outlier is found. 
+    The "ICO" of the "Baseline" method is used, unless it is missing for a replicate of the group, where the "ICO" of 
+    the "deconvolution" method is used. 
+    The leave-one-out mean and std (ddof=1) of all replicates are calculated in closed form from the sums of each 
+    group (sum and sum of squares, minus the replicate itself), so each round is a few vectorized operations over all 
+    groups, instead of the std of every combination. On ties, the later replicate is removed (same as before). 
+
+    :param GroupID: Group number (0, 1, ..., number of groups - 1) of each record. 
+    :param ICO_Baseline: The ICO of the baseline method of each record (NaN if not available). 
+    :param Deconv_ICO: The ICO of the deconvolution method of each record. 
+    :return: A boolean array, True for the records to keep and False for the outliers. 
+    """
+    GroupID = np.asarray(GroupID, dtype=np.int64)
+    ICO_Baseline = np.asarray(ICO_Baseline, dtype=np.float64)
+    Deconv_ICO = np.asarray(Deconv_ICO, dtype=np.float64)
+    NumGroups = GroupID.max() + 1 if len(GroupID) else 0
+    # Select the ICO of each group. 
+    UseDeconv = np.bincount(GroupID, weights=np.isnan(ICO_Baseline), minlength=NumGroups) > 0
+    Values = np.where(UseDeconv[GroupID], Deconv_ICO, ICO_Baseline)
+    IsValid = ~np.isnan(Values)
+    Position = np.arange(len(GroupID))
+    Keep = np.ones(len(GroupID), dtype=bool)
+    Active = np.bincount(GroupID, minlength=NumGroups) > 3
+    while np.any(Active):
+        Rows = np.flatnonzero(Keep & Active[GroupID])
+        g, x, v = GroupID[Rows], Values[Rows], IsValid[Rows]
+        # Sums of each group (deviations from the group mean, for the accuracy), missing values are skipped. 
+        N = np.bincount(g, weights=v, minlength=NumGroups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Shift = np.bincount(g, weights=np.where(v, x, 0), minlength=NumGroups) / N
+        d = np.where(v, x - Shift[g], 0)
+        S1 = np.bincount(g, weights=d, minlength=NumGroups)
+        S2 = np.bincount(g, weights=d * d, minlength=NumGroups)
+        # Leave-one-out mean, std, and COV (in percent) for each replicate. 
+        n, s1, s2 = N[g] - v, S1[g] - d, S2[g] - d * d
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Std = np.sqrt(np.maximum(s2 - s1 * s1 / n, 0) / (n - 1))
+            COV = Std / (s1 / n + Shift[g]) * 100
+        # Range of the COVs in each group. 
+        MaxCOV = np.full(NumGroups, -np.inf)
+        MinCOV = np.full(NumGroups, np.inf)
+        np.fmax.at(MaxCOV, g, COV)
+        np.fmin.at(MinCOV, g, COV)
+        Remove = Active & (MaxCOV - MinCOV > 10)
+        # Remove the replicate with minimum COV after leaving it out (the later one on ties). 
+        Candidate = Remove[g] & ~np.isnan(COV)
+        Sort = np.lexsort((-Position[Rows][Candidate], COV[Candidate], g[Candidate]))
+        First = np.r_[True, np.diff(g[Candidate][Sort]) != 0] if len(Sort) else np.zeros(0, dtype=bool)
+        Keep[Rows[Candidate][Sort][First]] = False
+        # Continue with the groups which still have more than 3 replicates. 
+        Active = Remove & (np.bincount(GroupID[Keep], minlength=NumGroups) > 3)
+    # Return the results. 
+    return Keep
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Benchmark_Database_Analysis(NumRows=50000, Seed=0):
+    """
+    This function measures the time of combining the replicates ("Aggregate_Replicates") for a synthetic database, 
+    with 4 aging levels and 2 to 6 replicates per group (about 20% of the groups have more than 3 replicates). 
+
+    :param NumRows: Number of the records in the synthetic database. 
+    :param Seed: Seed of the random number generator. 
+    :return: A dictionary of the number of records, number of groups, and the elapsed time (seconds). 
+    """
+    import time
+    rng = np.random.default_rng(Seed)
+    NumRep = rng.choice([2, 3, 3, 3, 4, 5, 6], size=NumRows // 3)
+    NumRep = NumRep[:np.searchsorted(np.cumsum(NumRep), NumRows) + 1]
+    Group = np.repeat(np.arange(len(NumRep)), NumRep)[:NumRows]
+    data = pd.DataFrame({'Bnumber': 1000 + Group // 4, 
+                         'Lab_Aging': np.array(['ORG', 'RTFO', '1PAV', '2PAV'])[Group % 4]})
+    for col in Analysis_Columns:
+        data[col] = rng.normal(1.0, 0.1, size=len(Group)) * (1 + (Group % 7))
+    data = data.sample(frac=1, random_state=Seed)           # Records are not sorted in the database. 
+    Start = time.perf_counter()
+    Res, _ = Aggregate_Replicates(data, Analysis_Columns, Analysis_Labels)
+    Elapsed = time.perf_counter() - Start
+    # Return the results. 
+    return {'NumRows': len(data), 'NumGroups': len(Res), 'Time': Elapsed}
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Check_Incremental_Analysis(NumRows=3000, Seed=0):
+    """
+    This function checks that the incremental update of the combined results ("Update_Analysis_Table") gives the same 
+    table as the full regeneration, for each engine. A synthetic database is created in a temporary folder, including 
+    groups with a missing B-number or lab aging. After the first analysis, some records are updated, deleted, and 
+    added (also in the groups with missing keys), and then the incrementally updated table is compared with the 
+    regenerated one. 
+
+    :param NumRows: Number of the records in the synthetic database. 
+    :param Seed: Seed of the random number generator. 
+    :return: A dictionary of the engines, True if the incremental and regenerated tables are the same. 
+    """
+    import tempfile
+    rng = np.random.default_rng(Seed)
+    Group = rng.integers(0, NumRows // 4, size=NumRows)
+    Bnumber = np.where(Group % 11 == 0, None, 1000 + Group // 4).tolist()
+    LabAging = np.array(['ORG', 'RTFO', '1PAV', None], dtype=object)[Group % 4].tolist()
+    Values = rng.normal(1.0, 0.1, size=(NumRows, len(Analysis_Columns))) * (1 + (Group % 7))[:, None]
+    Columns = ['Bnumber', 'Lab_Aging', 'RepNumber', 'IsOutlier'] + Analysis_Columns
+    Insert = f"INSERT INTO FTIR ({', '.join(Columns)}) VALUES ({', '.join(['?'] * len(Columns))})"
+    Rows = [(b, a, 1, 0, *v) for b, a, v in zip(Bnumber, LabAging, Values.tolist())]
+    Results = {}
+    for Engine in ['pandas', 'sql', 'stream']:
+        with tempfile.TemporaryDirectory() as Folder:
+            conn, cursor = Create_SQLite3_DB_Connect(os.path.join(Folder, 'Check.db'))
+            cursor.executemany(Insert, Rows[:-NumRows // 10])
+            conn.commit()
+            Update_Analysis_Table(conn, cursor, Full=True, Engine=Engine)
+            # Change the records (the groups with missing keys are included). 
+            cursor.execute("UPDATE FTIR SET ICO_Baseline = ICO_Baseline * 3 WHERE id % 7 = 0")
+            cursor.execute("UPDATE FTIR SET IsOutlier = 1 WHERE id % 13 = 0")
+            cursor.execute("UPDATE FTIR SET Lab_Aging = NULL WHERE id % 29 = 0")
+            cursor.execute("DELETE FROM FTIR WHERE id % 17 = 0")
+            cursor.executemany(Insert, Rows[-NumRows // 10:])
+            conn.commit()
+            Update_Analysis_Table(conn, cursor, Engine=Engine)
+            Incremental = sorted(cursor.execute("SELECT * FROM FTIR_Analysis_DB").fetchall(), key=repr)
+            Update_Analysis_Table(conn, cursor, Full=True, Engine=Engine)
+            Regenerated = sorted(cursor.execute("SELECT * FROM FTIR_Analysis_DB").fetchall(), key=repr)
+            conn.close()
+        Results[Engine] = Incremental == Regenerated
+    # Return the results. 
+    return Results
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Benchmark_Excel_Export(NumRows=10000, Seed=0):
+    """
+    This function measures the time of exporting a synthetic database of individual records to Excel 
+    ("Export_Records_Excel"), using the normal workbook (before) and the write-only workbook (after). 
+
+    :param NumRows: Number of the records in the synthetic database. 
+    :param Seed: Seed of the random number generator. 
+    :return: A dictionary of the number of records, and the elapsed time (seconds) of each workbook. 
+    """
+    import time
+    import tempfile
+    rng = np.random.default_rng(Seed)
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE FTIR ({', '.join(Export_Columns)})")
+    Records = []
+    for i in range(NumRows):
+        Records.append([i + 1, 1000 + i // 12, ['ORG', 'RTFO', '1PAV', '2PAV'][(i // 3) % 4], i % 3 + 1] + 
+                       [f'Sample_{i + 1}.dpt', 'C:\\FTIR\\Data', int(rng.random() < 0.1), 'ALS'] + 
+                       [float(x) for x in rng.random(3)] + ['Peak'] + [float(x) for x in rng.random(27)])
+    conn.executemany(f"INSERT INTO FTIR VALUES ({', '.join(['?'] * len(Export_Columns))})", Records)
+    del Records
+    Results = {'NumRows': NumRows}
+    with tempfile.TemporaryDirectory() as Folder:
+        for Name, WriteOnly in [('Normal', False), ('WriteOnly', True)]:
+            cursor = conn.execute(f"SELECT {', '.join(Export_Columns)} FROM FTIR")
+            Start = time.perf_counter()
+            Export_Records_Excel(cursor, Export_Labels, os.path.join(Folder, f'{Name}.xlsx'), WriteOnly=WriteOnly)
+            Results[Name] = time.perf_counter() - Start
+    conn.close()
+    # Return the results. 
+    return Results
 # ======================================================================================================================
 # ======================================================================================================================
 # ======================================================================================================================
 
 
-if __name__ == '__main__':
+if __name__ == '__main__' and '--benchmark' in sys.argv:
+    Results = Benchmark_Database_Analysis()
+    print(f'Combined {Results["NumRows"]} records into {Results["NumGroups"]} groups in {Results["Time"]:.2f} s')
+    Results = Benchmark_Excel_Export()
+    print(f'Exported {Results["NumRows"]} records to Excel in {Results["Normal"]:.2f} s (normal workbook) and ' + 
+          f'{Results["WriteOnly"]:.2f} s (write-only workbook)')
+elif __name__ == '__main__' and '--check' in sys.argv:
+    for Engine, Same in Check_Incremental_Analysis().items():
+        print(f'Incremental analysis ({Engine} engine): ' + ('same as the full regeneration' if Same else 'DIFFERENT'))
+elif __name__ == '__main__':
     app = QApplication(sys.argv)
     # Connect to a SQL database.
     conn = sqlite3.connect(
@@ -17,12 +17,15 @@ from PyQt5.QtGui import QPixmap, QFont, QRegExpValidator, QDoubleValidator, QInt
 from PyQt5.QtCore import Qt, QRegExp
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from scripts.Sub02_CreateNewSQLTable import Get_DB_SummaryData, Append_to_Database, Get_Info_From_Name, Update_Row_in_Database
+from scripts.Sub02_CreateNewSQLTable import Get_DB_SummaryData, Append_to_Database, Get_Info_From_Name, \
+    Update_Row_in_Database, Save_Diagnostics, Read_Spectra_Arrays, Get_DB_Settings
 from scripts.Sub04_FTIR_Analysis_Functions import Read_FTIR_Data, Baseline_Adjustment_ALS, Normalization_Method_B, \
     Calc_Aliphatic_Area, Calc_Carbonyl_Area, Calc_Sulfoxide_Area, Array_to_Binary, Binary_to_Array, Find_Peaks, \
     Normalization_Method_A, Normalization_Method_B, Normalization_Method_C, Normalization_Method_D 
 from scripts.Sub05_ReviewPage import DB_ReviewPage
-from scripts.Sub07_Deconvolution_Analysis import gaussian_bell, Run_Deconvolution
+from scripts.Sub07_Deconvolution_Analysis import Run_Deconvolution, Get_Gaussian_Curves, Summarize_Diagnostics, \
+    Get_Deconvolution_Settings
+from scripts.Sub11_Region_Highlight import Region_Highlighter
 
 
 class Revise_FTIR_AnalysisPage(QMainWindow):
@@ -42,20 +45,17 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.stack = stack
         self.shared_data = shared_data
         self.IDnumber = shared_data.data          # ID number of the binder of interest. 
+        self.Gaussian_Curves = {}                 # Cache of the evaluated Gaussian curves of the current record. 
+        self.Deconv = {}                          # Results of the deconvolution, if it is re-run for this record. 
         self.Columns2Fetch = [
-            'Wavenumber', 'Wavenumber_shape', 'Wavenumber_dtype', 'Absorption', 'Absorption_shape', 'Absorption_dtype',
             'Carbonyl_Min_Wavenumber', 'Carbonyl_Max_Wavenumber', 
             'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber', 
             'Aliphatic_Min_Wavenumber', 'Aliphatic_Max_Wavenumber', 'Normalization_Coeff',
-            'Bnumber', 'Lab_Aging', 'RepNumber', 
-            'Deconv_CarbonylList', 'Deconv_CarbonylList_shape', 'Deconv_CarbonylList_dtype', 
-            'Deconv_SulfoxideList', 'Deconv_SulfoxideList_shape', 'Deconv_SulfoxideList_dtype', 
-            'Deconv_AliphaticList', 'Deconv_AliphaticList_shape', 'Deconv_AliphaticList_dtype', 
-            'Deconv_ICO', 'Deconv_ISO', 
-            'Deconv_GaussianList', 'Deconv_GaussianList_shape', 'Deconv_GaussianList_dtype', 
-            'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter', 'Normalization_Method', 'Normalization_Coeff',
-            'RawWavenumber', 'RawWavenumber_shape', 'RawWavenumber_dtype',
-            'RawAbsorbance', 'RawAbsorbance_shape', 'RawAbsorbance_dtype']
+            'Bnumber', 'Lab_Aging', 'RepNumber', 'Deconv_ICO', 'Deconv_ISO', 
+            'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter', 'Normalization_Method', 'Normalization_Coeff']
+        self.Arrays2Fetch = [
+            'Wavenumber', 'Absorption', 'Deconv_CarbonylList', 'Deconv_SulfoxideList', 'Deconv_AliphaticList', 
+            'Deconv_GaussianList', 'RawWavenumber', 'RawAbsorbance']
         self.PushButtonStyle = {
             "General": """
         QPushButton:enabled {
@@ -241,6 +241,7 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.fig.set_facecolor("#f0f0f0")
         self.canvas = FigureCanvas(self.fig)
         self.axes = [self.fig.add_subplot(2, 2, i + 1) for i in range(4)]
+        self.Highlighter = Region_Highlighter(self.canvas, self.axes)
         # Add the labels to the axes. 
         Titles = ['Wide range data', 'Carbonyl area', 'Sulfoxide area', 'Aliphatic area']
         for i in range(4):
@@ -403,36 +404,31 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         super().showEvent(event)
         
         # Retrieve the data from the database. 
-        self.cursor.execute(f"SELECT {', '.join(self.Columns2Fetch)} FROM FTIR WHERE id = ?", 
-                            (self.shared_data.data,))
+        self.cursor.execute(f"SELECT {', '.join(self.Columns2Fetch)} FROM FTIR WHERE id = ?", (self.shared_data.data,))
         row = self.cursor.fetchall()[0]
-        # Extract the data. 
-        self.X = Binary_to_Array(row[0], row[1], row[2])
-        self.Y = Binary_to_Array(row[3], row[4], row[5])
-        self.XCmin = row[6]
-        self.XCmax = row[7]
-        self.XSmin = row[8]
-        self.XSmax = row[9]
-        self.XAmin = row[10]
-        self.XAmax = row[11]
-        self.NormCoeff = row[12]
-        self.Bnumber = row[13]
-        self.LabAging = row[14]
-        self.RepNumber = row[15]
-        self.Carbonyl_Gaussians  = Binary_to_Array(row[16], row[17], row[18])
-        self.Sulfoxide_Gaussians = Binary_to_Array(row[19], row[20], row[21])
-        self.Aliphatic_Gaussians = Binary_to_Array(row[22], row[23], row[24])
-        self.GaussianList        = Binary_to_Array(row[27], row[28], row[29])
-        self.ALS_Lambda     = row[30]
-        self.ALS_Ratio      = row[31]
-        self.ALS_NumIter    = row[32]
-        self.Normalization_Method = row[33]
-        self.Normalization_Coeff = row[34]
-        RawX = Binary_to_Array(row[35], row[36], row[37])
-        RawY = Binary_to_Array(row[38], row[39], row[40])
+        self.Gaussian_Curves = {}       # New record, reset the cache of the Gaussian curves. 
+        self.Deconv = {}                # New record, reset the deconvolution results. 
+        # Extract the data (the arrays are read from the "Spectra" table or the external store). 
+        self.X, self.Y, self.Carbonyl_Gaussians, self.Sulfoxide_Gaussians, self.Aliphatic_Gaussians, \
+            self.GaussianList, RawX, RawY = Read_Spectra_Arrays(self.cursor, self.shared_data.data, self.Arrays2Fetch)
+        self.XCmin = row[0]
+        self.XCmax = row[1]
+        self.XSmin = row[2]
+        self.XSmax = row[3]
+        self.XAmin = row[4]
+        self.XAmax = row[5]
+        self.NormCoeff = row[6]
+        self.Bnumber = row[7]
+        self.LabAging = row[8]
+        self.RepNumber = row[9]
+        self.ALS_Lambda     = row[12]
+        self.ALS_Ratio      = row[13]
+        self.ALS_NumIter    = row[14]
+        self.Normalization_Method = row[15]
+        self.Normalization_Coeff = row[16]
         self.RawData = np.column_stack((RawX, RawY))
-        ICO   = row[25]
-        ISO   = row[26]
+        ICO   = row[10]
+        ISO   = row[11]
         # --------------------------------------------------------------------------------------------------------------
         # Adding the Fitted Gaussians to the table. 
         self.GL_Table.clearSelection()
@@ -528,18 +524,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.axes[1].plot(self.X[CIndex], self.Y[CIndex], marker='o', ms=3, color='k', ls='-', label='FTIR data')
         self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.2, 
                                   label='Carbonyl Area')
-        Xgaussian = np.linspace(1600, 1800, num=1000)
-        for ii in range(self.Carbonyl_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, self.Carbonyl_Gaussians[ii, 0], 
-                                                           self.Carbonyl_Gaussians[ii, 1], 
-                                                           self.Carbonyl_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, self.Carbonyl_Gaussians[ii, 0], 
-                                                           self.Carbonyl_Gaussians[ii, 1], 
-                                                           self.Carbonyl_Gaussians[ii, 2]), 
-                                ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1600, 1800, self.Carbonyl_Gaussians)
+        Lines = self.axes[1].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[1].legend()
         self.axes[1].invert_xaxis()
         # For Sulfoxide plot
@@ -553,18 +541,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.axes[2].plot(self.X[SIndex], self.Y[SIndex], marker='o', ms=3, color='k', ls='-', label='FTIR data')
         self.axes[2].fill_between(self.XS[self.SIndex2], self.YS[self.SIndex2], 0, color='y', alpha=0.2, 
                                   label='Sulfoxide Area')
-        Xgaussian = np.linspace(940, 1100, num=1000)
-        for ii in range(self.Sulfoxide_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, self.Sulfoxide_Gaussians[ii, 0], 
-                                                           self.Sulfoxide_Gaussians[ii, 1], 
-                                                           self.Sulfoxide_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, self.Sulfoxide_Gaussians[ii, 0], 
-                                                           self.Sulfoxide_Gaussians[ii, 1], 
-                                                           self.Sulfoxide_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 940, 1100, self.Sulfoxide_Gaussians)
+        Lines = self.axes[2].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[2].legend()
         self.axes[2].invert_xaxis()
         # For Aliphatic plot
@@ -578,18 +558,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.axes[3].plot(self.X[AIndex], self.Y[AIndex], marker='o', ms=3, color='k', ls='-', label='FTIR data')
         self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.2, 
                                   label='Aliphatic Area')
-        Xgaussian = np.linspace(1300, 1600, num=1000)
-        for ii in range(self.Aliphatic_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, self.Aliphatic_Gaussians[ii, 0], 
-                                                           self.Aliphatic_Gaussians[ii, 1], 
-                                                           self.Aliphatic_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, self.Aliphatic_Gaussians[ii, 0], 
-                                                           self.Aliphatic_Gaussians[ii, 1], 
-                                                           self.Aliphatic_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1300, 1600, self.Aliphatic_Gaussians)
+        Lines = self.axes[3].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[3].legend()
         self.axes[3].invert_xaxis()
         # Redraw the canvas
@@ -609,9 +581,6 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         return
     # ------------------------------------------------------------------------------------------------------------------
     def update_Carbonyl_min(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[1].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XC - value))
         if self.XCmaxIndx > idx + 1:
@@ -620,17 +589,11 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             idx = self.XCminIndx
         self.spinboxes[0].setValue(self.XC[idx])
         self.spinboxes[1].setRange(self.XC[self.XCminIndx + 1], 1800)
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XCminIndx, self.XCmaxIndx + 1)
-        self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.1, 
-                                  label='Carbonyl Area')
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(1, self.XC[self.CIndex2], self.YC[self.CIndex2], color='r', label='Carbonyl Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Carbonyl_max(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[1].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XC - value))
         if self.XCminIndx < idx - 1:
@@ -639,17 +602,11 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             idx = self.XCmaxIndx
         self.spinboxes[1].setValue(self.XC[idx])
         self.spinboxes[0].setRange(1600, self.XC[self.XCmaxIndx - 1])
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XCminIndx, self.XCmaxIndx + 1)
-        self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.1, 
-                                  label='Carbonyl Area')
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(1, self.XC[self.CIndex2], self.YC[self.CIndex2], color='r', label='Carbonyl Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Sulfoxide_min(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[2].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XS - value))
         if self.XSmaxIndx > idx + 1:
@@ -658,17 +615,11 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             idx = self.XSminIndx
         self.spinboxes[2].setValue(self.XS[idx])
         self.spinboxes[3].setRange(self.XS[self.XSminIndx + 1], 1100)
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XSminIndx, self.XSmaxIndx + 1)
-        self.axes[2].fill_between(self.XS[self.CIndex2], self.YS[self.CIndex2], 0, color='y', alpha=0.1, 
-                                  label='Sulfoxide Area')
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(2, self.XS[self.CIndex2], self.YS[self.CIndex2], color='y', label='Sulfoxide Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Sulfoxide_max(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[2].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XS - value))
         if self.XSminIndx < idx - 1:
@@ -677,17 +628,11 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             idx = self.XSmaxIndx
         self.spinboxes[3].setValue(self.XS[idx])
         self.spinboxes[2].setRange(940, self.XS[self.XSmaxIndx - 1])
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.CIndex2 = np.arange(self.XSminIndx, self.XSmaxIndx + 1)
-        self.axes[2].fill_between(self.XS[self.CIndex2], self.YS[self.CIndex2], 0, color='y', alpha=0.1, 
-                                  label='Sulfoxide Area')
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(2, self.XS[self.CIndex2], self.YS[self.CIndex2], color='y', label='Sulfoxide Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Aliphatic_min(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[3].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XA - value))
         if self.XAmaxIndx > idx + 1:
@@ -696,17 +641,11 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             idx = self.XAminIndx
         self.spinboxes[4].setValue(self.XA[idx])
         self.spinboxes[5].setRange(self.XA[self.XAminIndx + 1], 1600)
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.AIndex2 = np.arange(self.XAminIndx, self.XAmaxIndx + 1)
-        self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.1, 
-                                  label='Aliphatic Area')
-        # Redraw the canvas
-        self.canvas.draw()
+        self.Highlighter.Update(3, self.XA[self.AIndex2], self.YA[self.AIndex2], color='g', label='Aliphatic Area')
     # ------------------------------------------------------------------------------------------------------------------
     def update_Aliphatic_max(self, value):
-        # Clear the highlighted area. 
-        for coll in self.axes[3].collections[:]:
-            coll.remove()
         # Update the minimum value for the max. 
         idx = np.argmin(np.abs(self.XA - value))
         if self.XAminIndx < idx - 1:
@@ -715,12 +654,9 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             idx = self.XAmaxIndx
         self.spinboxes[5].setValue(self.XA[idx])
         self.spinboxes[4].setRange(1300, self.XA[self.XAmaxIndx - 1])
-        # Add the updated highlight region.
+        # Add the updated highlight region (only the highlight is redrawn, see "Region_Highlighter").
         self.AIndex2 = np.arange(self.XAminIndx, self.XAmaxIndx + 1)
-        self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.1, 
-                                  label='Aliphatic Area')
-        # Redraw the canvas.
-        self.canvas.draw()
+        self.Highlighter.Update(3, self.XA[self.AIndex2], self.YA[self.AIndex2], color='g', label='Aliphatic Area')
     # ------------------------------------------------------------------------------------------------------------------
     def SaveExit_Button_Function(self):
         # This function only saves the current progress, and exits the already started loop. 
@@ -760,13 +696,14 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         ISO_base  = SArea_base / AArea_base
         ISO_tang  = SArea_tang / AArea_tang
         # Save the results to the database. 
-        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X)
-        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y)
+        Float32 = Get_DB_Settings()['Array_Float32']      # Store the arrays as float32 (see "Array_to_Binary").
+        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X, Float32=Float32)
+        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y, Float32=Float32)
         # Convert Arrays to binary.
-        Carr, Cshape, Ctype = Array_to_Binary(self.Carbonyl_Gaussians)
-        Sarr, Sshape, Stype = Array_to_Binary(self.Sulfoxide_Gaussians)
-        Aarr, Ashape, Atype = Array_to_Binary(self.Aliphatic_Gaussians)
-        Garr, Gshape, Gtype = Array_to_Binary(self.GaussianList)
+        Carr, Cshape, Ctype = Array_to_Binary(self.Carbonyl_Gaussians, Float32=Float32)
+        Sarr, Sshape, Stype = Array_to_Binary(self.Sulfoxide_Gaussians, Float32=Float32)
+        Aarr, Ashape, Atype = Array_to_Binary(self.Aliphatic_Gaussians, Float32=Float32)
+        Garr, Gshape, Gtype = Array_to_Binary(self.GaussianList, Float32=Float32)
         # Recalculate the ICO and ISO indices. 
         CArea = (self.Carbonyl_Gaussians[:, 2] * np.sqrt(2 * np.pi) * np.abs(self.Carbonyl_Gaussians[:, 1])).sum()
         SArea = (self.Sulfoxide_Gaussians[:, 2] * np.sqrt(2 * np.pi) * np.abs(self.Sulfoxide_Gaussians[:, 1])).sum()
@@ -797,6 +734,7 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             "ALS_Lambda": self.ALS_Lambda, "ALS_Ratio": self.ALS_Ratio, "ALS_NumIter": self.ALS_NumIter,
             "Normalization_Method": self.Normalization_Method.split(" (4")[0].replace(' ', '_'), 
             "Normalization_Coeff": self.Normalization_Coeff})
+        self.Save_Deconv_Diagnostics(self.shared_data.data)     # Save the deconvolution diagnostics (if re-run). 
         # --------------------------------------------------------------------------------------------------------------
         # Return to the stack widget 2. 
         self.stack.setCurrentIndex(1)
@@ -836,8 +774,9 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         ISO_base  = SArea_base / AArea_base
         ISO_tang  = SArea_tang / AArea_tang
         # Save the results to the database. 
-        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X)
-        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y)
+        Float32 = Get_DB_Settings()['Array_Float32']      # Store the arrays as float32 (see "Array_to_Binary").
+        Xbinary, Xshape, Xdtype = Array_to_Binary(self.X, Float32=Float32)
+        Ybinary, Yshape, Ydtype = Array_to_Binary(self.Y, Float32=Float32)
         # Find the Aliphatic peaks.
         XPeak, YPeak, Prominence, XLeft, XRight = Find_Peaks(np.hstack((self.X.reshape(-1, 1), self.Y.reshape(-1, 1))), 
                                                              [XAmin, XAmax], 0.001)
@@ -854,10 +793,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             XPeak = np.array(XPeak)[MaxIndex]
             YPeak = np.array(YPeak)[MaxIndex]
         # Convert Arrays to binary.
-        Carr, Cshape, Ctype = Array_to_Binary(self.Carbonyl_Gaussians)
-        Sarr, Sshape, Stype = Array_to_Binary(self.Sulfoxide_Gaussians)
-        Aarr, Ashape, Atype = Array_to_Binary(self.Aliphatic_Gaussians)
-        Garr, Gshape, Gtype = Array_to_Binary(self.GaussianList)
+        Carr, Cshape, Ctype = Array_to_Binary(self.Carbonyl_Gaussians, Float32=Float32)
+        Sarr, Sshape, Stype = Array_to_Binary(self.Sulfoxide_Gaussians, Float32=Float32)
+        Aarr, Ashape, Atype = Array_to_Binary(self.Aliphatic_Gaussians, Float32=Float32)
+        Garr, Gshape, Gtype = Array_to_Binary(self.GaussianList, Float32=Float32)
         # Recalculate the ICO and ISO indices. 
         CArea = (self.Carbonyl_Gaussians[:, 2] * np.sqrt(2 * np.pi) * np.abs(self.Carbonyl_Gaussians[:, 1])).sum()
         SArea = (self.Sulfoxide_Gaussians[:, 2] * np.sqrt(2 * np.pi) * np.abs(self.Sulfoxide_Gaussians[:, 1])).sum()
@@ -893,12 +832,27 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
             "ALS_Lambda": self.ALS_Lambda, "ALS_Ratio": self.ALS_Ratio, "ALS_NumIter": self.ALS_NumIter,
             "Normalization_Method": self.Normalization_Method.split(" (4")[0].replace(' ', '_'), 
             "Normalization_Coeff": self.Normalization_Coeff})
+        self.Save_Deconv_Diagnostics(self.shared_data.data)     # Save the deconvolution diagnostics (if re-run). 
         # --------------------------------------------------------------------------------------------------------------
         # Return to the stack widget 2. 
         self.stack.setCurrentIndex(1)
         # Return Nothing.
         return
     # ------------------------------------------------------------------------------------------------------------------
+    def Save_Deconv_Diagnostics(self, idx):
+        """
+        This function saves the diagnostics of the deconvolution for the record "idx", if the deconvolution was re-run. 
+        """
+        if 'Diagnostics' not in self.Deconv:
+            return
+        Float32 = Get_DB_Settings()['Array_Float32']      # Store the arrays as float32 (see "Array_to_Binary").
+        Dbinary, Dshape, Ddtype = Array_to_Binary(self.Deconv['Diagnostics'], Float32=Float32)
+        Save_Diagnostics(self.conn, self.cursor, idx, {
+            **Summarize_Diagnostics(self.Deconv), 
+            "Diagnostics": Dbinary, "Diagnostics_shape": Dshape, "Diagnostics_dtype": Ddtype})
+        # Return Nothing.
+        return
+    # ------------------------------------------------------------------------------------------------------------------
     def Check_EndofLoop(self):
         """
         This function only checks if all the required files are analyzed, and if the analysis is finished, it reactivate
@@ -1252,7 +1206,7 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.Y = Y
         # --------------------------------------------------------------------------------------------------------------
         # Re-Run the deconvolution method and get the results. 
-        Deconv = Run_Deconvolution(X, Y)
+        Deconv = Run_Deconvolution(X, Y, Joint_Refinement=Get_Deconvolution_Settings()['Joint_Refinement'])
         self.Deconv = Deconv.copy()
         self.Carbonyl_Gaussians  = Deconv['Carbonyl_Gaussians']
         self.Sulfoxide_Gaussians = Deconv['Sulfoxide_Gaussians']
@@ -1306,18 +1260,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.axes[1].plot(data[CIndex, 0], data[CIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR data')
         self.axes[1].fill_between(self.XC[self.CIndex2], self.YC[self.CIndex2], 0, color='r', alpha=0.2, 
                                   label='Carbonyl Area')
-        Xgaussian = np.linspace(1600, 1800, num=1000)
-        for ii in range(self.Carbonyl_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, self.Carbonyl_Gaussians[ii, 0], 
-                                                           self.Carbonyl_Gaussians[ii, 1], 
-                                                           self.Carbonyl_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[1].plot(Xgaussian, gaussian_bell(Xgaussian, self.Carbonyl_Gaussians[ii, 0], 
-                                                           self.Carbonyl_Gaussians[ii, 1], 
-                                                           self.Carbonyl_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1600, 1800, self.Carbonyl_Gaussians)
+        Lines = self.axes[1].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[1].legend()
         self.axes[1].invert_xaxis()
         # For Sulfoxide plot
@@ -1333,18 +1279,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.axes[2].plot(data[SIndex, 0], data[SIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR data')
         self.axes[2].fill_between(self.XS[self.SIndex2], self.YS[self.SIndex2], 0, color='y', alpha=0.2, 
                                   label='Sulfoxide Area')
-        Xgaussian = np.linspace(940, 1100, num=1000)
-        for ii in range(self.Sulfoxide_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, self.Sulfoxide_Gaussians[ii, 0], 
-                                                           self.Sulfoxide_Gaussians[ii, 1], 
-                                                           self.Sulfoxide_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[2].plot(Xgaussian, gaussian_bell(Xgaussian, self.Sulfoxide_Gaussians[ii, 0], 
-                                                           self.Sulfoxide_Gaussians[ii, 1], 
-                                                           self.Sulfoxide_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 940, 1100, self.Sulfoxide_Gaussians)
+        Lines = self.axes[2].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[2].legend()
         self.axes[2].invert_xaxis()
         # For Aliphatic plot
@@ -1360,17 +1298,10 @@ class Revise_FTIR_AnalysisPage(QMainWindow):
         self.axes[3].plot(data[AIndex, 0], data[AIndex, 1], marker='o', ms=3, color='k', ls='-', label='FTIR data')
         self.axes[3].fill_between(self.XA[self.AIndex2], self.YA[self.AIndex2], 0, color='g', alpha=0.2, 
                                   label='Aliphatic Area')
-        Xgaussian = np.linspace(1300, 1600, num=1000)
-        for ii in range(self.Aliphatic_Gaussians.shape[0]):
-            if ii == 0:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, self.Aliphatic_Gaussians[ii, 0], 
-                                                        self.Aliphatic_Gaussians[ii, 1], self.Aliphatic_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r', label='Fitted Gaussians')
-            else:
-                self.axes[3].plot(Xgaussian, gaussian_bell(Xgaussian, self.Aliphatic_Gaussians[ii, 0], 
-                                                           self.Aliphatic_Gaussians[ii, 1], 
-                                                           self.Aliphatic_Gaussians[ii, 2]), 
-                                  ls='--', lw=0.5, color='r')
+        Xgaussian, Curves = Get_Gaussian_Curves(self.Gaussian_Curves, 1300, 1600, self.Aliphatic_Gaussians)
+        Lines = self.axes[3].plot(Xgaussian, Curves, ls='--', lw=0.5, color='r')
+        if len(Lines) > 0:
+            Lines[0].set_label('Fitted Gaussians')
         self.axes[3].legend()
         self.axes[3].invert_xaxis()
         # Redraw the canvas
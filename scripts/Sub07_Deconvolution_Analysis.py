@@ -7,19 +7,26 @@
 # Importing the required libraries.
 import os
 import sys
+import json
 import pickle
 import fnmatch
 import itertools
+import time
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy import sparse
 from scipy.signal import find_peaks
-from scipy.optimize import curve_fit, root_scalar
+from scipy.optimize import curve_fit, root_scalar, least_squares
 from scipy.interpolate import interp1d
 
 
-def Run_Deconvolution(X, Y):
+# Columns of the diagnostics array, one row per Gaussian fitting attempt. 
+Diagnostics_Columns = ['Mu', 'Trials', 'NFev', 'Sigma_Guess', 'Accepted', 'ResidualMax_Before', 'ResidualMax_After', 
+                       'Elapsed_Time']
+
+
+def Run_Deconvolution(X, Y, Seed_Gaussians=None, Targeted=False, Guard_Margin=75, Joint_Refinement=False):
     """
     This is the main function to perform the deconvolution of the FTIR result spectrum. For this purpose, the code will 
     try to fit Gaussian functions to highest peak of the spectrum, and continue this process after subtracting the 
@@ -30,11 +37,25 @@ def Run_Deconvolution(X, Y):
     It is recoemmended that the input is baseline adjusted and normalized to 0.15 for the wavenumbers in the range of 
     600 to 2000 (1/cm). Therefore, the algorithm will ignore any peak less than 0.008 (except for search in Carbonyl 
     area).
+    If a seed list of Gaussians is provided (e.g., the "Deconv_GaussianList" of another replicate of the same binder 
+    and aging level), the greedy peak fitting is the same, but the seed Gaussian at the same peak (if any) is used as 
+    the initial guess of each fit, so the fits need fewer iterations (see "Compare_Seeded_Deconvolution"). 
+    In the targeted mode, only the Carbonyl (1660-1720), Sulfoxide (970-1070), and Aliphatic (1350-1525) bands are 
+    deconvoluted, each extended by a guard margin to also capture the overlapping neighbor peaks. This mode is much 
+    faster and the ICO and ISO indices are almost the same, but the Gaussian list will only cover these bands. 
+    Optionally, all the fitted Gaussians can be refined together at the end (Mu, Sigma, and Amplitude), which reduces 
+    the bias of the greedy fitting where the peaks are overlapping. 
 
     :param X: An array of the sorted wavenumbers (1/cm). 
     :param Y: An array of the absorbance values.
-    :return: A dictionary of detailed results, including a list of fitted Gaussians, ICO and ISO indices, etc. 
+    :param Seed_Gaussians: An array of the initial Gaussians [Mu, Sigma, Amplitude] to start with, defaults to None
+    :param Targeted: If True, only the Carbonyl, Sulfoxide, and Aliphatic bands are deconvoluted, defaults to False
+    :param Guard_Margin: The margin (1/cm) added to each band in the targeted mode, defaults to 75
+    :param Joint_Refinement: If True, all the Gaussians are refined together at the end, defaults to False
+    :return: A dictionary of detailed results, including a list of fitted Gaussians, ICO and ISO indices, diagnostics 
+    of all fitting attempts, etc. 
     """
+    Start = time.perf_counter()
     # First of all, take an slice of the data, with wavenumbers between 550 to 2000.
     Index = np.where((X >= 550) & (X <= 2000))[0]
     X = X[Index]
@@ -42,12 +63,37 @@ def Run_Deconvolution(X, Y):
     # ------------------------------------------------------------------------------------------------------------------
     # Define the required variables. 
     Gaussian_List = []
+    Diagnostics   = []          # Diagnostics of each Gaussian fitting attempt (see "Diagnostics_Columns").
     Xvalues = X
     Yvalues = Y
     MaxPeakFlag, CarbonylAreaSearchFlag = False, False
     General_Xmin, General_Xmax = 600, 2000
     CIndex  = np.where((X >= 1600) & (X <= 1800))[0]
     # ------------------------------------------------------------------------------------------------------------------
+    # Only keep the valid seed Gaussians (used as the initial guess of the fits at the same peaks). 
+    if Seed_Gaussians is not None:
+        Seed_Gaussians = np.array(Seed_Gaussians, dtype=float).reshape(-1, 3)
+        Seed_Gaussians[:, 1] = np.abs(Seed_Gaussians[:, 1])
+        Seed_Gaussians = Seed_Gaussians[np.isfinite(Seed_Gaussians).all(axis=1) & (Seed_Gaussians[:, 1] > 0), :]
+    # ------------------------------------------------------------------------------------------------------------------
+    # In targeted mode, only fit the Gaussians to the peaks in the bands of interest (plus the guard margin). 
+    if Targeted:
+        Bands = [[1660 - Guard_Margin, 1720 + Guard_Margin, 0.0015],       # Carbonyl band (same as carbonyl search).
+                 [970  - Guard_Margin, 1070 + Guard_Margin, 0.008],        # Sulfoxide band.
+                 [1350 - Guard_Margin, 1525 + Guard_Margin, 0.008]]        # Aliphatic band.
+        for Band_Xmin, Band_Xmax, Threshold in Bands:
+            BandRange = np.where((X > Band_Xmin) & (X < Band_Xmax))[0]
+            while Yvalues[BandRange].max() >= Threshold:
+                try:
+                    Gaussian_List, Yvalues = Fit_Gaussian_with_Diagnostics(Xvalues, Yvalues, Gaussian_List, 
+                                                                           General_Xmin, General_Xmax, Diagnostics, 
+                                                                           Peak_Range=[Band_Xmin, Band_Xmax], 
+                                                                           Seed_Gaussians=Seed_Gaussians)
+                except:
+                    break
+        # Skip the general search over the whole range. 
+        MaxPeakFlag, CarbonylAreaSearchFlag = True, True
+    # ------------------------------------------------------------------------------------------------------------------
     # Start the algorithm for deconvolution. 
     while True:
         # First, check for the maximum peak value. 
@@ -59,21 +105,33 @@ def Run_Deconvolution(X, Y):
             break
         # Otherwise, continue fitting Gaussian to the peaks. 
         try:
-            Gaussian_List, Yvalues = Fit_Gaussian_to_Biggest_Peak(Xvalues, Yvalues, Gaussian_List, 
-                                                                  General_Xmin, General_Xmax)
+            Gaussian_List, Yvalues = Fit_Gaussian_with_Diagnostics(Xvalues, Yvalues, Gaussian_List, 
+                                                                   General_Xmin, General_Xmax, Diagnostics, 
+                                                                   Seed_Gaussians=Seed_Gaussians)
         except:
             # In case of error, perform the search on the carbonyl area. 
             while True:
                 if Yvalues[CIndex].max() < 0.0015:
                     break
                 try:
-                    Gaussian_List, Yvalues = Fit_Gaussian_to_Biggest_Peak(Xvalues, Yvalues, Gaussian_List, 1600, 1800)
+                    Gaussian_List, Yvalues = Fit_Gaussian_with_Diagnostics(Xvalues, Yvalues, Gaussian_List, 
+                                                                           1600, 1800, Diagnostics, 
+                                                                           Seed_Gaussians=Seed_Gaussians)
                 except:
                     break
             CarbonylAreaSearchFlag = True
             General_Xmin += 20
             General_Xmax -= 20
     # ------------------------------------------------------------------------------------------------------------------
+    # Refine all Gaussians together, if requested. 
+    Refinement_Residual, Refinement_NumIter = None, None
+    if Joint_Refinement:
+        try:
+            Gaussian_List, Refinement_Residual, Refinement_NumIter = Refine_All_Gaussians(X, Y, Gaussian_List)
+        except:
+            # In case of error, keep the results of the greedy fitting. 
+            pass
+    # ------------------------------------------------------------------------------------------------------------------
     # Convert the Gaussian results into an array and sort them. 
     Gaussian_List = np.array(Gaussian_List)
     Gaussian_List = Gaussian_List[Gaussian_List[:, 0].argsort(), :]         # Sort based on wavenumber (report purpose).
@@ -113,7 +171,11 @@ def Run_Deconvolution(X, Y):
            'Sulfoxide_Area'     : Sulfoxide_Area, 
            'Aliphatic_Area'     : Aliphatic_Area,
            'ISO'                : ISO, 
-           'ICO'                : ICO}
+           'ICO'                : ICO, 
+           'Refinement_Residual': Refinement_Residual, 
+           'Refinement_NumIter' : Refinement_NumIter, 
+           'Diagnostics'        : np.array(Diagnostics, dtype=float).reshape(-1, len(Diagnostics_Columns)), 
+           'Elapsed_Time'       : time.perf_counter() - Start}
     # Return the results. 
     return Res
 # ======================================================================================================================
@@ -121,16 +183,22 @@ def Run_Deconvolution(X, Y):
 # ======================================================================================================================
 
 
-def Fit_Gaussian_to_Biggest_Peak(X, Y, Gaussians, Xmin=None, Xmax=None):
+def Fit_Gaussian_to_Biggest_Peak(X, Y, Gaussians, Xmin=None, Xmax=None, Peak_Range=None, Record=None, 
+                                 Seed_Gaussians=None):
     """
     This function will first find the highest peak in the specified interval and then tries to fit a Gaussian to the 
-    data.
+    data. If the "Peak_Range" is provided, only the highest local peak inside that range is considered, while the data 
+    points around the peak are still taken from the whole interval. If a seed Gaussian is located at the same peak, 
+    its center and width are used as the initial guess of the fit (only the starting point, the fit is the same). 
 
     :param X: An array of Wavenumbers (1/cm).
     :param Y: An array of Absorptions (updated with deconvoluted results so far).
     :param Gaussians: A list of all fitted Gaussians. 
     :param Xmin: Minimum wavenumber to be considered, defaults to None
     :param Xmax: Maximum wavenumber to be considered, defaults to None
+    :param Peak_Range: The [min, max] wavenumbers to search for the peak, defaults to None
+    :param Record: A dictionary to be updated with the fitting details (see "Diagnostics_Columns"), defaults to None
+    :param Seed_Gaussians: An array of the seed Gaussians [Mu, Sigma, Amplitude], defaults to None
     :return: The updated list of Gaussians with the new fit, and the updated "Y" array after subtracting the fitted 
     Gaussian.
     """
@@ -143,7 +211,15 @@ def Fit_Gaussian_to_Biggest_Peak(X, Y, Gaussians, Xmin=None, Xmax=None):
         X = X[ValidIndex]
         Y = Y[ValidIndex]
     # Find the highest peak in the data. 
-    PeakIndex = np.argmax(Y)
+    if Peak_Range is None:
+        PeakIndex = np.argmax(Y)
+    else:
+        # Only consider the local peaks inside the peak range (not the tails of the neighbor peaks). 
+        LocalPeaks = np.where((Y[1:-1] >= Y[:-2]) & (Y[1:-1] >= Y[2:]) & 
+                              (X[1:-1] > Peak_Range[0]) & (X[1:-1] < Peak_Range[1]))[0] + 1
+        if len(LocalPeaks) == 0:
+            raise Exception("No peak was found in the peak range!")
+        PeakIndex = LocalPeaks[np.argmax(Y[LocalPeaks])]
     Xpeak = X[PeakIndex]
     Ypeak = Y[PeakIndex]
     # Try to find data points around the peak using moving average with window size of 3. 
@@ -182,9 +258,34 @@ def Fit_Gaussian_to_Biggest_Peak(X, Y, Gaussians, Xmin=None, Xmax=None):
     initial_guess = [X[PeakIndex], XX[-1] - XX[0]]
     Amplitude = Y[PeakIndex]
     NewFunc = lambda X, mu, sigma: gaussian_bell(X, mu, sigma, Amplitude)
-    for trial in range(3):
-        params, _ = curve_fit(NewFunc, XX, YY, p0=initial_guess, sigma=1/YY)
+    if Record is not None:
+        Record['Mu'] = X[PeakIndex]
+        Record['Sigma_Guess'] = initial_guess[1]
+    # If a seed Gaussian is located at the same peak, first start from the seed. The seeded fit is only accepted if 
+    #   it stays at the same peak, otherwise the normal trials are performed. 
+    Seeded = False
+    if Seed_Gaussians is not None and len(Seed_Gaussians) > 0:
+        Nearest = np.argmin(np.abs(Seed_Gaussians[:, 0] - Xpeak))
+        SeedMu, SeedSigma = Seed_Gaussians[Nearest, :2]
+        if np.abs(SeedMu - Xpeak) <= min(SeedSigma / 4, 5):
+            try:
+                params, _, Info, _, _ = curve_fit(NewFunc, XX, YY, p0=[SeedMu, SeedSigma], sigma=1/YY, 
+                                                  full_output=True)
+                Mu, Sigma = params
+                if Record is not None:
+                    Record['Trials'] += 1
+                    Record['NFev']   += Info['nfev']
+                    Record['Sigma_Guess'] = SeedSigma
+                Seeded = (np.abs(Mu - Xpeak) <= SeedSigma / 2) and (np.abs(Sigma) < 100)
+            except:
+                pass
+    for trial in range(0 if Seeded else 3):
+        params, _, Info, _, _ = curve_fit(NewFunc, XX, YY, p0=initial_guess, sigma=1/YY, full_output=True)
         Mu, Sigma = params
+        if Record is not None:
+            Record['Trials'] += 1
+            Record['NFev']   += Info['nfev']
+            Record['Sigma_Guess'] = initial_guess[1]
         # Check the results.
         if (Mu < 2100) and (Mu >= 400) and np.abs(Sigma) < 100:
             break
@@ -214,6 +315,288 @@ def Fit_Gaussian_to_Biggest_Peak(X, Y, Gaussians, Xmin=None, Xmax=None):
 # ======================================================================================================================
 
 
+def Compare_Deconvolution_Modes(X, Y, Guard_Margin=75):
+    """
+    This function runs the deconvolution in both full-range and targeted modes and compares the ICO and ISO indices and 
+    the elapsed time, to check the accuracy of the targeted mode and the time saved by that. 
+
+    :param X: An array of the sorted wavenumbers (1/cm). 
+    :param Y: An array of the absorbance values.
+    :param Guard_Margin: The margin (1/cm) added to each band in the targeted mode, defaults to 75
+    :return: A dictionary of the ICO, ISO, and elapsed time (seconds) of both modes, and the relative differences. 
+    """
+    # Run the full-range deconvolution. 
+    Start = time.perf_counter()
+    Full = Run_Deconvolution(X, Y)
+    Full_Time = time.perf_counter() - Start
+    # Run the targeted deconvolution. 
+    Start = time.perf_counter()
+    Targeted = Run_Deconvolution(X, Y, Targeted=True, Guard_Margin=Guard_Margin)
+    Targeted_Time = time.perf_counter() - Start
+    # Prepare the results for returning. 
+    Res = {'Full_ICO'     : Full['ICO'],     'Targeted_ICO' : Targeted['ICO'], 
+           'Full_ISO'     : Full['ISO'],     'Targeted_ISO' : Targeted['ISO'], 
+           'Full_Time'    : Full_Time,       'Targeted_Time': Targeted_Time, 
+           'ICO_RelDiff'  : np.abs(Targeted['ICO'] - Full['ICO']) / Full['ICO'], 
+           'ISO_RelDiff'  : np.abs(Targeted['ISO'] - Full['ISO']) / Full['ISO'], 
+           'Time_Saved'   : 1 - Targeted_Time / Full_Time}
+    # Return the results. 
+    return Res
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Compare_Seeded_Deconvolution(X, Y, Seed_Gaussians, Tolerance=0.01, Repeats=5):
+    """
+    This function runs the deconvolution with and without the seed Gaussians (e.g., from another replicate of the same 
+    binder) and compares the ICO and ISO indices, number of Gaussians, and the elapsed time (the best of a few repeats, 
+    as a single run only takes a few milliseconds). The seeded deconvolution is only acceptable if it reproduces the 
+    results of the normal (unseeded) deconvolution within the tolerance, and it is faster. 
+
+    :param X: An array of the sorted wavenumbers (1/cm). 
+    :param Y: An array of the absorbance values.
+    :param Seed_Gaussians: An array of the seed Gaussians [Mu, Sigma, Amplitude].
+    :param Tolerance: The acceptable relative difference of the ICO and ISO indices, defaults to 0.01
+    :param Repeats: Number of the runs of each deconvolution for measuring the time, defaults to 5
+    :return: A dictionary of the ICO, ISO, number of Gaussians, and elapsed time (seconds) of both runs, the relative 
+    differences, and if the seeded deconvolution is acceptable. 
+    """
+    Normal_Time, Seeded_Time = np.inf, np.inf
+    for _ in range(Repeats):
+        # Run the normal (unseeded) deconvolution. 
+        Start = time.perf_counter()
+        Normal = Run_Deconvolution(X, Y)
+        Normal_Time = min(Normal_Time, time.perf_counter() - Start)
+        # Run the seeded deconvolution. 
+        Start = time.perf_counter()
+        Seeded = Run_Deconvolution(X, Y, Seed_Gaussians=Seed_Gaussians)
+        Seeded_Time = min(Seeded_Time, time.perf_counter() - Start)
+    # Prepare the results for returning. 
+    Res = {'Normal_ICO'   : Normal['ICO'],    'Seeded_ICO'   : Seeded['ICO'], 
+           'Normal_ISO'   : Normal['ISO'],    'Seeded_ISO'   : Seeded['ISO'], 
+           'Normal_NumGaussians': len(Normal['Gaussian_List']), 'Seeded_NumGaussians': len(Seeded['Gaussian_List']), 
+           'Normal_Time'  : Normal_Time,      'Seeded_Time'  : Seeded_Time, 
+           'ICO_RelDiff'  : np.abs(Seeded['ICO'] - Normal['ICO']) / Normal['ICO'], 
+           'ISO_RelDiff'  : np.abs(Seeded['ISO'] - Normal['ISO']) / Normal['ISO']}
+    Res['Acceptable'] = bool((Res['ICO_RelDiff'] <= Tolerance) and (Res['ISO_RelDiff'] <= Tolerance) and 
+                             (Seeded_Time < Normal_Time))
+    # Return the results. 
+    return Res
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Deconvolution_Settings():
+    """
+    This function reads the (optional) deconvolution settings from the "Deconvolution_Settings" item of the config 
+    file, and fills the missing items with the default values. 
+    "Seed_From_Replicates": Seed the deconvolution of a new record with the Gaussians of another replicate of the same 
+    binder (only the initial guesses of the fits, see "Run_Deconvolution"). It is off by default; the ICO and ISO are 
+    the same, but it is only slightly faster, see "Compare_Seeded_Deconvolution". 
+    "Joint_Refinement": Refine all the fitted Gaussians together at the end of the deconvolution (see 
+    "Refine_All_Gaussians"). It is off by default. 
+
+    :return: A dictionary of the deconvolution settings. 
+    """
+    Settings = {'Seed_From_Replicates': False, 'Joint_Refinement': False}
+    ConfigPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..//configs//config.json')
+    try:
+        config = json.load(open(ConfigPath, 'r'))
+        Settings.update(config.get('Deconvolution_Settings', {}))
+    except:
+        pass
+    # Return the results. 
+    return Settings
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Fit_Gaussian_with_Diagnostics(X, Y, Gaussians, Xmin, Xmax, Diagnostics, Peak_Range=None, Seed_Gaussians=None):
+    """
+    This function calls the "Fit_Gaussian_to_Biggest_Peak" function and records the diagnostics of the attempt (number 
+    of trials, number of function evaluations, initial guess of sigma, accepted or rejected, maximum residual before 
+    and after the fit, and elapsed time), whether the fit was successful or not. 
+
+    :param X: An array of Wavenumbers (1/cm).
+    :param Y: An array of Absorptions (updated with deconvoluted results so far).
+    :param Gaussians: A list of all fitted Gaussians. 
+    :param Xmin: Minimum wavenumber to be considered.
+    :param Xmax: Maximum wavenumber to be considered.
+    :param Diagnostics: A list of diagnostics records, the new record will be appended to this list. 
+    :param Peak_Range: The [min, max] wavenumbers to search for the peak, defaults to None
+    :param Seed_Gaussians: An array of the seed Gaussians [Mu, Sigma, Amplitude], defaults to None
+    :return: The updated list of Gaussians with the new fit, and the updated "Y" array (error is raised if failed). 
+    """
+    # Define the record for this attempt. 
+    ValidIndex = np.where((X > Xmin) & (X < Xmax))[0]
+    Record = {'Mu': np.nan, 'Trials': 0, 'NFev': 0, 'Sigma_Guess': np.nan, 'Accepted': 0, 
+              'ResidualMax_Before': Y[ValidIndex].max(), 'ResidualMax_After': np.nan, 'Elapsed_Time': np.nan}
+    Start = time.perf_counter()
+    try:
+        Gaussians, NewY = Fit_Gaussian_to_Biggest_Peak(X, Y, Gaussians, Xmin, Xmax, Peak_Range, Record, 
+                                                       Seed_Gaussians)
+        Record['Mu'] = Gaussians[-1][0]
+        Record['Accepted'] = 1
+        Record['ResidualMax_After'] = NewY[ValidIndex].max()
+    finally:
+        # Save the record, even if the fitting was failed. 
+        Record['Elapsed_Time'] = time.perf_counter() - Start
+        Diagnostics.append([Record[Col] for Col in Diagnostics_Columns])
+    # Return the results. 
+    return Gaussians, NewY
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Summarize_Diagnostics(Deconv):
+    """
+    This function summarizes the diagnostics of a deconvolution run, to be stored next to the full diagnostics array. 
+
+    :param Deconv: The dictionary of the deconvolution results (output of the "Run_Deconvolution" function).
+    :return: A dictionary of the number of attempts, number of rejected attempts, total number of function 
+    evaluations, the total elapsed time (seconds), and the RMS residual and number of iterations of the joint 
+    refinement (None if it was not performed). 
+    """
+    Diagnostics = Deconv['Diagnostics']
+    Res = {'NumAttempts' : Diagnostics.shape[0], 
+           'NumRejected' : int((Diagnostics[:, Diagnostics_Columns.index('Accepted')] == 0).sum()), 
+           'TotalNFev'   : int(Diagnostics[:, Diagnostics_Columns.index('NFev')].sum()), 
+           'Elapsed_Time': Deconv['Elapsed_Time'], 
+           'Refinement_Residual': Deconv.get('Refinement_Residual'), 
+           'Refinement_NumIter' : Deconv.get('Refinement_NumIter')}
+    # Return the results. 
+    return Res
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Refine_All_Gaussians(X, Y, Gaussians, Xmin=600, Xmax=2000, K=4):
+    """
+    This function refines all fitted Gaussians at once (Mu, Sigma, and Amplitude), to remove the bias of the greedy 
+    fitting (with fixed amplitude) where the peaks are overlapping. Each Gaussian is allowed to shift up to its width, 
+    and its width to change within a factor of two. 
+
+    :param X: An array of Wavenumbers (1/cm).
+    :param Y: An array of Absorptions (original data, not the residual).
+    :param Gaussians: A list of all fitted Gaussians, [Mu, Sigma, Amplitude]. 
+    :param Xmin: Minimum wavenumber to be considered, defaults to 600
+    :param Xmax: Maximum wavenumber to be considered, defaults to 2000
+    :param K: Each Gaussian only affects the data points within its ±K*Sigma window, defaults to 4
+    :return: The list of refined Gaussians, the RMS of the refinement residual, and the number of iterations. 
+    """
+    # Prepare the Gaussians and apply the specified interval.
+    G = np.array(Gaussians, dtype=float).reshape(-1, 3)
+    G[:, 1] = np.abs(G[:, 1])
+    ValidIndex = np.where((X > Xmin) & (X < Xmax))[0]
+    XX = X[ValidIndex]
+    YY = Y[ValidIndex]
+    # Define the bounds for all parameters (flattened as [Mu1, Sigma1, Amp1, Mu2, ...]).
+    Lower = np.column_stack((G[:, 0] - G[:, 1], G[:, 1] / 2, np.zeros(G.shape[0]))).ravel()
+    Upper = np.column_stack((G[:, 0] + G[:, 1], G[:, 1] * 2, np.maximum(2 * G[:, 2], 1e-6))).ravel()
+    # Refine all Gaussians together. 
+    Refined, Result = Joint_Refine_Gaussians(XX, YY, G, Lower, Upper, K=K)
+    Refined = Refined[Refined[:, 2] > 1e-6, :]          # Remove the vanished Gaussians. 
+    # Return the results. 
+    return Refined.tolist(), float(np.sqrt(np.mean(Result.fun ** 2))), int(Result.njev)
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Joint_Refine_Gaussians(X, Y, Gaussians, Lower, Upper, K=4):
+    """
+    This function fits the sum of all Gaussians to the data at once, using the "least_squares" method. The Jacobian is 
+    sparse, as each Gaussian only affects the data points within its ±K*Sigma window (based on the upper bound of 
+    Sigma), so that refining many Gaussians together is still fast. 
+
+    :param X: An array of Wavenumbers (1/cm).
+    :param Y: An array of Absorptions.
+    :param Gaussians: An array of the initial Gaussians, where columns are [Mu, Sigma, Amplitude].
+    :param Lower: Lower bounds of the flattened parameters [Mu1, Sigma1, Amp1, Mu2, ...].
+    :param Upper: Upper bounds of the flattened parameters [Mu1, Sigma1, Amp1, Mu2, ...].
+    :param K: Each Gaussian only affects the data points within its ±K*Sigma window, defaults to 4
+    :return: The array of refined Gaussians, and the result object of the "least_squares". 
+    """
+    # Define the sparsity pattern of the Jacobian: rows (data points) and columns (parameters) of non-zero values. 
+    Gaussians = np.asarray(Gaussians, dtype=float)
+    Initial = np.clip(Gaussians.ravel(), Lower, Upper)
+    Window = K * Upper[1::3]
+    Rows, Comps = np.nonzero(np.abs(X[:, None] - Gaussians[:, 0]) <= Window)
+    Rows = np.repeat(Rows, 3)
+    Cols = np.repeat(3 * Comps, 3) + np.tile(np.arange(3), len(Comps))
+    # Define the residual function (sum of all Gaussians minus the data) and its analytical sparse Jacobian. 
+    def Residual(Params):
+        P = Params.reshape(-1, 3)
+        return (P[:, 2] * np.exp(-0.5 * ((X[:, None] - P[:, 0]) / P[:, 1]) ** 2)).sum(axis=1) - Y
+    def Jacobian(Params):
+        P = Params.reshape(-1, 3)[Cols // 3, :]
+        Z = (X[Rows] - P[:, 0]) / P[:, 1]
+        E = np.exp(-0.5 * Z ** 2)
+        Values = np.select([Cols % 3 == 0, Cols % 3 == 1], 
+                           [P[:, 2] * E * Z / P[:, 1],          # d/dMu
+                            P[:, 2] * E * Z ** 2 / P[:, 1]],    # d/dSigma
+                           E)                                   # d/dAmplitude
+        return sparse.csr_matrix((Values, (Rows, Cols)), shape=(len(X), len(Params)))
+    # Run the optimization. 
+    Result = least_squares(Residual, Initial, jac=Jacobian, bounds=(Lower, Upper), method='trf', x_scale='jac')
+    Refined = Result.x.reshape(-1, 3)
+    # Return the results. 
+    return Refined, Result
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Evaluate_Gaussians(X, Gaussians):
+    """
+    This function evaluates all the Gaussians on the provided wavenumbers at once (broadcasting), instead of calling 
+    the "gaussian_bell" function for each Gaussian in a loop. 
+
+    :param X: An array of Wavenumbers (1/cm), with K values.
+    :param Gaussians: An array of G Gaussians, where columns are [Mu, Sigma, Amplitude].
+    :return: A (K, G) array, where each column is the absorption values of one Gaussian. 
+    """
+    G = np.asarray(Gaussians, dtype=float).reshape(-1, 3)
+    return G[:, 2] * np.exp(-0.5 * ((np.asarray(X)[:, None] - G[:, 0]) / G[:, 1]) ** 2)
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Gaussian_Curves(Cache, Xmin, Xmax, Gaussians, Num=1000):
+    """
+    This function returns the curves of all Gaussians on a uniform grid between Xmin and Xmax for plotting purposes. 
+    The evaluated curves are stored in the provided cache (a dictionary, usually one per record), and they are only 
+    recalculated when the list of Gaussians (or the grid) is changed. 
+
+    :param Cache: A dictionary to store the evaluated curves (it is updated in place). 
+    :param Xmin: Minimum wavenumber of the grid.
+    :param Xmax: Maximum wavenumber of the grid.
+    :param Gaussians: An array of Gaussians, where columns are [Mu, Sigma, Amplitude].
+    :param Num: Number of points in the grid, defaults to 1000
+    :return: The grid of wavenumbers (K,) and the curves of all Gaussians (K, G). 
+    """
+    Key = (Xmin, Xmax, Num)
+    Gaussians = np.asarray(Gaussians, dtype=float).reshape(-1, 3)
+    # Check if the curves for the same Gaussians are already calculated. 
+    if Key in Cache and np.array_equal(Cache[Key][0], Gaussians):
+        return Cache[Key][1], Cache[Key][2]
+    # Otherwise, evaluate the curves and store them. 
+    Xgrid = np.linspace(Xmin, Xmax, num=Num)
+    Curves = Evaluate_Gaussians(Xgrid, Gaussians)
+    Cache[Key] = (Gaussians.copy(), Xgrid, Curves)
+    # Return the results. 
+    return Xgrid, Curves
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
 def gaussian_bell(x, mu, sigma, amplitude):
     """
     Gaussian function for fitting.
@@ -232,3 +615,29 @@ def gaussian_bell(x, mu, sigma, amplitude):
 # ======================================================================================================================
 # ======================================================================================================================
 # ======================================================================================================================
+
+
+if __name__ == '__main__':
+    # Compare the full-range and targeted deconvolution modes on the example files. 
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from scripts.Sub04_FTIR_Analysis_Functions import Read_FTIR_Data, Baseline_Adjustment_ALS, Normalization_Method_B
+    ExampleFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'example')
+    Spectra = []
+    for FileName in sorted(fnmatch.filter(os.listdir(ExampleFolder), '*.dpt')):
+        data = Read_FTIR_Data(os.path.join(ExampleFolder, FileName))
+        data = Baseline_Adjustment_ALS(data, 1e6, 1e-1, 150)
+        data, _ = Normalization_Method_B(data)
+        Spectra.append((FileName, data))
+        Res = Compare_Deconvolution_Modes(data[:, 0], data[:, 1])
+        print(f"{FileName}: ICO diff = {Res['ICO_RelDiff'] * 100:.4f}%, ISO diff = {Res['ISO_RelDiff'] * 100:.4f}%, " +
+              f"Time = {Res['Full_Time'] * 1000:.1f} ms vs. {Res['Targeted_Time'] * 1000:.1f} ms " + 
+              f"({Res['Time_Saved'] * 100:.1f}% saved)")
+    # Compare the seeded deconvolution (seeded by the previous replicate) with the normal deconvolution. 
+    for (_, Previous), (FileName, data) in zip(Spectra[:-1], Spectra[1:]):
+        Seed = Run_Deconvolution(Previous[:, 0], Previous[:, 1])['Gaussian_List']
+        Res = Compare_Seeded_Deconvolution(data[:, 0], data[:, 1], Seed)
+        print(f"{FileName} (seeded): ICO diff = {Res['ICO_RelDiff'] * 100:.2f}%, " + 
+              f"ISO diff = {Res['ISO_RelDiff'] * 100:.2f}%, " + 
+              f"Gaussians = {Res['Normal_NumGaussians']} vs. {Res['Seeded_NumGaussians']}, " + 
+              f"Time = {Res['Normal_Time'] * 1000:.1f} ms vs. {Res['Seeded_Time'] * 1000:.1f} ms, " + 
+              f"Acceptable: {Res['Acceptable']}")
@@ -0,0 +1,324 @@
+# Title: External storage of the spectra (memory-mapped binary file beside the database file).
+#
+# Author: agent (agent@local)
+# Date: 10/19/2026
+# ======================================================================================================================
+
+# Importing the required libraries.
+import os
+import sys
+import numpy as np
+from scripts.Sub04_FTIR_Analysis_Functions import Binary_to_Array
+
+
+# Cache of the external stores of the opened databases (database path -> store object, or None if not enabled). The
+# cached store is checked against the database on each use (see "Get_External_Store"), and it should be released when
+# the database is closed (see "Release_External_Store").
+Store_Cache = {}
+
+
+class External_Spectra_Store:
+    """
+    This class keeps the arrays (spectra and deconvolution results) of the records in a binary file beside the database
+    file, instead of the BLOBs in the "Spectra" table. All arrays are saved as float64 values one after another, and the
+    database only holds the offset, length, and shape of each array in the "Spectra_Store_Index" table. The file is
+    only appended (changed or deleted arrays leave unused space, which is reclaimed by "Compact"), and it is read via a
+    memory map, so the arrays are views of the file and scanning all spectra does not have per-record overhead.
+    The name of the current file is saved in the "Spectra_Store_Info" table.
+    The "Compact" is a maintenance step, which is only available from the command line (with the application closed):
+        python -m scripts.Sub08_External_Spectra_Store <database path> compact
+    """
+    def __init__(self, Folder, FileName):
+        self.Folder = Folder                # Directory of the database (and the binary file).
+        self.FileName = FileName            # Name of the binary file.
+        self.Map = None                     # Memory map of the binary file.
+    # ------------------------------------------------------------------------------------------------------------------
+    def Path(self):
+        return os.path.join(self.Folder, self.FileName)
+    # ------------------------------------------------------------------------------------------------------------------
+    def Get_Map(self, MinSize=0):
+        """
+        This function returns the memory map of the binary file, which is re-opened if the file is grown.
+
+        :param MinSize: Minimum required number of values in the map.
+        :return: the memory map as a 1D float64 array.
+        """
+        if self.Map is None or len(self.Map) < MinSize:
+            Size = os.path.getsize(self.Path()) // 8 if os.path.isfile(self.Path()) else 0
+            self.Map = np.memmap(self.Path(), dtype='<f8', mode='r', shape=(Size,)) if Size > 0 else np.zeros(0)
+        # Return the results.
+        return self.Map
+    # ------------------------------------------------------------------------------------------------------------------
+    def Close(self):
+        # Release the memory map (required before removing the file).
+        self.Map = None
+    # ------------------------------------------------------------------------------------------------------------------
+    def Write(self, cursor, idx, Arrays, Sync=True):
+        """
+        This function appends the arrays of a record to the binary file and saves their location in the database. The
+        file should be synced to disk before the database is committed, so a committed location never points to missing
+        data. For writing many records in one transaction, use "Sync=False" and call "Sync" once before the commit.
+
+        :param cursor: cursor for executing the SQLite3 commands.
+        :param idx: The "id" of the record.
+        :param Arrays: A dictionary of the array name (column name in "Spectra" table) and the array.
+        :param Sync: True to sync the file to disk after writing the arrays.
+        """
+        Rows = []
+        with open(self.Path(), 'ab') as File:
+            Offset = File.tell() // 8
+            for Name, Arr in Arrays.items():
+                Arr = np.ascontiguousarray(Arr, dtype='<f8')
+                File.write(Arr.tobytes())
+                Rows.append((idx, Name, Offset, Arr.size, ','.join([str(n) for n in Arr.shape])))
+                Offset += Arr.size
+            if Sync:
+                File.flush()
+                os.fsync(File.fileno())
+        cursor.executemany("""INSERT OR REPLACE INTO Spectra_Store_Index (id, Array, Offset, Length, Shape)
+                           VALUES (?, ?, ?, ?, ?)""", Rows)
+        # Return Nothing.
+        return
+    # ------------------------------------------------------------------------------------------------------------------
+    def Sync(self):
+        # Sync the binary file to disk (required before committing the locations written with "Sync=False").
+        if os.path.isfile(self.Path()):
+            with open(self.Path(), 'ab') as File:
+                os.fsync(File.fileno())
+    # ------------------------------------------------------------------------------------------------------------------
+    def Read(self, cursor, idx, Name):
+        """
+        This function reads an array of a record (read-only view of the memory map).
+
+        :return: The array, or None if it is not available.
+        """
+        cursor.execute("SELECT Offset, Length, Shape FROM Spectra_Store_Index WHERE id = ? AND Array = ?", (idx, Name))
+        Row = cursor.fetchone()
+        if Row is None:
+            return None
+        Offset, Length, Shape = Row
+        Map = self.Get_Map(Offset + Length)
+        # Return the results.
+        return Map[Offset:Offset + Length].reshape(Parse_Shape(Shape))
+    # ------------------------------------------------------------------------------------------------------------------
+    def Read_Rows(self, Offsets, Length):
+        """
+        This function reads many arrays with the same length at once (one vectorized gather from the memory map).
+
+        :param Offsets: The offsets of the arrays (M,).
+        :param Length: The length of all the arrays.
+        :return: A matrix of the arrays (M, Length).
+        """
+        Offsets = np.asarray(Offsets, dtype=np.int64)
+        if len(Offsets) == 0:
+            return np.zeros((0, Length))
+        Map = self.Get_Map(int(Offsets.max()) + Length)
+        # Return the results.
+        return Map[Offsets[:, None] + np.arange(Length)]
+    # ------------------------------------------------------------------------------------------------------------------
+    def Compact(self, conn, cursor):
+        """
+        This function rewrites the binary file with only the arrays which are still in use (the space of the changed
+        or deleted records is reclaimed). The arrays are written in order of the array name and record id, so that the
+        scans over one kind of array (e.g., all "Absorption") are sequential reads. The new file has a new name, and it
+        is activated in the same transaction as the new offsets; the old file is removed afterwards.
+
+        :param conn: connection to the database.
+        :param cursor: cursor for executing the SQLite3 commands.
+        :return: The size of the file before and after the compaction (in bytes).
+        """
+        SizeBefore = os.path.getsize(self.Path()) if os.path.isfile(self.Path()) else 0
+        cursor.execute("SELECT id, Array, Offset, Length FROM Spectra_Store_Index ORDER BY Array, id")
+        Rows = cursor.fetchall()
+        Map = self.Get_Map()
+        OldFileName = self.FileName
+        NewFileName = New_Store_FileName(self.Folder, OldFileName)
+        Updates = []
+        Offset = 0
+        with open(os.path.join(self.Folder, NewFileName), 'wb') as File:
+            for idx, Name, OldOffset, Length in Rows:
+                File.write(np.ascontiguousarray(Map[OldOffset:OldOffset + Length]).tobytes())
+                Updates.append((Offset, idx, Name))
+                Offset += Length
+            File.flush()
+            os.fsync(File.fileno())
+        try:
+            cursor.executemany("UPDATE Spectra_Store_Index SET Offset = ? WHERE id = ? AND Array = ?", Updates)
+            cursor.execute("UPDATE Spectra_Store_Info SET Value = ? WHERE Key = 'FileName'", (NewFileName,))
+            conn.commit()
+        except:
+            conn.rollback()
+            os.remove(os.path.join(self.Folder, NewFileName))
+            raise
+        # Switch to the new file and remove the old one (all the views of the old file should be released first).
+        self.Close()
+        del Map
+        self.FileName = NewFileName
+        try:
+            os.remove(os.path.join(self.Folder, OldFileName))
+        except:
+            pass
+        # Return the results.
+        return SizeBefore, os.path.getsize(self.Path())
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Parse_Shape(StrShape):
+    """
+    This function converts the shape saved in the "Spectra_Store_Index" table (e.g., "1765" or "5,3") to a tuple.
+    """
+    return tuple([int(n) for n in StrShape.split(',') if n != ''])
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def New_Store_FileName(Folder, OldFileName):
+    """
+    This function generates a new name for the binary file of the store, e.g., "MyDB_Spectra_000002.bin".
+    """
+    Base, Number = OldFileName[:-len('_000000.bin')], int(OldFileName[-len('000000.bin'):-len('.bin')])
+    while True:
+        Number += 1
+        FileName = f'{Base}_{Number:06d}.bin'
+        if not os.path.isfile(os.path.join(Folder, FileName)):
+            return FileName
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Database_Path(cursor):
+    """
+    This function returns the full path of the (main) database file of the cursor, or an empty string for in-memory DB.
+    """
+    cursor.execute("PRAGMA database_list")
+    for Row in cursor.fetchall():
+        if Row[1] == 'main':
+            return Row[2] or ''
+    # Return the results.
+    return ''
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_External_Store(cursor):
+    """
+    This function returns the external store of the spectra for the database, or None if the database keeps the
+    spectra as BLOBs in the "Spectra" table (default). The name of the binary file is read from the database on each
+    call, so the cached store (and its memory map) is replaced if the file is changed (e.g., after a compaction by
+    another process, or a database re-created with the same path).
+    """
+    DB_Path = Get_Database_Path(cursor)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'Spectra_Store_Info'")
+    if cursor.fetchone() is None:
+        FileName = None
+    else:
+        cursor.execute("SELECT Value FROM Spectra_Store_Info WHERE Key = 'FileName'")
+        FileName = cursor.fetchone()[0]
+    Store = Store_Cache.get(DB_Path)
+    if Store is not None and Store.FileName != FileName:
+        Store.Close()
+        Store = None
+    if Store is None and FileName is not None:
+        Store = External_Spectra_Store(os.path.dirname(DB_Path), FileName)
+    Store_Cache[DB_Path] = Store
+    # Return the results.
+    return Store
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Release_External_Store(cursor):
+    """
+    This function releases the cached external store of the database (and its memory map). It should be called before
+    closing the connection to the database.
+    """
+    Store = Store_Cache.pop(Get_Database_Path(cursor), None)
+    if Store is not None:
+        Store.Close()
+    # Return Nothing.
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Enable_External_Spectra_Store(conn, cursor, ArrayColumns):
+    """
+    This function switches the database to the external store of the spectra (if it is not already switched). The
+    available BLOBs of the "Spectra" table are moved to the binary file and removed from the database.
+
+    :param conn: connection to the database.
+    :param cursor: cursor for executing the SQLite3 commands.
+    :param ArrayColumns: The name of the array columns of the "Spectra" table.
+    :return: The external store object.
+    """
+    if Get_External_Store(cursor) is not None:
+        return Get_External_Store(cursor)
+    DB_Path = Get_Database_Path(cursor)
+    if DB_Path == '':
+        raise Exception('The external store of the spectra is not available for the in-memory databases.')
+    FileName = f'{os.path.splitext(os.path.basename(DB_Path))[0]}_Spectra_000000.bin'
+    FileName = New_Store_FileName(os.path.dirname(DB_Path), FileName)
+    Store = External_Spectra_Store(os.path.dirname(DB_Path), FileName)
+    if conn.in_transaction:
+        conn.commit()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""CREATE TABLE Spectra_Store_Index (
+                       id INTEGER, Array TEXT, Offset INTEGER, Length INTEGER, Shape TEXT, PRIMARY KEY (id, Array))""")
+        cursor.execute("CREATE TABLE Spectra_Store_Info (Key TEXT PRIMARY KEY, Value TEXT)")
+        cursor.execute("INSERT INTO Spectra_Store_Info (Key, Value) VALUES ('FileName', ?)", (FileName,))
+        cursor.execute("""CREATE TRIGGER IF NOT EXISTS trg_FTIR_store_delete AFTER DELETE ON FTIR
+                       BEGIN DELETE FROM Spectra_Store_Index WHERE id = OLD.id; END""")
+        # Move the available arrays to the binary file.
+        Reader = conn.cursor()
+        Reader.execute(f"""SELECT id, {', '.join([f'{Col}, {Col}_shape, {Col}_dtype' for Col in ArrayColumns])}
+                       FROM Spectra ORDER BY id""")
+        for Row in Reader:
+            Arrays = {}
+            for j, Col in enumerate(ArrayColumns):
+                if isinstance(Row[1 + 3 * j], bytes):
+                    Arrays[Col] = Binary_to_Array(Row[1 + 3 * j], Row[2 + 3 * j], Row[3 + 3 * j])
+            Store.Write(cursor, Row[0], Arrays, Sync=False)
+        cursor.execute(f"UPDATE Spectra SET {', '.join([f'{Col} = NULL' for Col in ArrayColumns])}")
+        Store.Sync()
+        conn.commit()
+    except:
+        conn.rollback()
+        if os.path.isfile(Store.Path()):
+            os.remove(Store.Path())
+        raise
+    cursor.execute("VACUUM")
+    Store_Cache[DB_Path] = Store
+    # Return the results.
+    return Store
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+if __name__ == '__main__':
+    # Usage (from the main directory): python -m scripts.Sub08_External_Spectra_Store <database path> enable|compact
+    from scripts.Sub02_CreateNewSQLTable import Connect_to_Database, Update_Database_Schema, Spectra_Columns
+    conn = Connect_to_Database(sys.argv[1])
+    cursor = conn.cursor()
+    Update_Database_Schema(conn, cursor)
+    if sys.argv[2] == 'enable':
+        Store = Enable_External_Spectra_Store(conn, cursor, [Col for Col in Spectra_Columns
+                                                             if not Col.endswith(('_shape', '_dtype'))])
+        print(f'Spectra are moved to: {Store.Path()}')
+    elif sys.argv[2] == 'compact':
+        Store = Get_External_Store(cursor)
+        if Store is None:
+            print('The database does not use the external store of the spectra.')
+        else:
+            SizeBefore, SizeAfter = Store.Compact(conn, cursor)
+            print(f'Compaction of {Store.Path()}: {SizeBefore / 1e6:.2f} MB -> {SizeAfter / 1e6:.2f} MB')
+    Release_External_Store(cursor)
+    conn.close()
@@ -0,0 +1,181 @@
+# Title: Federated (read-only) queries over several AutoFTIR databases.
+#
+# Author: agent (agent@local)
+# Date: 10/19/2026
+# ======================================================================================================================
+
+# Importing the required libraries.
+import os
+import json
+import sqlite3
+import pathlib
+from scripts.Sub02_CreateNewSQLTable import Spectra_Columns, Get_DB_Settings
+
+
+# Maximum number of the databases in a federated session (default limit of the attached databases in SQLite).
+Max_Federated_Databases = 10
+
+
+def Get_Recent_Databases():
+    """
+    This function reads the list of the recent databases ("Recent_DBs" item of the config file), and only keeps the
+    databases which are still available.
+
+    :return: A list of the paths of the recent databases.
+    """
+    ConfigPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..//configs//config.json')
+    try:
+        RecentDBs = json.load(open(ConfigPath, 'r')).get('Recent_DBs', [])
+    except:
+        RecentDBs = []
+    # Return the results.
+    return [path for path in RecentDBs if path and os.path.isfile(path)]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Open_Federated_Databases(Paths):
+    """
+    This function opens a federated (read-only) session over several AutoFTIR databases. The databases are attached
+    (read-only) to an in-memory database as "DB_1", "DB_2", ..., and the temporary views with the same names as the
+    tables of a single database ("FTIR", "DB_Summary", and "FTIR_Analysis_DB") are created over all of them, with an
+    extra "Source_DB" column (name of the database file). This way, the same queries of the review page can be used
+    for the federated session. Each view is a "UNION ALL" of the tables of the attached databases, so the filters are
+    pushed down by SQLite into each database, where its own indexes are used.
+
+    :param Paths: A list of the paths of the databases.
+    :return: connection and cursor of the federated session.
+    """
+    if len(Paths) == 0:
+        raise Exception('No database is selected for the federated session!')
+    if len(Paths) > Max_Federated_Databases:
+        raise Exception(f'At most {Max_Federated_Databases} databases can be opened in a federated session!')
+    conn = sqlite3.connect(':memory:', uri=True, timeout=Get_DB_Settings()['Busy_Timeout'])
+    cursor = conn.cursor()
+    Sources = []
+    for i, path in enumerate(Paths):
+        if not os.path.isfile(path):
+            conn.close()
+            raise Exception(f'Database "{path}" is not found!')
+        # Unique name for each database (name of the file).
+        Name = os.path.splitext(os.path.basename(path))[0]
+        if Name in [Source[0] for Source in Sources]:
+            Name = f'{Name}_{i + 1}'
+        Alias = f'DB_{i + 1}'
+        cursor.execute(f"ATTACH DATABASE ? AS {Alias}", (pathlib.Path(os.path.abspath(path)).as_uri() + '?mode=ro',))
+        Sources.append((Name, Alias, os.path.abspath(path)))
+    # Keep the list of the databases.
+    cursor.execute("CREATE TEMP TABLE Federated_Databases (Source_DB TEXT PRIMARY KEY, Alias TEXT, Path TEXT)")
+    cursor.executemany("INSERT INTO Federated_Databases (Source_DB, Alias, Path) VALUES (?, ?, ?)", Sources)
+    try:
+        Create_Federated_Views(cursor, Sources)
+    except:
+        conn.close()
+        raise
+    conn.commit()
+    # Nothing should be changed in the federated session.
+    cursor.execute("PRAGMA query_only = ON")
+    # Return the results.
+    return conn, cursor
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Table_Columns(cursor, Alias, Table):
+    """
+    This function returns the column names of a table in an attached database (an empty list if it is missing).
+    """
+    cursor.execute(f"PRAGMA {Alias}.table_info({Table})")
+    # Return the results.
+    return [Row[1] for Row in cursor.fetchall()]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Create_Federated_Views(cursor, Sources):
+    """
+    This function creates the temporary views of the federated session (see "Open_Federated_Databases"). Only the
+    columns which are available in all databases are included (the databases may be created by different versions).
+    The summary is calculated from the summary tables of each database (or from its "FTIR" table for the older
+    databases), where the number of unique groups is counted over all databases.
+
+    :param cursor: cursor for executing the SQLite3 commands.
+    :param Sources: A list of (name, alias, path) of the attached databases.
+    """
+    Quote = lambda Name: "'" + Name.replace("'", "''") + "'"
+    # The records ("FTIR" view), without the arrays of the older databases.
+    Columns = None
+    for Name, Alias, _ in Sources:
+        Cols = [Col for Col in Get_Table_Columns(cursor, Alias, 'FTIR') if Col not in Spectra_Columns]
+        if len(Cols) == 0:
+            raise Exception(f'"{Name}" is not an AutoFTIR database (the FTIR table is missing)!')
+        Columns = Cols if Columns is None else [Col for Col in Columns if Col in Cols]
+    cursor.execute("CREATE TEMP VIEW FTIR AS " + " UNION ALL ".join(
+        [f"SELECT {', '.join(Columns)}, {Quote(Name)} AS Source_DB FROM {Alias}.FTIR" for Name, Alias, _ in Sources]))
+    # The summary information ("DB_Summary" view).
+    Totals, Bnumbers, LabAgings, Binders = [], [], [], []
+    for Name, Alias, _ in Sources:
+        if len(Get_Table_Columns(cursor, Alias, 'Summary_Binder')):
+            Totals.append(f"SELECT NumRows, NumValidRows FROM {Alias}.DB_Summary")
+            Bnumbers.append(f"SELECT Bnumber FROM {Alias}.Summary_Bnumber")
+            LabAgings.append(f"SELECT Lab_Aging FROM {Alias}.Summary_LabAging")
+            Binders.append(f"SELECT Bnumber, Lab_Aging FROM {Alias}.Summary_Binder")
+        else:
+            Totals.append(f"SELECT COUNT(*) AS NumRows, SUM(IsOutlier = 0) AS NumValidRows FROM {Alias}.FTIR")
+            Bnumbers.append(f"SELECT Bnumber FROM {Alias}.FTIR WHERE IsOutlier = 0")
+            LabAgings.append(f"SELECT Lab_Aging FROM {Alias}.FTIR WHERE IsOutlier = 0")
+            Binders.append(f"""SELECT Bnumber, Lab_Aging FROM {Alias}.FTIR
+                           WHERE Bnumber IS NOT NULL AND Lab_Aging IS NOT NULL""")
+    cursor.execute(f"""
+    CREATE TEMP VIEW DB_Summary AS SELECT 1 AS id,
+        IFNULL(T.NumRows, 0) AS NumRows, IFNULL(T.NumValidRows, 0) AS NumValidRows,
+        (SELECT COUNT(DISTINCT Bnumber) FROM ({' UNION ALL '.join(Bnumbers)})) AS NumUniqueBnumber,
+        (SELECT COUNT(DISTINCT Lab_Aging) FROM ({' UNION ALL '.join(LabAgings)})) AS NumUniqueLabAging,
+        (SELECT COUNT(*) FROM ({' UNION '.join(Binders)})) AS NumUniqueBnumLabAge
+    FROM (SELECT SUM(NumRows) AS NumRows, SUM(NumValidRows) AS NumValidRows FROM ({' UNION ALL '.join(Totals)})) AS T
+    """)
+    # The aggregated analysis ("FTIR_Analysis_DB" view), only for the databases which have it.
+    Columns, Arms = None, []
+    for Name, Alias, _ in Sources:
+        Cols = Get_Table_Columns(cursor, Alias, 'FTIR_Analysis_DB')
+        if len(Cols) == 0:
+            continue
+        Columns = Cols if Columns is None else [Col for Col in Columns if Col in Cols]
+        Arms.append((Name, Alias))
+    if len(Arms):
+        Columns = ', '.join([f'[{Col}]' for Col in Columns])
+        cursor.execute("CREATE TEMP VIEW FTIR_Analysis_DB AS " + " UNION ALL ".join(
+            [f"SELECT {Columns}, {Quote(Name)} AS Source_DB FROM {Alias}.FTIR_Analysis_DB" for Name, Alias in Arms]))
+    # Return Nothing.
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Stale_Analysis_Databases(cursor):
+    """
+    This function finds the databases of the federated session whose aggregated analysis ("FTIR_Analysis_DB") is
+    missing or not up to date (records are changed after the last analysis). The analysis can't be updated in the
+    federated session (read-only), so it should be updated by opening that database.
+
+    :param cursor: cursor of the federated session.
+    :return: A list of the names of the databases.
+    """
+    cursor.execute("SELECT Source_DB, Alias FROM Federated_Databases ORDER BY Alias")
+    Stale = []
+    for Name, Alias in cursor.fetchall():
+        if len(Get_Table_Columns(cursor, Alias, 'FTIR_Analysis_DB')) == 0:
+            Stale.append(Name)
+        elif len(Get_Table_Columns(cursor, Alias, 'Analysis_Dirty_Groups')):
+            cursor.execute(f"SELECT EXISTS(SELECT 1 FROM {Alias}.Analysis_Dirty_Groups)")
+            if cursor.fetchone()[0]:
+                Stale.append(Name)
+    # Return the results.
+    return Stale
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
@@ -0,0 +1,431 @@
+# Title: Exporting the records of an AutoFTIR database (including the spectra) for the data analysis tools.
+#
+# Author: agent (agent@local)
+# Date: 10/19/2026
+# ======================================================================================================================
+
+# Importing the required libraries.
+import os
+import csv
+import gzip
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Border, Side, Alignment, Font, NamedStyle
+from openpyxl.drawing.image import Image
+from openpyxl.utils import get_column_letter
+from scripts.Sub02_CreateNewSQLTable import Spectra_Columns, Iterate_Records
+try:
+    import pyarrow as pa                # Optional, only required for the Parquet export.
+    import pyarrow.parquet as pq
+except ImportError:
+    pa, pq = None, None
+
+
+# The arrays which are exported along with the scalar columns (by default).
+Export_Arrays = ['Wavenumber', 'Absorption', 'Deconv_GaussianList']
+# The 2D arrays (one row per Gaussian), which are exported as the list of lists.
+Nested_Arrays = ['Deconv_GaussianList', 'Deconv_CarbonylList', 'Deconv_SulfoxideList', 'Deconv_AliphaticList']
+# The sections of the report of an individual record: (title, fill color, columns, labels).
+Report_Sections = [
+    ('General Information', 'FFE989',
+     ['Bnumber', 'Lab_Aging', 'RepNumber', 'FileName', 'FileDirectory', 'IsOutlier'],
+     ['B-number', 'Lab aging level', 'Repetition number', 'Raw data file name', 'Raw data file directory',
+      'Is this test considered Outlier']),
+    ('Pre-processing Properties', 'A7E2FF',
+     ['Baseline_Adjustment_Method', 'ALS_Lambda', 'ALS_Ratio', 'ALS_NumIter', 'Normalization_Method',
+      'Normalization_Coeff'],
+     ['Baseline adjustment method', 'ALSS λ coefficient', 'ALSS ρ coefficient', 'ALSS n coefficient',
+      'Normalization method', 'Normalization β coefficient']),
+    ('Results', 'D4FEC2',
+     ['Deconv_ICO', 'Deconv_ISO', 'ICO_Baseline', 'ISO_Baseline', 'ICO_Tangential', 'ISO_Tangential',
+      'Carbonyl_Area_Baseline', 'Sulfoxide_Area_Baseline', 'Aliphatic_Area_Baseline',
+      'Carbonyl_Area_Tangential', 'Sulfoxide_Area_Tangential', 'Aliphatic_Area_Tangential',
+      'Carbonyl_Peak_Wavenumber', 'Sulfoxide_Peak_Wavenumber', 'Aliphatic_Peak_Wavenumber_1',
+      'Aliphatic_Peak_Wavenumber_2', 'Carbonyl_Peak_Absorption', 'Sulfoxide_Peak_Absorption',
+      'Aliphatic_Peak_Absorption_1', 'Aliphatic_Peak_Absorption_2', 'Carbonyl_Min_Wavenumber',
+      'Carbonyl_Max_Wavenumber', 'Sulfoxide_Min_Wavenumber', 'Sulfoxide_Max_Wavenumber', 'Aliphatic_Min_Wavenumber',
+      'Aliphatic_Max_Wavenumber'],
+     ['ICO (deconvolution)', 'ISO (deconvolution)', 'ICO (baseline integration)', 'ISO (baseline integration)',
+      'ICO (tangential integration)', 'ISO (tangential integration)', 'Carbonyl area (baseline integration)',
+      'Sulfoxide area (baseline integration)', 'Aliphatic area (baseline integration)',
+      'Carbonyl area (tangential integration)', 'Sulfoxide area (tangential integration)',
+      'Aliphatic area (tangential integration)', 'Carbonyl peak location (cm⁻¹)',
+      'Sulfoxide peak location (cm⁻¹)',
+      'First Aliphatic peak location (cm⁻¹)', 'Second aliphatic peak location (cm⁻¹)', 'Carbonyl peak absorbance',
+      'Sulfoxide peak absorbance', 'First Aliphatic peak absorbance', 'Second aliphatic peak absorbance',
+      'Carbonyl peak min boundary (cm⁻¹)', 'Carbonyl peak max boundary (cm⁻¹)',
+      'Sulfoxide peak min boundary (cm⁻¹)', 'Sulfoxide peak max boundary (cm⁻¹)',
+      'Aliphatic peak min boundary (cm⁻¹)', 'Aliphatic peak max boundary (cm⁻¹)'])]
+# The arrays of the report of an individual record.
+Report_Arrays = ['Deconv_GaussianList', 'Wavenumber', 'Absorption', 'RawWavenumber', 'RawAbsorbance']
+# Width of the columns (A to M) of the report of an individual record.
+Report_Column_Widths = [40, 30, 8, 12, 12, 13, 13, 13, 8, 21, 15, 21, 15]
+
+
+def Parquet_Available():
+    """
+    This function checks if the "pyarrow" library (optional, only required for the Parquet export) is installed.
+
+    :return: True if the Parquet export is available, otherwise False.
+    """
+    # Return the results.
+    return pa is not None
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Scalar_Columns(cursor):
+    """
+    This function returns the scalar columns of the FTIR table and their declared SQLite types (the arrays of the
+    older databases, before moving them to the "Spectra" table, are excluded).
+
+    :param cursor: cursor for executing the SQLite3 commands.
+    :return: A list of (column name, declared type).
+    """
+    cursor.execute("PRAGMA table_info(FTIR)")
+    # Return the results.
+    return [(Row[1], Row[2].upper()) for Row in cursor.fetchall() if Row[1] not in Spectra_Columns]
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Records_to_Arrow(Rows, Values, Schema, NumScalars):
+    """
+    This function converts a batch of records (see "Iterate_Records") to an Arrow table. The 2D arrays (list type of
+    the list type in the schema) are converted to the list of their rows.
+
+    :param Rows: A list of the rows of the scalar columns.
+    :param Values: A list of the arrays of each record.
+    :param Schema: The Arrow schema of the table (scalar columns first, and then the arrays).
+    :param NumScalars: Number of the scalar columns.
+    :return: The Arrow table.
+    """
+    Data = [list(Col) for Col in zip(*Rows)] if len(Rows) else [[] for _ in range(NumScalars)]
+    for j, Field in enumerate(list(Schema)[NumScalars:]):
+        Nested = pa.types.is_list(Field.type.value_type)
+        Data.append([None if Arrs[j] is None else
+                     (list(np.atleast_2d(np.asarray(Arrs[j], dtype=np.float64))) if Nested else
+                      np.asarray(Arrs[j], dtype=np.float64).ravel()) for Arrs in Values])
+    # Return the results.
+    return pa.Table.from_arrays([pa.array(Col, type=Field.type) for Col, Field in zip(Data, Schema)], schema=Schema)
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Export_Records_Parquet(cursor, FilePath, Arrays=None, BatchSize=1000):
+    """
+    This function exports the records of the FTIR table to a Parquet file, with the scalar columns and the decoded
+    arrays (e.g., wavenumber, absorption, and the list of Gaussians of the deconvolution) as the Arrow list columns
+    (list of lists for the 2D arrays). The records are read in batches (see "Iterate_Records") sorted by the lab aging,
+    and each batch of a single aging level is written as a row group, so the row groups are partitioned by the lab
+    aging (the analytics tools can skip the row groups using their statistics), and only the required columns can be
+    read from the file. The memory doesn't grow with the size of the database.
+
+    :param cursor: cursor for reading the records (should not be used for anything else until the end).
+    :param FilePath: Path of the Parquet file.
+    :param Arrays: A list of the array columns to export (default is "Export_Arrays").
+    :param BatchSize: Maximum number of the records in each row group.
+    :return: Number of the exported records.
+    """
+    if pa is None:
+        raise Exception('The "pyarrow" library is required for the Parquet export (pip install pyarrow)!')
+    Arrays = list(Export_Arrays if Arrays is None else Arrays)
+    Scalars = Get_Scalar_Columns(cursor)
+    Columns = [Col for Col, _ in Scalars]
+    # Schema of the file (based on the declared types of the columns).
+    Fields = []
+    for Col, Type in Scalars:
+        if 'INT' in Type:
+            Fields.append(pa.field(Col, pa.int64()))
+        elif 'REAL' in Type or 'FLOA' in Type or 'DOUB' in Type:
+            Fields.append(pa.field(Col, pa.float64()))
+        else:
+            Fields.append(pa.field(Col, pa.string()))
+    for Col in Arrays:
+        Type = pa.list_(pa.list_(pa.float64())) if Col in Nested_Arrays else pa.list_(pa.float64())
+        Fields.append(pa.field(Col, Type))
+    Schema = pa.schema(Fields)
+    # Write the records (a row group for each batch of the same lab aging).
+    LabAging = Columns.index('Lab_Aging')
+    Writer = pq.ParquetWriter(FilePath, Schema)
+    NumRecords, Rows, Values = 0, [], []
+    try:
+        for Chunk, ChunkValues in Iterate_Records(cursor, Columns, Arrays, OrderBy='F.Lab_Aging, F.Bnumber, F.id',
+                                                  ChunkSize=BatchSize):
+            for Row, Arrs in zip(Chunk, ChunkValues):
+                if len(Rows) and (len(Rows) >= BatchSize or Row[LabAging] != Rows[-1][LabAging]):
+                    Writer.write_table(Records_to_Arrow(Rows, Values, Schema, len(Columns)))
+                    Rows, Values = [], []
+                Rows.append(Row)
+                Values.append(Arrs)
+                NumRecords += 1
+        if len(Rows):
+            Writer.write_table(Records_to_Arrow(Rows, Values, Schema, len(Columns)))
+    finally:
+        Writer.close()
+    # Return the results.
+    return NumRecords
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Open_Text_Output(FilePath):
+    """
+    This function opens a delimited text file for writing, where the format is based on the extension: tab delimited
+    for "*.tsv" (comma delimited otherwise), and gzip compressed for "*.gz" (e.g., "*.csv.gz").
+
+    :param FilePath: Path of the output file.
+    :return: Two variables, (i) the opened (text) file, and (ii) the delimiter.
+    """
+    Name = FilePath.lower()
+    if Name.endswith('.gz'):
+        # Moderate compression level (the default level of zlib), much faster than the maximum level.
+        File = gzip.open(FilePath, 'wt', compresslevel=6, encoding='utf-8', newline='')
+        Name = Name[:-3]
+    else:
+        File = open(FilePath, 'w', encoding='utf-8', newline='')
+    # Return the results.
+    return File, '\t' if Name.endswith('.tsv') else ','
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Export_Records_CSV(cursor, FilePath, SpectraPath=None, Raw=False, ChunkSize=1000):
+    """
+    This function exports the records of the FTIR table to a delimited text file (CSV or TSV, optionally gzip
+    compressed, see "Open_Text_Output"), with one row per record of all scalar columns. Optionally, the spectra are
+    exported to another file in the long format, i.e., one row per data point (id, wavenumber, absorbance). The
+    records are read in chunks by a single streaming query (see "Iterate_Records"), and both files are written
+    incrementally, so the memory doesn't grow with the size of the database.
+
+    :param cursor: cursor for reading the records (should not be used for anything else until the end).
+    :param FilePath: Path of the file of the records.
+    :param SpectraPath: Path of the file of the spectra, or None to skip the spectra.
+    :param Raw: True to export the raw spectra (before baseline adjustment and normalization).
+    :param ChunkSize: Number of the records to be read in each chunk.
+    :return: Two variables, (i) number of the exported records, and (ii) number of the exported data points.
+    """
+    Columns = [Col for Col, _ in Get_Scalar_Columns(cursor)]
+    Arrays = ['RawWavenumber', 'RawAbsorbance'] if Raw else ['Wavenumber', 'Absorption']
+    Arrays = [] if SpectraPath is None else Arrays
+    NumRecords, NumPoints = 0, 0
+    File, Delimiter = Open_Text_Output(FilePath)
+    SpectraFile = None
+    try:
+        Writer = csv.writer(File, delimiter=Delimiter)
+        Writer.writerow(Columns)
+        if SpectraPath is not None:
+            SpectraFile, SpectraDelimiter = Open_Text_Output(SpectraPath)
+            SpectraFile.write(SpectraDelimiter.join(['id', 'Wavenumber', 'Absorbance']) + '\n')
+        IdIndex = Columns.index('id')
+        for Rows, Values in Iterate_Records(cursor, Columns, Arrays, ChunkSize=ChunkSize):
+            Writer.writerows(Rows)
+            NumRecords += len(Rows)
+            if SpectraFile is None:
+                continue
+            for Row, (X, Y) in zip(Rows, Values):
+                if X is None or Y is None:
+                    continue
+                X, Y = np.asarray(X, dtype=np.float64).ravel(), np.asarray(Y, dtype=np.float64).ravel()
+                NumData = min(len(X), len(Y))
+                # All data points of a record are formatted and written at once (much faster than row by row).
+                Format = f'{Row[IdIndex]}{SpectraDelimiter}%.4f{SpectraDelimiter}%.8g\n'
+                SpectraFile.write(''.join(map(Format.__mod__, zip(X[:NumData].tolist(), Y[:NumData].tolist()))))
+                NumPoints += NumData
+    finally:
+        File.close()
+        if SpectraFile is not None:
+            SpectraFile.close()
+    # Return the results.
+    return NumRecords, NumPoints
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Read_Resize_Image(path, targetPixel):
+    """
+    This function reads the image (*.png, *.jpg) and resize it to properly fit in the Excel file.
+
+    :param path: The complete/relative path to the image.
+    :param targetPixel: The height of the image after resize in pixels, given the fixed aspect ratio.
+    :param return: the resized image object.
+    """
+    Image_Obj = Image(path)
+    Ratio = targetPixel / Image_Obj.height
+    Image_Obj.height = targetPixel
+    Image_Obj.width  = Image_Obj.width * Ratio
+    return Image_Obj
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Report_Record(cursor, idx):
+    """
+    This function reads everything needed for the report of an individual record (see "Write_Individual_Report") with
+    a single query.
+
+    :param cursor: cursor for executing the SQLite3 commands.
+    :param idx: The "id" of the record.
+    :return: A dictionary of the values and arrays of the record, or None if the record is not found.
+    """
+    Columns = ['id'] + [Col for Section in Report_Sections for Col in Section[2]]
+    for Rows, Values in Iterate_Records(cursor, Columns, Report_Arrays, Where='WHERE F.id = ?', Params=(idx,)):
+        Record = dict(zip(Columns, Rows[0]))
+        Record.update(zip(Report_Arrays, Values[0]))
+        # Return the results.
+        return Record
+    return None
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Get_Report_FileName(Record, UsedNames):
+    """
+    This function returns the name of the report file of a record, based on the name of its raw data file (the "id"
+    is added if the name is already used in the same batch).
+
+    :param Record: A dictionary of the values of the record (see "Get_Report_Record").
+    :param UsedNames: A set of the (lower case) names which are already used, which is updated.
+    :return: The file name (*.xlsx).
+    """
+    Name = os.path.splitext(os.path.basename(str(Record['FileName'] or '')))[0] or f'Record_{Record["id"]}'
+    if Name.lower() in UsedNames:
+        Name = f'{Name}_{Record["id"]}'
+    UsedNames.add(Name.lower())
+    # Return the results.
+    return Name + '.xlsx'
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Place_Title(ws, Grid, Row, Col, LastCol, Text, Section):
+    """
+    This function places a title on the grid of the report (see "Write_Individual_Report"), merged over the columns.
+    """
+    Grid[(Row, Col)] = (Text, f'{Section}|Title')
+    ws.merged_cells.add(f'{get_column_letter(Col)}{Row}:{get_column_letter(LastCol)}{Row}')
+    # Return Nothing.
+    return
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
+
+
+def Write_Individual_Report(Record, FilePath, Images):
+    """
+    This function writes the report of an individual record (general information, pre-processing properties, results,
+    Gaussians of the deconvolution, and the raw and pre-processed spectra) to an Excel file. A write-only workbook is
+    used, where the cells are first placed on a grid and then the rows are written in order, and all cells refer to
+    the shared named styles. This function doesn't need the database (the record is read by "Get_Report_Record"), so it
+    can be run in a separate process, e.g., for exporting many records in parallel.
+
+    :param Record: A dictionary of the values and arrays of the record (see "Get_Report_Record").
+    :param FilePath: Path of the Excel file.
+    :param Images: A list of the paths of the images of (i) the baseline correction, and (ii) the deconvolution.
+    :return: The path of the Excel file.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    # Define the styles (shared by all cells).
+    thin            = Side(border_style="thin", color="000000")
+    cell_border     = Border(top=thin, left=thin, right=thin, bottom=thin)
+    title_font      = Font(name="Arial", size=13, bold=True, color="000000")
+    header_font     = Font(name="Arial", bold=True, size=11, color="000000")
+    cell_font       = Font(name="Arial", size=11, color="000000")
+    center_alignment= Alignment(horizontal="center", vertical="center")
+    left_alignment  = Alignment(horizontal="left", vertical="center")
+    Fills = {Section[0]: Section[1] for Section in Report_Sections}
+    Fills.update({'Deconvolution': 'FDBBBB', 'Data': 'DFDED9'})
+    for Name, Color in Fills.items():
+        Fill = PatternFill(start_color=Color, end_color=Color, fill_type="solid")
+        wb.add_named_style(NamedStyle(name=f'{Name}|Blank', fill=Fill, border=Border()))
+        wb.add_named_style(NamedStyle(name=f'{Name}|Title', fill=Fill, border=cell_border, font=title_font,
+                                      alignment=center_alignment))
+        wb.add_named_style(NamedStyle(name=f'{Name}|Label', fill=Fill, border=cell_border, font=header_font,
+                                      alignment=left_alignment))
+        wb.add_named_style(NamedStyle(name=f'{Name}|Value', fill=Fill, border=cell_border, font=cell_font,
+                                      alignment=left_alignment))
+        wb.add_named_style(NamedStyle(name=f'{Name}|Header', fill=Fill, border=cell_border, font=header_font,
+                                      alignment=center_alignment))
+        for Format in ["0", "0.00", "0.0000", "0.000000"]:
+            wb.add_named_style(NamedStyle(name=f'{Name}|{Format}', fill=Fill, border=cell_border, font=cell_font,
+                                          alignment=center_alignment, number_format=Format))
+    # The column widths (should be set before writing the rows).
+    for j, Width in enumerate(Report_Column_Widths):
+        ws.column_dimensions[get_column_letter(j + 1)].width = Width
+    # Place the cells on a grid of {(row, column): (value, style)}.
+    Grid = {}
+    # The general information, pre-processing properties, and the results (first two columns).
+    Row = 1
+    for Name, _, Columns, Labels in Report_Sections:
+        Place_Title(ws, Grid, Row, 1, 2, Name, Name)
+        Row += 1
+        if Name == 'Pre-processing Properties':
+            # Space for the image.
+            for i in range(8):
+                Grid[(Row + i, 1)] = Grid[(Row + i, 2)] = ('', f'{Name}|Blank')
+            ws.add_image(Read_Resize_Image(Images[0], 153), f"A{Row}")
+            Row += 8
+        for Col, Label in zip(Columns, Labels):
+            Value = Record[Col]
+            if Col == 'IsOutlier':
+                Value = 'Yes' if Value else "No"
+            Grid[(Row, 1)] = (Label + ':', f'{Name}|Label')
+            Grid[(Row, 2)] = (Value, f'{Name}|Value')
+            Row += 1
+        Row += 1
+    # The Gaussians of the deconvolution (columns D to H).
+    Place_Title(ws, Grid, 1, 4, 8, 'Deconvolution Results', 'Deconvolution')
+    for i in range(2, 9):
+        for j in range(4, 9):
+            Grid[(i, j)] = ('', 'Deconvolution|Blank')
+    ws.add_image(Read_Resize_Image(Images[1], 125), "E2")
+    for j, Text in enumerate(['Number', 'μ (cm⁻¹)', 'σ (cm⁻¹)', 'α', 'Area'], start=4):
+        Grid[(9, j)] = (Text, 'Deconvolution|Header')
+    Gaussians = Record['Deconv_GaussianList']
+    Gaussians = np.zeros((0, 3)) if Gaussians is None else np.asarray(Gaussians).reshape(-1, 3)
+    for i, (Mu, Sigma, Alpha) in enumerate(Gaussians):
+        Values = [i + 1, float(Mu), abs(float(Sigma)), float(Alpha), float(np.abs(np.sqrt(2 * np.pi) * Alpha * Sigma))]
+        for j, (Value, Format) in enumerate(zip(Values, ["0", "0.00", "0.0000", "0.000000", "0.0000"]), start=4):
+            Grid[(i + 10, j)] = (Value, f'Deconvolution|{Format}')
+    # The raw and pre-processed spectra (columns J to M).
+    Place_Title(ws, Grid, 1, 10, 13, 'FTIR Test Data', 'Data')
+    Place_Title(ws, Grid, 2, 10, 11, 'Raw Data', 'Data')
+    Place_Title(ws, Grid, 2, 12, 13, 'Pre-Processed', 'Data')
+    for j, Text in enumerate(['Wavenumber (cm⁻¹)', 'Absorbance', 'Wavenumber (cm⁻¹)', 'Absorbance'], start=10):
+        Grid[(3, j)] = (Text, 'Data|Header')
+    Spectra = [Record[Col] for Col in ['RawWavenumber', 'RawAbsorbance', 'Wavenumber', 'Absorption']]
+    Spectra = [np.zeros(0) if Arr is None else np.asarray(Arr, dtype=np.float64).ravel() for Arr in Spectra]
+    for j, (Arr, Format) in enumerate(zip(Spectra, ["0.00", "0.0000", "0.00", "0.0000"]), start=10):
+        for i, Value in enumerate(Arr.tolist()):
+            Grid[(i + 4, j)] = (Value, f'Data|{Format}')
+    # Write the rows in order.
+    NumRows = max(Row for Row, _ in Grid)
+    for Row in range(1, NumRows + 1):
+        Cells = []
+        for Col in range(1, len(Report_Column_Widths) + 1):
+            Item = Grid.get((Row, Col))
+            if Item is None:
+                Cells.append(None)
+                continue
+            cell = WriteOnlyCell(ws, value=Item[0])
+            cell.style = Item[1]
+            Cells.append(cell)
+        ws.append(Cells)
+    # Save the Excel file.
+    wb.save(FilePath)
+    # Return the results.
+    return FilePath
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================
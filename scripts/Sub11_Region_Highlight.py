@@ -0,0 +1,72 @@
+# Title: Fast (blitted) redrawing of the highlighted regions of the FTIR plots.
+#
+# Author: agent (agent@local)
+# Date: 10/19/2026
+# ======================================================================================================================
+
+# Importing the required libraries.
+import numpy as np
+
+
+class Region_Highlighter:
+    """
+    This class redraws the highlighted region (area under the curve, between the selected wavenumbers) of the axes of
+    a figure using blitting, so the region follows the spinboxes without redrawing the whole figure. The highlight of
+    each axis is an "animated" artist, which is excluded from the normal drawing of the figure; after each full draw
+    (e.g., new file, or resizing the window), the static background of each axis is saved, and for each update, only
+    the background of that axis is restored and the highlight is drawn on top of it.
+    """
+    def __init__(self, canvas, axes):
+        self.canvas = canvas
+        self.axes = axes
+        self.Highlights = {}            # The highlight artist of each axis (index of the axis as key).
+        self.Backgrounds = {}           # The saved background of each axis (index of the axis as key).
+        self.canvas.mpl_connect('draw_event', self.On_Draw)
+    # ------------------------------------------------------------------------------------------------------------------
+    def On_Draw(self, event):
+        """
+        This function saves the static background of the axes after each full draw, and then draws the highlights.
+        """
+        self.Backgrounds = {}
+        for i, Artist in self.Highlights.items():
+            if self.Is_Valid(i):
+                self.Backgrounds[i] = self.canvas.copy_from_bbox(self.axes[i].bbox)
+                self.axes[i].draw_artist(Artist)
+    # ------------------------------------------------------------------------------------------------------------------
+    def Is_Valid(self, i):
+        """
+        This function checks if the highlight of an axis is still placed on it (not removed by clearing the axis).
+        """
+        return (i in self.Highlights) and (self.Highlights[i] in self.axes[i].collections)
+    # ------------------------------------------------------------------------------------------------------------------
+    def Update(self, i, X, Y, color, label):
+        """
+        This function updates the highlighted region of an axis (area between the curve and zero).
+
+        :param i: Index of the axis.
+        :param X: The wavenumbers of the highlighted region.
+        :param Y: The absorption values of the highlighted region.
+        :param color: Color of the highlighted region.
+        :param label: Label of the highlighted region.
+        """
+        if not self.Is_Valid(i):
+            # First update after plotting the data: replace the (static) highlighted area, and draw the whole figure
+            # once to save the background without it.
+            for coll in self.axes[i].collections[:]:
+                coll.remove()
+            self.Highlights[i] = self.axes[i].fill_between(X, Y, 0, color=color, alpha=0.1, label=label,
+                                                           animated=True)
+            self.canvas.draw()
+            return
+        # Update the polygon of the highlight (along the curve, and back along zero).
+        self.Highlights[i].set_verts([np.column_stack((np.concatenate((X, X[::-1])),
+                                                       np.concatenate((Y, np.zeros(len(Y))))))])
+        if i not in self.Backgrounds:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.Backgrounds[i])
+        self.axes[i].draw_artist(self.Highlights[i])
+        self.canvas.blit(self.axes[i].bbox)
+# ======================================================================================================================
+# ======================================================================================================================
+# ======================================================================================================================